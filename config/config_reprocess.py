@@ -0,0 +1,14 @@
+CONFIG_TITLE = "Reprocess — DET10A2 areas (Dec 2025)"
+
+REPROCESS_CONFIG = {
+    "root_path": "data/root/",
+    "output_name": "ps3000test",        # file prefix of the digitizer to reprocess
+    "start_date": "2025-12-18",         # inclusive; None: all files
+    "end_date": "2025-12-22",
+    "output_path": "data/reprocess/ps3000test_area_v1/",  # one directory per setting
+    "area_window_ns": [0, 2000],        # ns on the file's Time axis
+    "baseline_window_ns": [0, 400],     # pre-trigger part of the window
+    "channels": None,                   # e.g. ["ChA"]; None: all channels
+    "workers": 0,                       # processes; 0: one per CPU core
+    "step_size": "100 MB",              # uproot.iterate chunk size
+}
@@ -2,7 +2,8 @@
 # Unified interactive launcher for H2LaserDAQ.
 #
 # Level 1 — choose a run mode:
-#     Continuous DAQ  /  Snapshot Monitor  /  History Viewer
+#     Continuous DAQ  /  Snapshot Monitor  /  History Viewer  /
+#     Offline Reprocessing
 #
 # Level 2 — choose a config from config/ that matches the selected mode.
 #
@@ -35,6 +36,11 @@ _MODES = [
         "mode":   "history",
         "runner": "runners.run_history_viewer",
     },
+    {
+        "label":  "Offline Reprocessing",
+        "mode":   "reprocess",
+        "runner": "runners.run_reprocess",
+    },
 ]
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -47,9 +53,9 @@ def _discover_configs() -> list:
 
         {
             "title":    str,    # CONFIG_TITLE from the module
-            "mode":     str,    # "continuous", "snapshot", or "history"
+            "mode":     str,    # "continuous", "snapshot", "history" or "reprocess"
             "filename": str,    # e.g. "config_H2PD.py"
-            "data":     dict,   # DIGITIZER_CONFIGS or HISTORY_CONFIG
+            "data":     dict,   # DIGITIZER_CONFIGS, HISTORY_CONFIG or REPROCESS_CONFIG
         }
     """
     results  = []
@@ -88,6 +94,14 @@ def _discover_configs() -> list:
                 "data":     mod.HISTORY_CONFIG,
             })
 
+        elif hasattr(mod, "REPROCESS_CONFIG"):
+            results.append({
+                "title":    title,
+                "mode":     "reprocess",
+                "filename": basename,
+                "data":     mod.REPROCESS_CONFIG,
+            })
+
     return results
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1,50 +1,157 @@
-from datetime import datetime, timedelta
+import os
+import time
+from datetime import datetime
 from zoneinfo import ZoneInfo
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
+
+from src import picoHistory, picoTrendStore
 
 
 def main(history_config: dict) -> None:
+    # Follow mode: history from start_time up to now, then the rows the
+    # digitizer appends (end_time is not used)
+    follow = history_config.get("follow", False)
     try:
         start_time = datetime.strptime(
             history_config["start_time"], "%Y-%m-%d %H:%M:%S"
         )
-        end_time = datetime.strptime(
-            history_config["end_time"], "%Y-%m-%d %H:%M:%S"
-        )
+        if follow:
+            end_time = datetime.now()
+        else:
+            end_time = datetime.strptime(
+                history_config["end_time"], "%Y-%m-%d %H:%M:%S"
+            )
     except (KeyError, ValueError) as e:
         raise ValueError(f"Invalid history config: {e}") from e
 
-    start_ts     = start_time.timestamp()
-    end_ts       = end_time.timestamp()
-    channel_name = history_config["channel_name"]
+    channels     = history_config["channel_name"]
+    if isinstance(channels, str):
+        channels = [channels]
+    # Static matplotlib plot of the CSV rows unless the config asks for the
+    # interactive window or rollups (follow mode needs the window)
+    viewer       = history_config.get("viewer", "pyqtgraph" if follow else "matplotlib")
+    if viewer not in ("pyqtgraph", "matplotlib"):
+        raise ValueError(f"Invalid history config: viewer '{viewer}'; "
+                         f"use 'pyqtgraph' or 'matplotlib'")
+    if follow and viewer != "pyqtgraph":
+        raise ValueError("Invalid history config: follow needs viewer 'pyqtgraph'")
     run_name     = history_config["run_name"]
     data_path    = history_config["data_path"]
+    cache_path   = history_config.get("cache_path")
+    if cache_path is None:
+        cache_path = os.path.join(data_path, ".history_cache")
+    if cache_path:
+        try:
+            os.makedirs(cache_path, exist_ok=True)
+        except OSError as e:
+            print(f"[WARN] History cache {cache_path} unavailable ({e}); "
+                  f"parsing every file")
+            cache_path = False
+
+    # Rollups (written by the digitizer next to data/csv) for long ranges
+    resolution = history_config.get("resolution", "raw")
+    if follow:
+        resolution = None   # live rows append to the CSV rows
+    elif resolution == "auto":
+        resolution = picoTrendStore.pickRollup(
+            (end_time - start_time).total_seconds(),
+            history_config.get("max_points", 20000),
+        )
+    elif resolution == "raw":
+        resolution = None
+    elif resolution not in picoTrendStore.ROLLUP_RESOLUTIONS:
+        raise ValueError(f"Invalid history config: resolution '{resolution}'; "
+                         f"use 'auto', 'raw' or one of "
+                         f"{list(picoTrendStore.ROLLUP_RESOLUTIONS)}")
+    envelope = None
+    if resolution is not None:
+        trend_path = history_config.get("trend_path") or os.path.join(
+            os.path.dirname(os.path.normpath(data_path)), "trend"
+        )
+        t0 = time.perf_counter()
+        data, envelope = _loadRollup(trend_path, run_name, channels, resolution,
+                                     start_time, end_time)
+        if len(data["timestamp"]):
+            print(f"[I/O] Loaded {len(data['timestamp'])} {resolution} rollup "
+                  f"windows from {trend_path} in {time.perf_counter() - t0:.2f} s")
+            _show(viewer, data, channels, envelope,
+                  f"{run_name}  {start_time} → {end_time}  ({resolution} rollup)")
+            return
+        print(f"[WARN] No {resolution} rollups of {run_name} in {trend_path}; "
+              f"loading the CSV rows")
+
+    stats = {}
+    t0    = time.perf_counter()
+    data  = picoHistory.loadRange(data_path, run_name, channels,
+                                  start_time, end_time, cache_path,
+                                  history_config.get("workers"), stats)
+    for path in stats["missing"]:
+        print(f"[WARN] {path} not found, day skipped")
+    if stats["parsed"] + stats["cached"] == 0 and not follow:
+        raise RuntimeError(f"No {run_name} CSV files in {data_path} between "
+                           f"{start_time} and {end_time}")
+    print(f"[I/O] Loaded {len(data['timestamp'])} rows in "
+          f"{time.perf_counter() - t0:.2f} s ({stats['cached']} days cached, "
+          f"{stats['parsed']} parsed)")
+    if follow:
+        # Continue after the last loaded row, from the file that holds it
+        ts    = data["timestamp"]
+        after = float(ts[-1]) if len(ts) else start_time.timestamp()
+        tail  = picoHistory.CsvTail(data_path, run_name, channels,
+                                    datetime.fromtimestamp(after), after=after)
+        print(f"[I/O] Following {run_name} CSV files in {data_path}")
+        from src.H2LaserMonitorApp import H2HistoryApp
+        H2HistoryApp(data, channels, title=f"{run_name}  {start_time} → (live)",
+                     follow=tail,
+                     follow_ms=history_config.get("follow_ms", 2000)).run()
+        return
+    _show(viewer, data, channels, None, f"{run_name}  {start_time} → {end_time}")
+
+
+def _loadRollup(trend_path, run_name, channels, label, start_time, end_time):
+    """
+    Window means of one rollup resolution as viewer data (plotted at the
+    window centre) and the {channel: (min, max)} envelope.
+    """
+    rows = picoTrendStore.readRollup(trend_path, run_name, label,
+                                     start_time, end_time, channels)
+    half = picoTrendStore.ROLLUP_RESOLUTIONS[label] / 2
+    t    = rows["timestamp"] + half
+    keep = (t > start_time.timestamp()) & (t < end_time.timestamp())
+    data = {"timestamp": t[keep]}
+    envelope = {}
+    for ch in channels:
+        data[ch] = rows[f"{ch}_mean"][keep]
+        envelope[ch] = (rows[f"{ch}_min"][keep], rows[f"{ch}_max"][keep])
+    return data, envelope
+
 
-    time_itr = start_time
-    t        = []
-    val      = []
+def _show(viewer, data, channels, envelope, title):
+    if viewer == "pyqtgraph":
+        from src.H2LaserMonitorApp import H2HistoryApp
+        H2HistoryApp(data, channels, title=title, envelope=envelope).run()
+    else:
+        _plotMatplotlib(data, channels, envelope)
 
-    while time_itr.date() <= end_time.date():
-        path = f'{data_path}{run_name}_{time_itr.strftime("%y%m%d")}.csv'
-        df   = pd.read_csv(path)
-        if "timestamp" not in df.columns or channel_name not in df.columns:
-            raise RuntimeError(f"{path}: missing required column")
 
-        df["time"] = pd.to_datetime(df["timestamp"], unit="s", utc=True)
-        df["time"] = df["time"].dt.tz_convert("Asia/Tokyo")
-        mask       = (df["timestamp"] > start_ts) & (df["timestamp"] < end_ts)
+def _plotMatplotlib(data: dict, channels: list, envelope: dict = None) -> None:
+    """Static plot of every point (short ranges)."""
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    import pandas as pd
 
-        t.extend(df.loc[mask, "time"].to_list())
-        val.extend(df.loc[mask, channel_name].to_numpy())
-        time_itr += timedelta(days=1)
+    t = pd.to_datetime(data["timestamp"], unit="s", utc=True).tz_convert("Asia/Tokyo")
 
     fig, ax = plt.subplots(figsize=(10, 4))
-    ax.plot(t, val)
+    for ch in channels:
+        line, = ax.plot(t, data[ch], label=ch)
+        if envelope is not None:
+            ax.fill_between(t, *envelope[ch], color=line.get_color(), alpha=0.25,
+                            linewidth=0)
     ax.set_xlabel("Time [JST]")
     ax.set_ylabel(r"Integrated area [nV·s]")
-    ax.set_title(channel_name)
+    ax.set_title(", ".join(channels))
+    if len(channels) > 1:
+        ax.legend()
     ax.xaxis.set_major_formatter(
         mdates.DateFormatter("%y-%m-%d %H:%M:%S", tz=ZoneInfo("Asia/Tokyo"))
     )
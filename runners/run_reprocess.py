@@ -0,0 +1,13 @@
+from src import picoReprocess
+
+
+def main(reprocess_config: dict) -> None:
+    for key in ("root_path", "output_name", "output_path",
+                "area_window_ns", "baseline_window_ns"):
+        if key not in reprocess_config:
+            raise ValueError(f"Invalid reprocess config: missing '{key}'")
+
+    stats = picoReprocess.reprocess(reprocess_config)
+    if stats["failed"]:
+        print(f"[WARN] {len(stats['failed'])} files failed; fix them and "
+              f"rerun to process only those")
@@ -1,35 +1,84 @@
 # H2LaserDAQManager.py
+import multiprocessing as mp
 import queue
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from .H2Exceptions import DigitizerInitError
 from .utility import log
+from .picoDeviceRegistry import registry
 from .H2LaserDigitizer import H2LaserDigitizer
+from .H2LaserDigitizerProcess import H2LaserDigitizerProcess
 
 class H2LaserDAQManager:
     def __init__(self, digitizer_configs):
         """
         digitizer_configs: dict from name -> config dict
         (e.g. h2_config.DIGITIZER_CONFIGS)
+
+        Devices with "multiprocess": True run in their own process
+        (H2LaserDigitizerProcess); all others run as threads in this one.
+        Threaded devices are initialised in parallel; process devices one
+        after another, since each child process enumerates the units itself
+        and must let go of the ones it does not use first.
         """
+        multiprocess = any(cfg.get("multiprocess", False)
+                           for cfg in digitizer_configs.values())
         self.update_queue = queue.Queue()
-        self.stop_event = threading.Event()
+        # A process-shared event works for threads too
+        self.stop_event = mp.Event() if multiprocess else threading.Event()
         self.workers = {}
 
         print("[INIT] Loading digitizer configuration...")
-        try:
-            for name, cfg in digitizer_configs.items():
-                worker = H2LaserDigitizer(
-                    name=name,
-                    config=cfg,
-                    update_queue=self.update_queue,
-                    stop_event=self.stop_event,
+        t_start = time.perf_counter()
+        threaded = {name: cfg for name, cfg in digitizer_configs.items()
+                    if not cfg.get("multiprocess", False)}
+        errors = []
+        if threaded:
+            with ThreadPoolExecutor(max_workers=len(threaded)) as pool:
+                futures = {
+                    name: pool.submit(self._init_worker, H2LaserDigitizer,
+                                      name, cfg)
+                    for name, cfg in threaded.items()
+                }
+            for name, future in futures.items():
+                try:
+                    self.workers[name] = future.result()
+                except DigitizerInitError as e:
+                    errors.append(e)
+        # Close units found while scanning that no threaded device uses, so
+        # process devices (and nothing else) can open them
+        registry.close_unclaimed()
+        for name, cfg in digitizer_configs.items():
+            if name in threaded or errors:
+                continue
+            try:
+                self.workers[name] = self._init_worker(
+                    H2LaserDigitizerProcess, name, cfg
                 )
-                self.workers[name]=worker
-        except DigitizerInitError as e:
-            log(e)
+            except DigitizerInitError as e:
+                errors.append(e)
+        if errors:
+            for e in errors:
+                log(e)
             log("[FATAL] DAQ initialization failed. Exiting.")
             self.stop_all()
             raise SystemExit(1)
+        # Keep the configured order for start/stop and the GUI
+        self.workers = {name: self.workers[name] for name in digitizer_configs}
+        print(f"[INIT] {len(self.workers)} digitizer(s) ready in "
+              f"{time.perf_counter() - t_start:.2f} s")
+
+    def _init_worker(self, worker_cls, name, cfg):
+        t0 = time.perf_counter()
+        worker = worker_cls(
+            name=name,
+            config=cfg,
+            update_queue=self.update_queue,
+            stop_event=self.stop_event,
+        )
+        print(f"[INIT] '{name}' initialised in {time.perf_counter() - t0:.2f} s")
+        return worker
 
     def start_all(self):
         for w in self.workers.values():
@@ -38,6 +87,8 @@ class H2LaserDAQManager:
     def stop_all(self):
         self.stop_event.set()
         log("[EXIT] Stopping DAQ threads...")
+        for w in self.workers.values():
+            w.interrupt()
         _JOIN_TIMEOUT = 10.0   # seconds to wait before declaring a thread stuck
         for w in self.workers.values():
             log(f"[EXIT] Joining thread '{w.name}' ...")
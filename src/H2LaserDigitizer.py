@@ -1,30 +1,55 @@
 # H2LaserDigitizer.py
 import threading
 import traceback
+import queue
 import ctypes
 import numpy as np
 import time
 from datetime import datetime
-import glob
 import os
 import csv
 from . import picoDAQAssistant
+from . import picoDeviceRegistry
+from . import picoWaveCodec
+from . import picoRunCatalog
+from . import picoTrendStore
 from .H2Exceptions import DigitizerInitError
 from .utility import log
 
 # picosdk imports are intentionally deferred to the hardware methods below
-# (initPico3000, initPico2000, pico3000BlockCapture, pico2000BlockCapture,
-#  _close_hardware) so that this module can be imported and subclassed in
-#  environments where picosdk is not available (e.g. virtual tests).
+# (initPico3000, initPico2000, pico3000BlockCapture, pico3000StreamCapture,
+#  pico3000RapidBlockCapture, pico2000BlockCapture, _close_hardware) so that
+#  this module can be imported and subclassed in environments where picosdk
+#  is not available (e.g. virtual tests).
+
+# ns per unit of PS3000A_TIME_UNITS (FS, PS, NS, US, MS, S), indexed by value
+_TIME_UNITS_NS = np.array([1e-6, 1e-3, 1.0, 1e3, 1e6, 1e9])
+
+
+class _Ps3000aTriggerInfo(ctypes.Structure):
+    # PS3000A_TRIGGER_INFO (ps3000aGetTriggerInfoBulk, 3000D units).
+    # timeStampCounter: trigger point in sample intervals, lower 48 bits valid
+    _fields_ = [
+        ("status",           ctypes.c_uint32),
+        ("segmentIndex",     ctypes.c_uint32),
+        ("reserved0",        ctypes.c_uint32),
+        ("triggerTime",      ctypes.c_int64),
+        ("timeUnits",        ctypes.c_int16),
+        ("reserved1",        ctypes.c_int16),
+        ("timeStampCounter", ctypes.c_uint64),
+    ]
+
+_TIMESTAMP_COUNTER_MASK = (1 << 48) - 1
 
 
 class H2LaserDigitizer(threading.Thread):
+    STREAM_POLL_S = 0.005   # idle wait between GetStreamingLatestValues calls
+
     def __init__(self, name, config, update_queue, stop_event):
         super().__init__(name=name)
         self.config       = config
         self.update_queue = update_queue
         self.stop_event   = stop_event
-        self.trigger_per_file = 10000   # ~400 s at 25 Hz
 
         self.run_mode    = config.get("run_mode")
         self.serial      = config.get("serial")
@@ -32,6 +57,74 @@ class H2LaserDigitizer(threading.Thread):
         self.data_path   = config.get("data_path")
         self.output_name = config.get("output_name")
         self.channels    = config.get("channels")
+        # Rapid-block mode (PS3000A only): triggers captured per arm, each into
+        # its own memory segment. 1 = classic one-trigger-per-arm block mode.
+        self.n_segments  = max(1, int(config.get("rapid_block", 1)))
+        # Pipelined mode: re-arm right after readout and process the finished
+        # batch on a separate thread (double-buffered batchBuffer).
+        self.pipelined   = bool(config.get("pipelined", False))
+        # Streaming mode (PS3000A only): dead-time-free continuous sampling
+        # with a software trigger (picoDAQAssistant.StreamManager).
+        self.streaming   = bool(config.get("streaming", False))
+        # "raw": store int16 ADC counts in ROOT (half the size of float32 mV)
+        # with the conversion constants as file metadata.
+        self.raw_storage = config.get("root_storage", "mV") == "raw"
+        # Raw storage only: delta + byte/bit-shuffle pre-filter in front of
+        # the basket compression (picoWaveCodec)
+        self.root_codec = None
+        codec = config.get("root_codec", "none")
+        if codec != "none":
+            if self.raw_storage:
+                self.root_codec = picoWaveCodec.WaveCodec(codec)
+            else:
+                print(f"[WARN] root_codec '{codec}' needs root_storage 'raw'; ignored")
+        # Year ... ms branches next to the int64 Timestamp branch
+        self.root_calendar = bool(config.get("root_calendar", True))
+        # Memory for the ROOT write buffers; sets entries per chunk
+        self.root_buffer_budget = picoDAQAssistant.parseMemorySize(
+            config.get("root_buffer_budget", "256 MB")
+        )
+        # Basket compression of the ROOT files (uproot's default: ZLIB 1);
+        # test/runBenchRootCompression.py compares the options
+        self.root_compression = picoDAQAssistant.rootCompression(
+            config.get("root_compression", "ZLIB"),
+            config.get("root_compression_level", 1),
+        )
+        # "file": store the constant time axis once per ROOT file (side tree
+        # "timeAxis") instead of a Time branch per event
+        self.root_time_axis = config.get("root_time_axis", "event")
+        # ROOT file rotation (picoDAQAssistant.RootRotator): whichever limit
+        # comes first; local midnight always starts a new file.
+        self.trigger_per_file = int(config.get("root_rotate_triggers", 10000))
+        self.root_rotate_size = picoDAQAssistant.parseMemorySize(
+            config.get("root_rotate_size", "0")
+        )
+        self.root_rotate_interval = float(config.get("root_rotate_interval", 0))
+        # Scratch file for chunks the ROOT writer cannot take yet, so a slow
+        # disk does not stall acquisition (off by default: "0" blocks)
+        self.root_spill_dir   = config.get("root_spill_dir")
+        self.root_spill_limit = picoDAQAssistant.parseMemorySize(
+            config.get("root_spill_limit", "0")
+        )
+        # "binary": raw int16 records + JSON header under <data_path>/bin
+        # (picoDAQAssistant.BinaryWaveSink) instead of ROOT files; rotation
+        # and root_buffer_budget still apply
+        self.output_format = config.get("output_format", "root")
+        if self.output_format not in ("root", "binary"):
+            raise ValueError(f"Unknown output_format '{self.output_format}', "
+                             "use 'root' or 'binary'")
+        # SQLite catalog of the written files (picoRunCatalog): True for
+        # <data_path>/catalog.sqlite, a path, or False (default: off)
+        self.run_catalog = config.get("run_catalog", False)
+        # Continuous-mode trend rows (every 100 triggers): "csv", "binary"
+        # (columnar picoTrendStore file under <data_path>/trend) or "both"
+        self.trend_format = config.get("trend_format", "csv")
+        if self.trend_format not in ("csv", "binary", "both"):
+            raise ValueError(f"Unknown trend_format '{self.trend_format}', "
+                             "use 'csv', 'binary' or 'both'")
+        # 1 min / 10 min / 1 h rollups of the trend rows under
+        # <data_path>/trend (picoTrendStore.TrendRollup), off by default
+        self.trend_rollups = config.get("trend_rollups", False)
 
         self.channel_name = {
             self.channels[i]: config.get("channel_name")[i]
@@ -39,14 +132,48 @@ class H2LaserDigitizer(threading.Thread):
         }
 
         self.csv_pointer  = None
+        self.trend_writer = None
+        self.trend_rollup = None
         self.root_pointer = None
+        self._catalog     = None
+        self._csv_span    = None   # [first_ns, last_ns, rows] not yet cataloged
         self.error        = None   # set if run() exits due to an exception
 
+        # Scope idle time between readout and the next arm, for the health
+        # print (reset every 1000 triggers).
+        self._dead_time_s    = 0.0
+        self._dead_time_trig = 0
+
         try:
             self._init_hardware(config)
         except DigitizerInitError:
             raise
 
+        # Per-channel ADC -> mV constants, computed once. The ROOT writer
+        # uses it to convert whole chunks; the aggregates below use its
+        # scale/offset directly.
+        self.adc_converter = picoDAQAssistant.AdcConverter(
+            self.channels, self.ch_range, self.maxADC, self.ch_offset
+        )
+
+        # Batch of raw ADC waveforms handed to _run_loop, shape
+        # (n_segments, channels, samples). Rapid-block init allocates it
+        # itself because the driver writes into it directly.
+        if getattr(self, "batchBuffer", None) is None:
+            self.batchBuffer = np.zeros(
+                (self.n_segments, len(self.channels), self.sample_number),
+                dtype=np.int16,
+            )
+        # Trigger time of each batchBuffer entry, perf_counter_ns() clock
+        self.batchTimes = np.zeros(self.n_segments, dtype=np.int64)
+        # Ready fires when the post-trigger part of the window is recorded
+        pre_samples = int(config.get("pre_trigger", 0) / 100.0
+                          * self.sample_number)
+        self._post_trigger_ns = int(
+            (self.sample_number - pre_samples) * self.delta_t
+        )
+        self._hw_trigger_offset_ns = 0
+
         if self.run_mode == "continuous":
             self.peak_area_buffer = {ch: 0 for ch in self.channels}
             self.avg_wave_buffer  = {ch: np.zeros(self.sample_number)
@@ -68,6 +195,7 @@ class H2LaserDigitizer(threading.Thread):
         Initialise the physical digitizer.
         Must set at minimum: self.sample_number, self.t, self.delta_t,
         self.bufferMax, self.maxADC, self.ch_range, self.ch_offset.
+        May set self.batchBuffer if the driver fills it directly.
         Override in subclasses to replace hardware with a virtual source.
         """
         if self.model == "3405D":
@@ -85,6 +213,46 @@ class H2LaserDigitizer(threading.Thread):
         elif self.model == "2204A":
             self.pico2000BlockCapture()
 
+    def _capture_batch(self):
+        """
+        Block until one or more triggers are in self.batchBuffer and return
+        how many were captured. Rapid-block mode fills all segments with a
+        single arm, streaming mode cuts software-triggered windows; otherwise
+        this wraps _capture_block(), so subclasses that only override
+        _capture_block() keep working unchanged. Trigger times go to
+        self.batchTimes.
+        """
+        if self.model == "3405D" and self.streaming:
+            return self.pico3000StreamCapture()
+        if self.model == "3405D" and self.n_segments > 1:
+            return self.pico3000RapidBlockCapture()
+
+        self._capture_block()
+        for i, ch_idx in enumerate(self.channels):
+            self.batchBuffer[0, i] = self.bufferMax[ch_idx]
+        self.batchTimes[0] = self._block_trigger_ns()
+        return 1
+
+    def _block_trigger_ns(self):
+        """
+        perf_counter_ns() time of the last block's trigger: the driver's
+        ready time minus the post-trigger window, plus the hardware trigger
+        time offset where the model reports one. A polled capture found
+        complete only after the unpolled sleep (ReadyWaiter.ready_bounds_ns)
+        is placed mid-way between arm and readout. Sources without a ready
+        waiter (virtual digitizers) are stamped at readout.
+        """
+        waiter = getattr(self, "_ready_waiter", None)
+        if waiter is None:
+            return time.perf_counter_ns()
+        ready_ns = waiter.ready_ns
+        if ready_ns is None:
+            if waiter.ready_bounds_ns is None:
+                return time.perf_counter_ns()
+            lo, hi = waiter.ready_bounds_ns
+            ready_ns = max((lo + hi) // 2, lo + self._post_trigger_ns)
+        return ready_ns - self._post_trigger_ns + self._hw_trigger_offset_ns
+
     def _close_hardware(self):
         """
         Stop and disconnect the physical digitizer.
@@ -96,6 +264,7 @@ class H2LaserDigitizer(threading.Thread):
             self.status["stop"]  = ps3000a.ps3000aStop(self.chandle)
             assert_pico_ok(self.status["stop"])
             self.status["close"] = ps3000a.ps3000aCloseUnit(self.chandle)
+            picoDeviceRegistry.registry.release(self.serial)
             assert_pico_ok(self.status["close"])
 
         elif self.model == "2204A":
@@ -104,6 +273,7 @@ class H2LaserDigitizer(threading.Thread):
             self.status["stop"]  = ps2000.ps2000_stop(self.chandle)
             assert_pico2000_ok(self.status["stop"])
             self.status["close"] = ps2000.ps2000_close_unit(self.chandle)
+            picoDeviceRegistry.registry.release(self.serial)
             assert_pico2000_ok(self.status["close"])
 
     # -------------------------------------------------------------------------
@@ -134,144 +304,420 @@ class H2LaserDigitizer(threading.Thread):
                 pass
 
     def _run_loop(self):
-        date_past = ""
-        while not self.stop_event.is_set():
-            date = datetime.today().strftime("%y%m%d")
-
-            # -- open ROOT file -----------------------------------------------
-            today_root_number = len(
-                glob.glob("{}/root/{}_{}*.root".format(
-                    self.data_path, self.output_name, date))
-            )
-            root_name = "{}/root/{}_{}_{:04d}.root".format(
-                self.data_path, self.output_name, date, today_root_number
-            )
-            self.root_pointer = picoDAQAssistant.RootManager(
-                filename=root_name, runN=0, chunk_size=1000,
-                sample_num=self.sample_number, add_channels=self.channels,
+        if self.pipelined:
+            self._start_processing_thread()
+        try:
+            self._file_loop()
+        finally:
+            if self.pipelined:
+                self._stop_processing_thread()
+
+    def _open_root(self, root_name):
+        """Create and start the RootManager of one file (rotator thread)."""
+        raw_meta = None
+        if self.raw_storage:
+            raw_meta = picoDAQAssistant.rawStorageMeta(
+                self.channels, self.ch_range, self.maxADC,
+                self.ch_offset, self.delta_t,
             )
-            self.root_pointer.start_thread()
-            print(f"[I/O] Opening ROOT file {root_name}")
+        root = picoDAQAssistant.RootManager(
+            filename=root_name, runN=0, chunk_size=1000,
+            sample_num=self.sample_number, add_channels=self.channels,
+            raw_meta=raw_meta,
+            converter=None if self.raw_storage else self.adc_converter,
+            calendar=self.root_calendar,
+            memory_budget=self.root_buffer_budget,
+            spill_dir=self.root_spill_dir,
+            spill_limit=self.root_spill_limit,
+            time_axis=self.t if self.root_time_axis == "file" else None,
+            compression=self.root_compression,
+            codec=self.root_codec,
+        )
+        root.start_thread()
+        return root
+
+    def _open_binary(self, bin_name):
+        """Create and start the BinaryWaveSink of one file (rotator thread)."""
+        sink = picoDAQAssistant.BinaryWaveSink(
+            filename=bin_name, sample_num=self.sample_number,
+            add_channels=self.channels,
+            meta=picoDAQAssistant.rawStorageMeta(
+                self.channels, self.ch_range, self.maxADC,
+                self.ch_offset, self.delta_t,
+            ),
+            chunk_size=1000,
+            memory_budget=self.root_buffer_budget,
+            time_axis=self.t,           # always once per file
+        )
+        sink.start_thread()
+        return sink
+
+    def _file_loop(self):
+        if self.output_format == "binary":
+            out_dir = f"{self.data_path}/bin"
+            os.makedirs(out_dir, exist_ok=True)
+            open_file, extension = self._open_binary, "h2w"
+        else:
+            out_dir, open_file, extension = f"{self.data_path}/root", self._open_root, "root"
+        self._open_catalog()
+        self._rotator = picoDAQAssistant.RootRotator(
+            out_dir, self.output_name, open_file,
+            triggers=self.trigger_per_file, max_bytes=self.root_rotate_size,
+            interval_s=self.root_rotate_interval, extension=extension,
+            catalog=self._catalog,
+        )
+        try:
+            self._rotate_loop()
+        finally:
+            # Waits for the files still closing on their writer threads
+            self._rotator.close()
+
+    def _open_catalog(self):
+        if not self.run_catalog:
+            return
+        path = self.run_catalog
+        if path is True:
+            path = f"{self.data_path}/catalog.sqlite"
+        try:
+            self._catalog = picoRunCatalog.RunCatalog(path)
+        except Exception as e:
+            print(f"[WARN] Run catalog {path} not available, not cataloging: {e}")
+            self._catalog = None
 
-            # -- open CSV file (continuous mode, daily rotation) --------------
-            if self.run_mode == "continuous" and date_past != date:
-                csv_fullpath = (
-                    f"{self.data_path}/csv/{self.output_name}_{date}.csv"
-                )
-                file_exists = os.path.exists(csv_fullpath)
-                if self.csv_pointer is not None:
-                    self.csv_pointer.close()
-                    print(f"[I/O] Data saved to CSV file "
-                          f"{self.csv_pointer.name}. File closed")
-                self.csv_pointer = open(csv_fullpath, "a", newline="")
-                print(f"[I/O] Opening CSV file {csv_fullpath}")
-                self.csv_writer = csv.DictWriter(
-                    self.csv_pointer,
-                    fieldnames=["timestamp"] + list(self.channel_name.values()),
+    def _catalog_csv(self, background=True):
+        """
+        Add the CSV rows written since the last call to the catalog, on the
+        rotator's background thread unless background is False.
+        """
+        span, self._csv_span = self._csv_span, None
+        if self._catalog is None or span is None or self.csv_pointer is None:
+            return
+        path = self.csv_pointer.name
+
+        def update():
+            try:
+                self._catalog.update_csv(
+                    self.output_name, path,
+                    list(self.channel_name.values()), *span,
                 )
-                if not file_exists:
-                    self.csv_writer.writeheader()
+            except Exception as e:
+                print(f"[WARN] Run catalog update failed for {path}: {e}")
+
+        if background:
+            self._rotator.submit(update)
+        else:
+            update()
+
+    def _rotate_loop(self):
+        date_past = ""
+        while not self.stop_event.is_set():
+            # -- next ROOT file (pre-opened; the previous one closes on its
+            #    own writer thread) ------------------------------------------
+            now  = datetime.now()
+            date = now.strftime("%y%m%d")
+            self.root_pointer = self._rotator.next_file(now)
+            self._catalog_csv()
+
+            # -- open CSV / trend file (continuous mode, daily rotation) ------
+            if self.run_mode == "continuous" and date_past != date:
+                if self.trend_format != "binary":
+                    self._open_csv(date)
+                if self.trend_format != "csv":
+                    self._open_trend(date)
+                if self.trend_rollups and self.trend_rollup is None:
+                    # Writes its own daily files, by window start
+                    os.makedirs(f"{self.data_path}/trend", exist_ok=True)
+                    self.trend_rollup = picoTrendStore.TrendRollup(
+                        f"{self.data_path}/trend", self.output_name,
+                        list(self.channel_name.values()),
+                    )
                 date_past = date
 
             # -- inner trigger loop -------------------------------------------
-            trigger_cnt = 0
-            time_start  = time.time()
+            self._health_start = time.time()
+            if self.pipelined:
+                self._pipelined_trigger_loop()
+            else:
+                self._trigger_loop()
+
+
+    def _open_csv(self, date):
+        csv_fullpath = (
+            f"{self.data_path}/csv/{self.output_name}_{date}.csv"
+        )
+        file_exists = os.path.exists(csv_fullpath)
+        if self.csv_pointer is not None:
+            self.csv_pointer.close()
+            print(f"[I/O] Data saved to CSV file "
+                  f"{self.csv_pointer.name}. File closed")
+        self.csv_pointer = open(csv_fullpath, "a", newline="")
+        print(f"[I/O] Opening CSV file {csv_fullpath}")
+        self.csv_writer = csv.DictWriter(
+            self.csv_pointer,
+            fieldnames=["timestamp"] + list(self.channel_name.values()),
+        )
+        if not file_exists:
+            self.csv_writer.writeheader()
+
+    def _open_trend(self, date):
+        trend_dir = f"{self.data_path}/trend"
+        os.makedirs(trend_dir, exist_ok=True)
+        if self.trend_writer is not None:
+            self.trend_writer.close()
+            print(f"[I/O] Data saved to trend file "
+                  f"{self.trend_writer.path}. File closed")
+        path = f"{trend_dir}/{self.output_name}_{date}.h2trend"
+        self.trend_writer = picoTrendStore.TrendWriter(
+            path, list(self.channel_name.values()),
+        )
+        print(f"[I/O] Opening trend file {path}")
 
-            while (trigger_cnt < self.trigger_per_file
-                   and not self.stop_event.is_set()):
+    def _trigger_loop(self):
+        """Capture, then process; the scope is idle while processing."""
+        trigger_cnt = 0
+        t_readout   = None
+        while (not self._rotator.due(trigger_cnt)
+               and not self.stop_event.is_set()):
 
-                trigger_cnt += 1
-                self._capture_block()   # <-- hardware or virtual
+            if t_readout is not None:
+                self._dead_time_s += time.perf_counter() - t_readout
+            n_captured = self._capture_batch()   # <-- hardware or virtual
+            t_readout  = time.perf_counter()
+            self._dead_time_trig += n_captured
+            if n_captured == 0:
+                continue
 
-                wave = {"Time": self.t}
-                for ch_idx in self.channels:
-                    wave[f"Ch{ch_idx}"] = picoDAQAssistant.fastAdc2mV(
-                        self.bufferMax[ch_idx],
-                        self.ch_range[ch_idx],
-                        self.maxADC,
-                        self.ch_offset[ch_idx],
-                    )
+            trigger_cnt = self._process_batch(
+                self.batchBuffer, n_captured, trigger_cnt, self.batchTimes
+            )
+
+    def _pipelined_trigger_loop(self):
+        """
+        Re-arm as soon as a batch is read out and let the processing thread
+        convert/store the finished slot while the scope waits for the next
+        trigger. Two batch slots alternate between capture and processing.
+        """
+        trigger_cnt = 0
+        t_readout   = None
+        while (not self._rotator.due(trigger_cnt)
+               and not self.stop_event.is_set()):
 
-                self.root_pointer.fill(**wave)
-
-                # -- continuous mode ------------------------------------------
-                if self.run_mode == "continuous":
-                    for ch_idx in self.channels:
-                        self.peak_area_buffer[ch_idx] += (
-                            np.sum(wave[f"Ch{ch_idx}"]) * self.delta_t / 100 * 1e-3
-                        )   # mV·ns → nV·s
-                        self.avg_wave_buffer[ch_idx] += (
-                            wave[f"Ch{ch_idx}"] / 100
-                        )
-
-                    if trigger_cnt % 100 == 0:
-                        csv_row = {"timestamp": time.time()}
-                        for ch_idx in self.channels:
-                            csv_row[self.channel_name[ch_idx]] = (
-                                self.peak_area_buffer[ch_idx]
-                            )
-                            self.update_queue.put({
-                                "channel_name": self.channel_name[ch_idx],
-                                "timestamp":    csv_row["timestamp"],
-                                "value":        csv_row[self.channel_name[ch_idx]],
-                                "wfm_t":        self.t,
-                                "wfm":          self.avg_wave_buffer[ch_idx].copy(),
-                            })
-                        for ch_idx in self.channels:
-                            self.avg_wave_buffer[ch_idx].fill(0)
-                            self.peak_area_buffer[ch_idx] = 0
-                        self.csv_writer.writerow(csv_row)
-                        self.csv_pointer.flush()
-
-                # -- snapshot mode --------------------------------------------
-                elif self.run_mode == "snapshot":
-                    self.peak_area_buffer.append(
-                        np.sum(wave[f"Ch{self.snapshot_channel}"])
-                        * self.delta_t * 1e-3
-                    )   # mV·ns → nV·s
-                    for ch_idx in self.channels:
-                        self.avg_wave_buffer[ch_idx] += (
-                            wave[f"Ch{ch_idx}"] / self.refresh_trigger_cnt
-                        )
-                    if trigger_cnt % self.refresh_trigger_cnt == 0:
-                        area_avg = np.mean(self.peak_area_buffer)
-                        area_std = np.std(self.peak_area_buffer)
-                        queue_dic = {
-                            "device":      self.name,
-                            "t":           self.t,
-                            "area_avg":    area_avg,
-                            "area_std":    area_std,
-                            "trigger_cnt": self.refresh_trigger_cnt,
-                        }
-                        for ch_idx in self.channels:
-                            queue_dic[f"Ch{ch_idx}"] = (
-                                self.avg_wave_buffer[ch_idx].copy()
-                            )
-                        self.update_queue.put(queue_dic)
-                        for ch_idx in self.channels:
-                            self.avg_wave_buffer[ch_idx].fill(0)
-                        self.peak_area_buffer.clear()
-
-                # -- periodic health print ------------------------------------
-                if trigger_cnt % 1000 == 0:
-                    elapsed = time.time() - time_start
-                    print(
-                        f"[DAQ] Health: "
-                        f"{datetime.now().strftime('%y-%m-%d %H:%M:%S')} "
-                        f"Trigger rate {1000 / elapsed:.2f} Hz"
+            self._check_processing_error()
+            try:
+                slot = self._free_slots.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._use_batch_slot(slot)
+
+            if t_readout is not None:
+                self._dead_time_s += time.perf_counter() - t_readout
+            n_captured = self._capture_batch()   # <-- hardware or virtual
+            t_readout  = time.perf_counter()
+            self._dead_time_trig += n_captured
+            if n_captured == 0:
+                self._free_slots.put(slot)
+                continue
+
+            self._work_q.put((slot, n_captured, trigger_cnt,
+                              self.batchTimes[:n_captured].copy()))
+            trigger_cnt += n_captured
+
+        # Everything captured for this file must be stored before it closes.
+        self._work_q.join()
+        self._check_processing_error()
+
+    def _processing_loop(self):
+        while True:
+            item = self._work_q.get()
+            if item is None:
+                self._work_q.task_done()
+                break
+            slot, n_captured, trigger_cnt, times = item
+            try:
+                if self._proc_error is None:
+                    self._process_batch(
+                        self._batch_slots[slot], n_captured, trigger_cnt, times
+                    )
+            except Exception as e:
+                self._proc_error = e
+                log(traceback.format_exc().strip())
+            finally:
+                self._free_slots.put(slot)
+                self._work_q.task_done()
+
+    def _start_processing_thread(self):
+        self._batch_slots = [self.batchBuffer, np.zeros_like(self.batchBuffer)]
+        self._free_slots  = queue.Queue()
+        for slot in range(len(self._batch_slots)):
+            self._free_slots.put(slot)
+        self._work_q      = queue.Queue()
+        self._proc_error  = None
+        self._proc_thread = threading.Thread(
+            target=self._processing_loop, name=f"{self.name}-proc", daemon=True
+        )
+        self._proc_thread.start()
+
+    def _stop_processing_thread(self):
+        self._work_q.put(None)
+        self._proc_thread.join()
+
+    def _check_processing_error(self):
+        if self._proc_error is not None:
+            raise RuntimeError(
+                f"processing stage failed: {self._proc_error}"
+            ) from self._proc_error
+
+    def _use_batch_slot(self, slot):
+        """Point the next capture at one of the pipeline's batch slots."""
+        self.batchBuffer = self._batch_slots[slot]
+        if self.model == "3405D" and self.n_segments > 1 and not self.streaming:
+            # The driver writes segments in place, so re-register them.
+            self.pico3000SetSegmentBuffers()
+
+    def _process_batch(self, batch, n_captured, trigger_cnt, times):
+        """
+        Store a (n_captured, channels, samples) ADC batch waveform by waveform
+        and update the running aggregates. times: perf_counter_ns() trigger
+        time per waveform. Returns the updated trigger count.
+        """
+        stamps = self.root_pointer.clock.wall_ns(times[:n_captured])
+        # ROOT gets the int16 counts in both storage modes: raw files keep
+        # them, mV files are converted chunk-wise by RootManager's converter.
+        for seg in range(n_captured):
+            trigger_cnt += 1
+            wave = {"Time": self.t}
+            for i, ch_idx in enumerate(self.channels):
+                wave[f"Ch{ch_idx}"] = batch[seg, i]
+            self.root_pointer.fill(timestamp=stamps[seg], **wave)
+            self._process_waveform(batch[seg], trigger_cnt)
+        return trigger_cnt
+
+    def _adc_sum_mV(self, i, adc):
+        """Sum in mV of a waveform of channel index i, from its ADC counts."""
+        conv = self.adc_converter
+        return (np.sum(adc, dtype=np.int64) * float(conv.scale[i])
+                - float(conv.offset[i]) * len(adc))
+
+    def _adc_avg_mV(self, i, adc_sum, n):
+        """Average waveform in mV from a sum of n ADC waveforms (index i)."""
+        conv = self.adc_converter
+        return adc_sum * (float(conv.scale[i]) / n) - float(conv.offset[i])
+
+    def _process_waveform(self, adc, trigger_cnt):
+        """
+        Update the running aggregates with one waveform, given as its
+        (channels, samples) ADC counts. Areas and averages are accumulated in
+        ADC units and converted to mV only when they are published.
+        """
+        # -- continuous mode --------------------------------------------------
+        if self.run_mode == "continuous":
+            for i, ch_idx in enumerate(self.channels):
+                self.peak_area_buffer[ch_idx] += (
+                    self._adc_sum_mV(i, adc[i]) * self.delta_t / 100 * 1e-3
+                )   # mV·ns → nV·s
+                self.avg_wave_buffer[ch_idx] += adc[i]
+
+            if trigger_cnt % 100 == 0:
+                csv_row = {"timestamp": time.time()}
+                for i, ch_idx in enumerate(self.channels):
+                    csv_row[self.channel_name[ch_idx]] = (
+                        self.peak_area_buffer[ch_idx]
                     )
-                    time_start = time.time()
+                    self.update_queue.put({
+                        "channel_name": self.channel_name[ch_idx],
+                        "timestamp":    csv_row["timestamp"],
+                        "value":        csv_row[self.channel_name[ch_idx]],
+                        "wfm_t":        self.t,
+                        "wfm":          self._adc_avg_mV(
+                            i, self.avg_wave_buffer[ch_idx], 100
+                        ),
+                    })
+                for ch_idx in self.channels:
+                    self.avg_wave_buffer[ch_idx].fill(0)
+                    self.peak_area_buffer[ch_idx] = 0
+                values = [csv_row[name] for name in self.channel_name.values()]
+                if self.trend_writer is not None:
+                    self.trend_writer.append(csv_row["timestamp"], values)
+                if self.trend_rollup is not None:
+                    self.trend_rollup.add(csv_row["timestamp"], values)
+                if self.csv_pointer is not None:
+                    self.csv_writer.writerow(csv_row)
+                    self.csv_pointer.flush()
+                    stamp_ns = int(csv_row["timestamp"] * 1e9)
+                    if self._csv_span is None:
+                        self._csv_span = [stamp_ns, stamp_ns, 0]
+                    self._csv_span[1] = stamp_ns
+                    self._csv_span[2] += 1
+
+        # -- snapshot mode ----------------------------------------------------
+        elif self.run_mode == "snapshot":
+            snap_idx = self.channels.index(self.snapshot_channel)
+            self.peak_area_buffer.append(
+                self._adc_sum_mV(snap_idx, adc[snap_idx])
+                * self.delta_t * 1e-3
+            )   # mV·ns → nV·s
+            for i, ch_idx in enumerate(self.channels):
+                self.avg_wave_buffer[ch_idx] += adc[i]
+            if trigger_cnt % self.refresh_trigger_cnt == 0:
+                area_avg = np.mean(self.peak_area_buffer)
+                area_std = np.std(self.peak_area_buffer)
+                queue_dic = {
+                    "device":      self.name,
+                    "t":           self.t,
+                    "area_avg":    area_avg,
+                    "area_std":    area_std,
+                    "trigger_cnt": self.refresh_trigger_cnt,
+                }
+                for i, ch_idx in enumerate(self.channels):
+                    queue_dic[f"Ch{ch_idx}"] = self._adc_avg_mV(
+                        i, self.avg_wave_buffer[ch_idx],
+                        self.refresh_trigger_cnt,
+                    )
+                self.update_queue.put(queue_dic)
+                for ch_idx in self.channels:
+                    self.avg_wave_buffer[ch_idx].fill(0)
+                self.peak_area_buffer.clear()
+
+        # -- periodic health print --------------------------------------------
+        if trigger_cnt % 1000 == 0:
+            elapsed = time.time() - self._health_start
+            dead_ms = (self._dead_time_s / max(self._dead_time_trig, 1)) * 1e3
+            print(
+                f"[DAQ] Health: "
+                f"{datetime.now().strftime('%y-%m-%d %H:%M:%S')} "
+                f"Trigger rate {1000 / elapsed:.2f} Hz, "
+                f"dead time {dead_ms:.3f} ms/trigger, "
+                f"ROOT buffers {self.root_pointer.buffer_bytes() / 2**20:.1f} MB, "
+                f"backlog {self.root_pointer.backlog()} chunks, "
+                f"spilled {self.root_pointer.spilled_chunks} chunks"
+            )
+            self._health_start   = time.time()
+            self._dead_time_s    = 0.0
+            self._dead_time_trig = 0
 
-            # -- close ROOT file ----------------------------------------------
-            self.root_pointer.close()
-            print(f"[I/O] Data saved to ROOT file "
-                  f"{self.root_pointer.getName()}. File closed")
+    def interrupt(self):
+        """Wake the thread if it is blocked waiting for a trigger."""
+        waiter = getattr(self, "_ready_waiter", None)
+        if waiter is not None:
+            waiter.interrupt()
 
     def close(self):
+        if self.trend_writer is not None:
+            self.trend_writer.close()
+            print(f"[I/O] Data saved to trend file "
+                  f"{self.trend_writer.path}. File closed")
+        if self.trend_rollup is not None:
+            self.trend_rollup.close()
+            print(f"[I/O] Trend rollups saved to {self.trend_rollup.trend_dir}")
         if self.run_mode == "continuous" and self.csv_pointer is not None:
+            self._catalog_csv(background=False)   # rotator already closed
             self.csv_pointer.close()
             print(f"[I/O] Data saved to CSV file "
                   f"{self.csv_pointer.name}. File closed")
+        waiter = getattr(self, "_ready_waiter", None)
+        if waiter is not None and waiter.untimed:
+            print(f"[WARN] {waiter.untimed} trigger(s) timed only to between "
+                  f"arm and readout (polled capture found complete)")
         self._close_hardware()
 
     # -------------------------------------------------------------------------
@@ -283,11 +729,16 @@ class H2LaserDigitizer(threading.Thread):
         from picosdk.functions import mV2adc, assert_pico_ok
 
         self.status  = {}
-        self.chandle = ctypes.c_int16()
 
-        self.status["openunit"] = ps3000a.ps3000aOpenUnit(
-            ctypes.byref(self.chandle), None
+        self.status["openunit"], handle = (
+            picoDeviceRegistry.registry.open_ps3000a(self.serial)
         )
+        if handle is None:
+            raise DigitizerInitError(
+                f"[ERROR] Specified digitizer {self.model} "
+                f"{self.serial} not found"
+            )
+        self.chandle = handle
         try:
             assert_pico_ok(self.status["openunit"])
         except:
@@ -301,9 +752,11 @@ class H2LaserDigitizer(threading.Thread):
                     ps3000a.ps3000aChangePowerSource(self.chandle, 286)
                 )
             else:
+                picoDeviceRegistry.registry.release(self.serial)
                 raise DigitizerInitError(
                     f"[ERROR] Specified digitizer {self.model} "
-                    f"{self.serial} not found"
+                    f"{self.serial} could not be opened "
+                    f"(status {powerstate})"
                 )
             assert_pico_ok(self.status["ChangePowerSource"])
         print(f"[INIT] Specified digitizer {self.model} {self.serial} found")
@@ -350,6 +803,14 @@ class H2LaserDigitizer(threading.Thread):
         trigger_level_mV = config.get("trigger_level")
         print(f"\tTrigger channel: {trigger_channel}")
         print(f"\tTrigger level {trigger_level_mV} mV")
+        if self.streaming:
+            # Streaming samples continuously; the trigger runs in software
+            # on the sampled data, so the hardware trigger stays disabled.
+            if trigger_channel == "Ext":
+                raise DigitizerInitError(
+                    "[ERROR] Streaming mode needs an analog trigger channel"
+                )
+            trigger_enable = 0
 
         if trigger_channel == "Ext":
             trig_ch_handle    = ps3000a.PS3000A_CHANNEL["PS3000A_EXTERNAL"]
@@ -376,6 +837,7 @@ class H2LaserDigitizer(threading.Thread):
             "PS3000A_" + config.get("trigger_edge")
         ]
         print(f"\tTrigger type: {trigger_type}")
+        self.trigger_level_ADC = trigger_level_ADC
         trigger_delay = config.get("trigger_delay")
         auto_trigger  = config.get("auto_trigger")
 
@@ -397,6 +859,35 @@ class H2LaserDigitizer(threading.Thread):
         maxsamples              = self.sample_number
         print(f"\tSample number: {self.sample_number}")
 
+        if self.streaming:
+            # In streaming mode the batch holds software-triggered windows
+            self.n_segments = max(1, int(config.get("stream_batch", 100)))
+        elif self.n_segments > 1:
+            # Rapid-block: split memory into one segment per trigger so that
+            # a single ps3000aRunBlock collects n_segments waveforms.
+            nMaxSamples = ctypes.c_int32()
+            self.status["MemorySegments"] = ps3000a.ps3000aMemorySegments(
+                self.chandle, self.n_segments, ctypes.byref(nMaxSamples)
+            )
+            try:
+                assert_pico_ok(self.status["MemorySegments"])
+            except:
+                raise DigitizerInitError(
+                    f"[ERROR] Fail to segment memory into "
+                    f"{self.n_segments} segments"
+                )
+            if nMaxSamples.value < maxsamples:
+                raise DigitizerInitError(
+                    f"[ERROR] {self.n_segments} segments leave only "
+                    f"{nMaxSamples.value} samples per segment "
+                    f"({maxsamples} required)"
+                )
+            self.status["SetNoOfCaptures"] = ps3000a.ps3000aSetNoOfCaptures(
+                self.chandle, self.n_segments
+            )
+            assert_pico_ok(self.status["SetNoOfCaptures"])
+            print(f"\tRapid block: {self.n_segments} triggers per arm")
+
         self.timebase        = config.get("timebase")
         timeIntervalns       = ctypes.c_float()
         returnedMaxSamples   = ctypes.c_int16()
@@ -416,26 +907,62 @@ class H2LaserDigitizer(threading.Thread):
         self.cmaxSamples = ctypes.c_int32(maxsamples)
         self.bufferMax   = {}
         self.bufferMin   = {}
-        for ch_idx in self.channels:
-            self.bufferMax[ch_idx] = np.zeros(maxsamples, dtype=np.int16)
-            self.bufferMin[ch_idx] = np.zeros(maxsamples, dtype=np.int16)
-
-        for ch_idx in self.channels:
-            self.status["SetDataBuffers"] = ps3000a.ps3000aSetDataBuffers(
-                self.chandle,
-                ps3000a.PS3000A_CHANNEL["PS3000A_CHANNEL_" + ch_idx],
-                self.bufferMax[ch_idx].ctypes.data_as(
-                    ctypes.POINTER(ctypes.c_int16)
-                ),
-                self.bufferMin[ch_idx].ctypes.data_as(
-                    ctypes.POINTER(ctypes.c_int16)
-                ),
-                maxsamples, 0, 0,
+        if self.streaming:
+            # Driver-side streaming buffers: each GetStreamingLatestValues
+            # call copies up to stream_buffer new samples per channel here.
+            self.stream_buffer = int(config.get("stream_buffer", 100000))
+            for ch_idx in self.channels:
+                self.bufferMax[ch_idx] = np.zeros(
+                    self.stream_buffer, dtype=np.int16
+                )
+                self.status["SetDataBuffers"] = ps3000a.ps3000aSetDataBuffers(
+                    self.chandle,
+                    ps3000a.PS3000A_CHANNEL["PS3000A_CHANNEL_" + ch_idx],
+                    self.bufferMax[ch_idx].ctypes.data_as(
+                        ctypes.POINTER(ctypes.c_int16)
+                    ),
+                    None, self.stream_buffer, 0, 0,
+                )
+                try:
+                    assert_pico_ok(self.status["SetDataBuffers"])
+                except:
+                    raise DigitizerInitError("[ERROR] Fail to set data buffer")
+        elif self.n_segments > 1:
+            # The driver writes every segment straight into batchBuffer;
+            # bufferMax exposes segment 0 for code that reads single waveforms.
+            self.batchBuffer = np.zeros(
+                (self.n_segments, len(self.channels), maxsamples),
+                dtype=np.int16,
             )
-        try:
-            assert_pico_ok(self.status["SetDataBuffers"])
-        except:
-            raise DigitizerInitError("[ERROR] Fail to set data buffer")
+            for i, ch_idx in enumerate(self.channels):
+                self.bufferMax[ch_idx] = self.batchBuffer[0, i]
+            self.pico3000SetSegmentBuffers()
+            self.bulkOverflow     = (ctypes.c_int16 * self.n_segments)()
+            self.bulkTriggerTime  = (ctypes.c_int64 * self.n_segments)()
+            self.bulkTriggerUnits = (ctypes.c_int32 * self.n_segments)()
+            self.bulkTriggerInfo  = (_Ps3000aTriggerInfo * self.n_segments)()
+            self._segment_clock   = True   # until the driver refuses it
+        else:
+            for ch_idx in self.channels:
+                self.bufferMax[ch_idx] = np.zeros(maxsamples, dtype=np.int16)
+                self.bufferMin[ch_idx] = np.zeros(maxsamples, dtype=np.int16)
+
+            for ch_idx in self.channels:
+                self.status["SetDataBuffers"] = ps3000a.ps3000aSetDataBuffers(
+                    self.chandle,
+                    ps3000a.PS3000A_CHANNEL["PS3000A_CHANNEL_" + ch_idx],
+                    self.bufferMax[ch_idx].ctypes.data_as(
+                        ctypes.POINTER(ctypes.c_int16)
+                    ),
+                    self.bufferMin[ch_idx].ctypes.data_as(
+                        ctypes.POINTER(ctypes.c_int16)
+                    ),
+                    maxsamples, 0, 0,
+                )
+            try:
+                assert_pico_ok(self.status["SetDataBuffers"])
+            except:
+                raise DigitizerInitError("[ERROR] Fail to set data buffer")
 
         self.overflow = (ctypes.c_int16 * 10)()
         self.t        = np.linspace(
@@ -444,36 +971,76 @@ class H2LaserDigitizer(threading.Thread):
             self.cmaxSamples.value,
         )
         self.delta_t  = timeIntervalns.value
+
+        # The driver calls back when the block is complete, so the thread
+        # sleeps on an event instead of sleep-polling ps3000aIsReady.
+        self._ready_waiter   = picoDAQAssistant.ReadyWaiter(
+            self.stop_event, name=f"{self.model} {self.serial}"
+        )
+        self._block_ready_cb = ps3000a.BlockReadyType(
+            lambda handle, status, param: self._ready_waiter.notify(status)
+        )
+
+        if self.streaming:
+            noise_rms_mV = config.get("noise_rms", 0)
+            self.stream_manager = picoDAQAssistant.StreamManager(
+                channels=self.channels,
+                trigger_channel=trigger_channel,
+                pre_samples=self.preTriggerSamples,
+                post_samples=self.postTriggerSamples,
+                capacity=4 * self.stream_buffer + 2 * self.sample_number,
+                dtype="int16",
+                t=self.t,
+            )
+            self.stream_manager.SetThreshold(self.trigger_level_ADC)
+            self.stream_manager.SetNoiseRMS(
+                mV2adc(noise_rms_mV, self.ch_range[trigger_channel], self.maxADC)
+            )
+            if config.get("trigger_edge") == "FALLING":
+                self.stream_manager.SetFallingEdge()
+            else:
+                self.stream_manager.SetRisingEdge()
+            self._stream_started  = False
+            self._stream_ready_cb = ps3000a.StreamingReadyType(
+                self._on_stream_ready
+            )
+            print(f"\tStreaming: software trigger, "
+                  f"{self.stream_buffer} samples per driver buffer")
         print("[INIT] Initialization complete")
 
+    def pico3000SetSegmentBuffers(self):
+        """Register every rapid-block segment of self.batchBuffer."""
+        from picosdk.ps3000a import ps3000a
+        from picosdk.functions import assert_pico_ok
+
+        for seg in range(self.n_segments):
+            for i, ch_idx in enumerate(self.channels):
+                self.status["SetDataBuffer"] = ps3000a.ps3000aSetDataBuffer(
+                    self.chandle,
+                    ps3000a.PS3000A_CHANNEL["PS3000A_CHANNEL_" + ch_idx],
+                    self.batchBuffer[seg, i].ctypes.data_as(
+                        ctypes.POINTER(ctypes.c_int16)
+                    ),
+                    self.sample_number, seg, 0,
+                )
+                try:
+                    assert_pico_ok(self.status["SetDataBuffer"])
+                except:
+                    raise DigitizerInitError(
+                        f"[ERROR] Fail to set data buffer for segment {seg}"
+                    )
+
     def pico3000BlockCapture(self):
         from picosdk.ps3000a import ps3000a
         from picosdk.functions import assert_pico_ok
 
+        self._ready_waiter.arm()
         self.status["runblock"] = ps3000a.ps3000aRunBlock(
             self.chandle, self.preTriggerSamples, self.postTriggerSamples,
-            self.timebase, 1, None, 0, None, None,
+            self.timebase, 1, None, 0, self._block_ready_cb, None,
         )
         assert_pico_ok(self.status["runblock"])
-
-        ready = ctypes.c_int16(0)
-        check = ctypes.c_int16(0)
-        self.status["isReady"] = ps3000a.ps3000aIsReady(
-            self.chandle, ctypes.byref(ready)
-        )
-        trig_timeout = 10
-        trig_start   = time.time()
-        while ready.value == check.value and not self.stop_event.is_set():
-            if time.time() - trig_start > trig_timeout:
-                print(
-                    f"[WARN]: {self.model} {self.serial}: "
-                    f"No trigger for {trig_timeout} seconds"
-                )
-                trig_timeout += 10
-            time.sleep(0.01)
-            self.status["isReady"] = ps3000a.ps3000aIsReady(
-                self.chandle, ctypes.byref(ready)
-            )
+        self._ready_waiter.wait()
 
         self.status["GetValues"] = ps3000a.ps3000aGetValues(
             self.chandle, 0, ctypes.byref(self.cmaxSamples),
@@ -482,6 +1049,147 @@ class H2LaserDigitizer(threading.Thread):
         if not self.stop_event.is_set():
             assert_pico_ok(self.status["GetValues"])
 
+            triggerTime  = ctypes.c_int64()
+            triggerUnits = ctypes.c_int32()
+            self.status["GetTriggerTimeOffset"] = (
+                ps3000a.ps3000aGetTriggerTimeOffset64(
+                    self.chandle, ctypes.byref(triggerTime),
+                    ctypes.byref(triggerUnits), 0,
+                )
+            )
+            assert_pico_ok(self.status["GetTriggerTimeOffset"])
+            self._hw_trigger_offset_ns = int(
+                triggerTime.value * _TIME_UNITS_NS[triggerUnits.value]
+            )
+
+    def pico3000RapidBlockCapture(self):
+        """
+        Arm once for n_segments triggers and bulk-read every segment into
+        self.batchBuffer. Returns the number of captured triggers (0 if the
+        stop event interrupted the capture). The last segment is timed from
+        the batch's ready time; the others from their distance to it on the
+        scope's trigger time-stamp counter (ps3000aGetTriggerInfoBulk, 3000D
+        units), refined by each segment's hardware trigger time offset.
+        """
+        from picosdk.ps3000a import ps3000a
+        from picosdk.functions import assert_pico_ok
+
+        self._ready_waiter.arm()
+        self.status["runblock"] = ps3000a.ps3000aRunBlock(
+            self.chandle, self.preTriggerSamples, self.postTriggerSamples,
+            self.timebase, 1, None, 0, self._block_ready_cb, None,
+        )
+        assert_pico_ok(self.status["runblock"])
+
+        if not self._ready_waiter.wait():
+            # Partially filled segments are dropped; the scope is stopped in
+            # _close_hardware().
+            return 0
+
+        noOfSamples = ctypes.c_uint32(self.cmaxSamples.value)
+        self.status["GetValuesBulk"] = ps3000a.ps3000aGetValuesBulk(
+            self.chandle, ctypes.byref(noOfSamples),
+            0, self.n_segments - 1, 0, 0, ctypes.byref(self.bulkOverflow),
+        )
+        assert_pico_ok(self.status["GetValuesBulk"])
+
+        self.status["GetValuesTriggerTimeOffsetBulk"] = (
+            ps3000a.ps3000aGetValuesTriggerTimeOffsetBulk64(
+                self.chandle, self.bulkTriggerTime, self.bulkTriggerUnits,
+                0, self.n_segments - 1,
+            )
+        )
+        assert_pico_ok(self.status["GetValuesTriggerTimeOffsetBulk"])
+        offset_ns = (np.ctypeslib.as_array(self.bulkTriggerTime)
+                     * _TIME_UNITS_NS[np.ctypeslib.as_array(self.bulkTriggerUnits)])
+        last_ns = self._ready_waiter.ready_ns - self._post_trigger_ns
+        self.batchTimes[:] = (last_ns + self._segment_offsets_ns(last_ns)
+                              + offset_ns.astype(np.int64))
+        return self.n_segments
+
+    def _segment_offsets_ns(self, last_ns):
+        """
+        Trigger time of every rapid-block segment relative to the last one
+        (int64 ns, last entry 0), from the trigger time-stamp counter. Units
+        without it (the driver refuses ps3000aGetTriggerInfoBulk) get the
+        segments spread evenly from the arm to the last trigger: exact for
+        a regular trigger, otherwise off by up to the spread of the trigger
+        intervals within the batch.
+        """
+        from picosdk.ps3000a import ps3000a
+
+        if self._segment_clock:
+            status = ps3000a.ps3000aGetTriggerInfoBulk(
+                self.chandle, self.bulkTriggerInfo, 0, self.n_segments - 1,
+            )
+            if status == 0:
+                counter = np.array([info.timeStampCounter & _TIMESTAMP_COUNTER_MASK
+                                    for info in self.bulkTriggerInfo],
+                                   dtype=np.int64)
+                ticks = (counter - counter[-1]) & _TIMESTAMP_COUNTER_MASK
+                ticks[ticks > _TIMESTAMP_COUNTER_MASK // 2] -= _TIMESTAMP_COUNTER_MASK + 1
+                return np.round(ticks * self.delta_t).astype(np.int64)
+            self._segment_clock = False
+            print(f"[WARN] {self.model} {self.serial}: no per-segment trigger "
+                  f"time-stamps (status {status}); rapid-block segments are "
+                  f"spread evenly between arm and the last trigger")
+        span = last_ns - self._ready_waiter.arm_ns
+        k = np.arange(1, self.n_segments + 1, dtype=np.int64)
+        return (k - self.n_segments) * span // self.n_segments
+
+    def pico3000StreamCapture(self):
+        """
+        Pull streamed samples into the StreamManager rings until at least one
+        software-triggered window is available, then cut up to n_segments
+        windows into self.batchBuffer. Returns the number of windows (0 if
+        the stop event interrupted the wait).
+        """
+        from picosdk.ps3000a import ps3000a
+        from picosdk.functions import assert_pico_ok
+
+        if not self._stream_started:
+            sampleInterval = ctypes.c_uint32(int(round(self.delta_t)))
+            self.status["runStreaming"] = ps3000a.ps3000aRunStreaming(
+                self.chandle, ctypes.byref(sampleInterval),
+                ps3000a.PS3000A_TIME_UNITS["PS3000A_NS"],
+                0, 0, 0, 1, 0, self.stream_buffer,
+            )
+            assert_pico_ok(self.status["runStreaming"])
+            # Sample k of the stream was taken at _stream_t0_ns + k * dt
+            self._stream_t0_ns   = time.perf_counter_ns()
+            self._stream_index   = np.zeros(self.n_segments, dtype=np.int64)
+            self._stream_started = True
+            print(f"[DAQ] Streaming started at {sampleInterval.value} ns/sample")
+
+        while not self.stop_event.is_set():
+            n_windows = self.stream_manager.NextWindows(
+                self.batchBuffer, self._stream_index
+            )
+            if n_windows:
+                self.batchTimes[:n_windows] = self._stream_t0_ns + (
+                    self._stream_index[:n_windows] * self.delta_t
+                ).astype(np.int64)
+                return n_windows
+            self._stream_new = 0
+            self.status["GetStreamingLatestValues"] = (
+                ps3000a.ps3000aGetStreamingLatestValues(
+                    self.chandle, self._stream_ready_cb, None
+                )
+            )
+            if self._stream_new == 0:
+                # Driver has nothing new yet; wait a little (or until stop)
+                self.stop_event.wait(self.STREAM_POLL_S)
+        return 0
+
+    def _on_stream_ready(self, handle, noOfSamples, startIndex, overflow,
+                         triggerAt, triggered, autoStop, param):
+        # Called from inside ps3000aGetStreamingLatestValues on this thread
+        self.stream_manager.Put({
+            ch_idx: self.bufferMax[ch_idx][startIndex:startIndex + noOfSamples]
+            for ch_idx in self.channels
+        })
+        self._stream_new += noOfSamples
+
     # -------------------------------------------------------------------------
     # PicoScope 2204A (PS2000) — hardware implementation
     # -------------------------------------------------------------------------
@@ -492,29 +1200,25 @@ class H2LaserDigitizer(threading.Thread):
 
         self.status = {}
 
-        handles = {}
-        while True:
-            h = ps2000.ps2000_open_unit()
-            if h <= 0:
-                break
-            handles[self.getPico2000Serial(h)] = h
-        print(f">>> {len(handles)} pico2000 detected")
-
-        self.chandle = None
-        for serial, handle in handles.items():
-            if serial == self.serial:
-                self.chandle = ctypes.c_int16(handle)
-                print(
-                    f"[INIT] Specified digitizer {self.model} "
-                    f"{self.serial} found"
-                )
-            else:
-                ps2000.ps2000_close_unit(handle)
-        if self.chandle is None:
+        if self.n_segments > 1:
+            print(f"[WARN] Rapid block is not supported on {self.model}; "
+                  f"capturing one trigger per arm")
+            self.n_segments = 1
+        if self.streaming:
+            print(f"[WARN] Streaming is not supported on {self.model}; "
+                  f"using block mode")
+            self.streaming = False
+
+        # Units are enumerated once per process; other workers' units stay
+        # open for them.
+        handle = picoDeviceRegistry.registry.claim_ps2000(self.serial)
+        if handle is None:
             raise DigitizerInitError(
                 f"[ERROR] Specified digitizer {self.model} "
                 f"{self.serial} not found"
             )
+        self.chandle = ctypes.c_int16(handle)
+        print(f"[INIT] Specified digitizer {self.model} {self.serial} found")
 
         self.unused_channels = set(["A", "B"]) - set(self.channels)
         self.ch_range  = {}
@@ -611,39 +1315,28 @@ class H2LaserDigitizer(threading.Thread):
             self.cmaxSamples.value,
         )
         self.delta_t = timeInterval.value
-        print("[INIT] Initialization complete")
 
-    def getPico2000Serial(self, handle):
-        from picosdk.ps2000 import ps2000
-        buf = ctypes.create_string_buffer(64)
-        ps2000.ps2000_get_unit_info(
-            ctypes.c_int16(handle), buf,
-            ctypes.c_int16(len(buf)), ctypes.c_int16(4),
+        # ps2000 has no block-ready callback: poll, but only around the
+        # learned trigger period instead of every 10 ms.
+        self._ready_waiter = picoDAQAssistant.ReadyWaiter(
+            self.stop_event,
+            is_ready=lambda: ps2000.ps2000_ready(self.chandle) != 0,
+            name=f"{self.model} {self.serial}",
         )
-        return buf.value.decode(errors="ignore")
+        print("[INIT] Initialization complete")
 
     def pico2000BlockCapture(self):
         from picosdk.ps2000 import ps2000
         from picosdk.functions import assert_pico2000_ok
 
         oversample = ctypes.c_int16(1)
+        self._ready_waiter.arm()
         self.status["runBlock"] = ps2000.ps2000_run_block(
             self.chandle, self.sample_number, self.timebase,
             oversample, ctypes.byref(self.pico2000_timeIndisposedms),
         )
         assert_pico2000_ok(self.status["runBlock"])
-
-        trig_timeout = 10
-        trig_start   = time.time()
-        while (ps2000.ps2000_ready(self.chandle) == 0
-               and not self.stop_event.is_set()):
-            if time.time() - trig_start > trig_timeout:
-                print(
-                    f"[WARN]: {self.model} {self.serial}: "
-                    f"No trigger for {trig_timeout} seconds"
-                )
-                trig_timeout += 10
-            time.sleep(0.01)
+        self._ready_waiter.wait()
 
         self.status["getValues"] = ps2000.ps2000_get_values(
             self.chandle,
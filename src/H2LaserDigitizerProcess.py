@@ -0,0 +1,152 @@
+# H2LaserDigitizerProcess.py
+# Runs one H2LaserDigitizer (and its RootManager writer) in its own process.
+#
+# Each digitizer process has its own interpreter and GIL, so ADC conversion,
+# uproot serialisation and CSV writing of one device no longer compete with
+# the other devices or with the Qt GUI. GUI updates travel to the coordinator
+# through a picoDAQAssistant.SharedMemoryRing (arrays are copied raw, not
+# pickled). A drain thread in the coordinator re-posts them unchanged on the
+# manager's update_queue, so H2MonitorApp / H2SnapshotApp work as before.
+#
+# H2LaserDigitizerProcess exposes the subset of the threading.Thread /
+# H2LaserDigitizer interface that H2LaserDAQManager uses: start(), join(),
+# is_alive(), interrupt(), close(), name, error.
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+from . import picoDAQAssistant
+from .picoDeviceRegistry import registry
+from .H2Exceptions import DigitizerInitError
+from .H2LaserDigitizer import H2LaserDigitizer
+
+_INIT_TIMEOUT = 60.0    # seconds allowed for hardware initialisation
+_DRAIN_PERIOD = 0.02    # coordinator-side ring polling interval [s]
+
+
+def _process_main(name, config, ring_name, stop_event, start_event,
+                  result_q, worker_cls):
+    """Entry point of the digitizer process."""
+    ring = picoDAQAssistant.SharedMemoryRing(name=ring_name)
+    # A forked child inherits the parent's registry; its handles are not ours
+    registry.reset()
+    try:
+        try:
+            worker = worker_cls(
+                name=name,
+                config=config,
+                update_queue=picoDAQAssistant.SharedRingQueue(ring),
+                stop_event=stop_event,
+            )
+        except DigitizerInitError as e:
+            result_q.put(("init_error", str(e)))
+            return
+        finally:
+            # Let the next device process open the units this one scanned
+            registry.close_unclaimed()
+        result_q.put(("ready", None))
+
+        # Wait for start() (or for a shutdown before acquisition began)
+        while not start_event.wait(0.1):
+            if stop_event.is_set():
+                worker.close()
+                result_q.put(("done", None))
+                return
+
+        worker.start()
+        while worker.is_alive():
+            if stop_event.wait(0.1):
+                worker.interrupt()
+                worker.join()
+        worker.close()
+        error = None if worker.error is None else repr(worker.error)
+        result_q.put(("done", error))
+    finally:
+        ring.close()
+
+
+class H2LaserDigitizerProcess:
+    def __init__(self, name, config, update_queue, stop_event,
+                 worker_cls=H2LaserDigitizer):
+        """
+        Spawn the digitizer process and wait until its hardware is
+        initialised. Raises DigitizerInitError like H2LaserDigitizer does.
+        stop_event must be a multiprocessing.Event.
+        """
+        self.name         = name
+        self.update_queue = update_queue
+        self.stop_event   = stop_event
+        self.error        = None
+
+        ring_mb          = config.get("shm_ring_mb", 8)
+        self._ring       = picoDAQAssistant.SharedMemoryRing(
+            size=int(ring_mb * 1024 * 1024)
+        )
+        self._start_evt  = mp.Event()
+        self._result_q   = mp.Queue()
+        self._proc       = mp.Process(
+            target=_process_main, name=name,
+            args=(name, config, self._ring.name, stop_event,
+                  self._start_evt, self._result_q, worker_cls),
+        )
+        self._proc.start()
+        print(f"[INIT] '{name}' running in process {self._proc.pid}")
+
+        try:
+            status, message = self._result_q.get(timeout=_INIT_TIMEOUT)
+        except queue.Empty:
+            status, message = "init_error", (
+                f"[ERROR] '{name}' did not finish initialisation "
+                f"within {_INIT_TIMEOUT:.0f} s"
+            )
+        if status != "ready":
+            self._proc.join(timeout=5)
+            if self._proc.is_alive():
+                self._proc.terminate()
+            self._ring.close()
+            raise DigitizerInitError(message)
+
+        self._drain_thd = threading.Thread(
+            target=self._drain_loop, name=f"{name}-drain", daemon=True
+        )
+
+    def _drain_loop(self):
+        # Forward GUI updates until the process has exited and the ring is empty
+        while True:
+            alive = self._proc.is_alive()
+            for item in self._ring.get_all():
+                self.update_queue.put(item)
+            if not alive:
+                break
+            time.sleep(_DRAIN_PERIOD)
+
+    def start(self):
+        self._drain_thd.start()
+        self._start_evt.set()
+
+    def interrupt(self):
+        # The process watches the shared stop_event and interrupts its own
+        # acquisition thread; nothing to do from the coordinator side.
+        pass
+
+    def join(self, timeout=None):
+        self._proc.join(timeout)
+        if not self._proc.is_alive() and self._drain_thd.is_alive():
+            self._drain_thd.join()
+
+    def is_alive(self):
+        return self._proc.is_alive()
+
+    def close(self):
+        """Collect the exit status; hardware is closed inside the process."""
+        try:
+            status, message = self._result_q.get(timeout=1.0)
+            if status == "done" and message is not None:
+                self.error = RuntimeError(message)
+        except queue.Empty:
+            self.error = RuntimeError(
+                f"process exited with code {self._proc.exitcode}"
+            )
+        self._ring.close()
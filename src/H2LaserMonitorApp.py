@@ -15,6 +15,10 @@
 # Public interface (same as old matplotlib version):
 #   H2MonitorApp(channels, update_queue)
 #   H2MonitorApp.run()   — blocks until the window is closed
+#
+# Also: H2SnapshotApp (snapshot mode) and H2HistoryApp (history viewer:
+# stacked trend plots of loaded CSV data, min/max decimated for the
+# visible x-range).
 
 import math
 import os
@@ -1012,3 +1016,212 @@ class _SnapshotWindow(QtWidgets.QMainWindow):
     def closeEvent(self, event):
         self._timer.stop()
         event.accept()
+
+
+# ---------------------------------------------------------------------------
+# History viewer — public entry point
+# ---------------------------------------------------------------------------
+
+class H2HistoryApp:
+    """
+    Interactive viewer of loaded trend data (history viewer mode).
+
+    Parameters
+    ----------
+    data : dict
+        ``{"timestamp": array, <channel>: array, ...}`` as returned by
+        ``picoHistory.loadRange`` (timestamps in Unix time, time order).
+    channels : list[str]
+        Columns of *data* to plot, one stacked plot each.
+    title : str, optional
+        Window title suffix shown in the title bar.
+    utc_offset : int, optional
+        Time axis offset in seconds, same sign as ``time.timezone``
+        (default −9 h: JST).
+    envelope : dict, optional
+        ``{channel: (min, max)}`` arrays on the same timestamps, drawn as a
+        shaded band behind the curve (rollup windows).
+    follow : picoHistory.CsvTail, optional
+        Follow mode: polled every *follow_ms*; its new rows are appended to
+        the curves, and the view scrolls along while it shows the newest row.
+    follow_ms : int, optional
+        Poll interval of *follow* in milliseconds.
+    """
+
+    def __init__(self, data: dict, channels: list, title: str = "",
+                 utc_offset: int = -9 * 3600, envelope: dict = None,
+                 follow=None, follow_ms: int = 2000):
+        pg.setConfigOption("background", _BG)
+        pg.setConfigOption("foreground", _FG)
+        pg.setConfigOption("antialias", True)
+        self._app = pg.mkQApp("H2Laser History Viewer")
+        self._win = _HistoryWindow(data, channels, title, utc_offset, envelope,
+                                   follow, follow_ms)
+        self._win.show()
+
+    def run(self):
+        """Start the Qt event loop; returns only when the window is closed."""
+        try:
+            pg.exec()
+        except KeyboardInterrupt:
+            self._win.close()
+
+
+# ---------------------------------------------------------------------------
+# History window
+# ---------------------------------------------------------------------------
+
+class _HistoryWindow(QtWidgets.QMainWindow):
+
+    _REDRAW_MS = 30   # coalesce range changes while panning / zooming
+
+    def __init__(self, data: dict, channels: list, title: str,
+                 utc_offset: int, envelope: dict = None, follow=None,
+                 follow_ms: int = 2000):
+        super().__init__()
+        # Deferred: keeps pandas out of the live monitor windows
+        from .picoHistory import MinMaxPyramid
+
+        self.channels = channels
+        self._t       = data["timestamp"]
+        self._follow  = follow
+        # One decimation pyramid per channel; follow mode appends to them
+        self._pyramids = {ch: MinMaxPyramid(self._t, data[ch]) for ch in channels}
+        self._factor   = MinMaxPyramid.FACTOR
+
+        win_title = "H2Laser History Viewer  (v3)"
+        if title:
+            win_title = f"{win_title}  —  {title}"
+        self.setWindowTitle(win_title)
+        self.resize(1500, 900)
+        _apply_dark_style(self)
+        self._build_ui(utc_offset)
+        if envelope:
+            self._add_envelope(envelope)
+        _setup_sigint(self)
+
+        self._redraw_timer = QtCore.QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.timeout.connect(self._redraw)
+        self._plots[channels[0]].sigXRangeChanged.connect(
+            lambda *_: self._redraw_timer.start(self._REDRAW_MS)
+        )
+        if len(self._t):
+            self._plots[channels[0]].setXRange(self._t[0], self._t[-1], padding=0.01)
+        self._redraw()
+
+        self._follow_timer = QtCore.QTimer(self)
+        self._follow_timer.timeout.connect(self._poll_follow)
+        if follow is not None:
+            self._follow_timer.start(follow_ms)
+
+    # ── UI construction ──────────────────────────────────────────────────────
+
+    def _build_ui(self, utc_offset: int):
+        root = QtWidgets.QWidget()
+        self.setCentralWidget(root)
+        vlay = QtWidgets.QVBoxLayout(root)
+        vlay.setContentsMargins(8, 8, 8, 4)
+        vlay.setSpacing(4)
+
+        lbl = QtWidgets.QLabel("History  (nV·s)")
+        lbl.setObjectName("panelTitle")
+        vlay.addWidget(lbl)
+
+        gw = pg.GraphicsLayoutWidget()
+        gw.setBackground(_BG)
+        vlay.addWidget(gw, stretch=1)
+
+        self._plots:  dict = {}
+        self._curves: dict = {}
+        prev = None
+        n    = len(self.channels)
+        for i, ch in enumerate(self.channels):
+            col       = _colour(i)
+            date_axis = pg.DateAxisItem(orientation="bottom", utcOffset=utc_offset)
+            p = gw.addPlot(row=i, col=0, axisItems={"bottom": date_axis},
+                           viewBox=_ZoomPanViewBox())
+            p.setLabel("left", ch, units="nV·s", color=col, size="10pt")
+            p.getAxis("left").enableAutoSIPrefix(False)
+            p.showGrid(x=True, y=True, alpha=0.20)
+            p.getAxis("left").setWidth(90)
+            # Y auto-range follows the visible part of the curve
+            p.setAutoVisible(y=True)
+            if i < n - 1:
+                p.hideAxis("bottom")
+            if prev is not None:
+                p.setXLink(prev)
+            self._curves[ch] = p.plot(pen=pg.mkPen(col, width=1.5))
+            self._plots[ch]  = p
+            gw.ci.layout.setRowStretchFactor(i, 1)
+            prev = p
+
+        self._lbl_info = QtWidgets.QLabel("")
+        self.statusBar().addPermanentWidget(self._lbl_info, 1)
+
+    def _add_envelope(self, envelope: dict):
+        """Shaded min/max band per channel (rollup windows are few: no decimation)."""
+        for i, ch in enumerate(self.channels):
+            if ch not in envelope:
+                continue
+            col    = _colour(i)
+            lo, hi = envelope[ch]
+            lo_c   = self._plots[ch].plot(self._t, lo, pen=pg.mkPen(col + "60", width=1))
+            hi_c   = self._plots[ch].plot(self._t, hi, pen=pg.mkPen(col + "60", width=1))
+            band   = pg.FillBetweenItem(lo_c, hi_c, brush=pg.mkBrush(col + "30"))
+            band.setZValue(-10)
+            self._plots[ch].addItem(band)
+
+    # ── decimation ───────────────────────────────────────────────────────────
+
+    def _redraw(self):
+        """Re-decimate every curve for the visible x-range and plot width."""
+        vb     = self._plots[self.channels[0]].getViewBox()
+        x0, x1 = vb.viewRange()[0]
+        width  = vb.width()
+        shown  = 0
+        level  = 0
+        for ch in self.channels:
+            t, v, level = self._pyramids[ch].view(x0, x1, width)
+            self._curves[ch].setData(t, v, connect="finite")
+            shown = max(shown, len(t))
+        bin_rows = self._factor ** level
+        self._lbl_info.setText(
+            f"  {len(self._t)} rows  |  drawing {shown} points  |  "
+            + ("every row" if level == 0 else f"min/max of {bin_rows} rows per bin")
+            + (f"  |  following {self._follow.path}" if self._follow is not None else "")
+        )
+
+    # ── follow mode ──────────────────────────────────────────────────────────
+
+    def _poll_follow(self):
+        """Append the rows written since the last poll; no reload."""
+        try:
+            new = self._follow.poll()
+        except (OSError, RuntimeError, ValueError) as e:
+            self._lbl_info.setText(f"  ⚠  follow: {e}")
+            return
+        ts = new["timestamp"]
+        if not len(ts):
+            return
+        vb     = self._plots[self.channels[0]].getViewBox()
+        x0, x1 = vb.viewRange()[0]
+        old_end = self._t[-1] if len(self._t) else None
+        for ch in self.channels:
+            self._pyramids[ch].append(ts, new[ch])
+        self._t = self._pyramids[self.channels[0]].t
+        if old_end is None:
+            self._plots[self.channels[0]].setXRange(self._t[0], self._t[-1], padding=0.01)
+        elif x1 >= old_end:
+            # Newest row in view: scroll by the new span, keep the zoom
+            shift = self._t[-1] - old_end
+            self._plots[self.channels[0]].setXRange(x0 + shift, x1 + shift, padding=0)
+        else:
+            self._redraw()
+
+    # ── window close ─────────────────────────────────────────────────────────
+
+    def closeEvent(self, event):
+        self._redraw_timer.stop()
+        self._follow_timer.stop()
+        event.accept()
@@ -6,6 +6,15 @@ import time
 import threading
 import queue
 import re
+import json
+import os
+import mmap
+import tempfile
+import glob
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from multiprocessing import shared_memory
 
 class RootManager:
 
@@ -13,87 +22,241 @@ class RootManager:
         "int8":  np.int8,
         "int16":  np.int16,
         "int32":  np.int32,
+        "int64":  np.int64,
         "float32": np.float32,
         "float64": np.float64,
     }
 
-    def __init__(self, filename, runN, sample_num, add_channels=("A","B","C","D"), chunk_size=1000):
+    # Local-time branches derived from Timestamp at flush (calendar=True)
+    _calendar_branch = {
+        "Year": "int16",
+        "Month": "int8",
+        "Day": "int8",
+        "Hour": "int8",
+        "Min": "int8",
+        "Sec": "int8",
+        "ms": "int16",
+    }
+
+    def __init__(self, filename, runN, sample_num, add_channels=("A","B","C","D"), chunk_size=1000, raw_meta=None, converter=None, calendar=True, memory_budget=None, spill_dir=None, spill_limit=0, time_axis=None, compression=uproot.ZLIB(1), codec=None):
+        """
+        raw_meta: None to store waveforms as float32 mV. Otherwise channel
+        branches hold the digitizer's int16 ADC counts unchanged and raw_meta
+        (per-channel range, maxADC, offset, sample interval; see
+        rawStorageMeta) is saved as a JSON TObjString "H2Meta" so readers
+        can convert to mV on demand (picoDAQReader).
+        converter: AdcConverter for add_channels (mV storage only). fill()
+        then takes int16 ADC rows and each chunk is converted to float32 mV
+        in one pass at flush, on the writer thread.
+        calendar: also write the Year ... ms local-time branches, derived
+        from the int64 Timestamp branch at flush.
+        memory_budget: bytes allowed for the write buffers (see
+        parseMemorySize). Chunk size (at most chunk_size) and buffer count
+        are derived from it for the actual sample number; None keeps
+        chunk_size with three buffers.
+        spill_dir, spill_limit: when every buffer is waiting for the writer,
+        full chunks are copied to a memory-mapped scratch file in spill_dir
+        (default: the system temp directory) instead of blocking fill(), up
+        to spill_limit bytes (0 disables; fixed-length waveforms only).
+        time_axis: the run's constant time axis (fixed-length only). It is
+        then stored once, as the single entry of the side tree "timeAxis",
+        instead of in a Time branch per event; fill() ignores its Time
+        argument (picoDAQReader broadcasts the axis back on read).
+        compression: uproot compression for the file (see rootCompression);
+        None writes uncompressed baskets.
+        codec: picoWaveCodec.WaveCodec for raw fixed-length storage. fill()
+        still takes int16 rows; each chunk is encoded at flush and the
+        channel branches hold its fixed-size uint8 blobs (codec name and
+        sample count are added to H2Meta for the reader).
+        """
         self._runN = runN
-        self._file = uproot.recreate(filename)
+        self._file = uproot.recreate(filename, compression=compression)
         self._filename = filename
         self._chConfig = []
+        self._raw = raw_meta is not None
+        wave_type = "int16" if self._raw else "float32"
+        self._codec = codec if self._raw and sample_num > 0 else None
+        if self._codec is not None:
+            raw_meta = dict(raw_meta, codec=self._codec.name, samples=sample_num)
+        if self._raw:
+            self._file["H2Meta"] = json.dumps(raw_meta)
+        # Channel branch -> converter index for branches buffered as int16
+        self._converter = None if self._raw else converter
+        self._convert_idx = {}
+        if self._converter is not None:
+            self._convert_idx = {
+                f"Ch{ch}": self._converter.channels.index(ch)
+                for ch in add_channels
+            }
+        # Wall-clock anchor for this file's trigger timestamps
+        self.clock = TriggerClock()
+        self._calendar = calendar
+
+        self._branch = {
+            "Run": "int32",
+            "WaveN": "int32",
+            "Timestamp": "int64",   # ns since the Unix epoch (UTC)
+        }
+        if self._calendar:
+            self._branch.update(self._calendar_branch)
+        # Time axis stored once per file instead of per event
+        self._time_once = time_axis is not None and sample_num > 0
+        if self._time_once:
+            self._file["timeAxis"] = {
+                "Time": np.asarray(time_axis, dtype=np.float32).reshape(1, sample_num)
+            }
         if (sample_num>0):
-            self._branch = {
-                "Run": "int32", 
-                "WaveN": "int32",
-                "Year": "int16", 
-                "Month": "int8", 
-                "Day": "int8", 
-                "Hour": "int8", 
-                "Min": "int8", 
-                "Sec": "int8",
-                "ms": "int16", 
-                "nTime": "int32",
-                "Time": "{} * float32".format(sample_num)}
+            self._branch["nTime"] = "int32"
+            if not self._time_once:
+                self._branch["Time"] = "{} * float32".format(sample_num)
             for ch in add_channels:
-                self._branch[f"Ch{ch}"] = f"{sample_num} * float32"
+                if self._codec is not None:
+                    self._branch[f"Ch{ch}"] = f"{self._codec.blobSize(sample_num)} * uint8"
+                else:
+                    self._branch[f"Ch{ch}"] = f"{sample_num} * {wave_type}"
                 self._chConfig.append(f"Ch{ch}")
 
             self._fixed_length = True
         else:
-            self._branch = {
-                "Run": "int32", 
-                "WaveN": "int32",
-                "Year": "int16", 
-                "Month": "int8", 
-                "Day": "int8", 
-                "Hour": "int8", 
-                "Min": "int8", 
-                "Sec": "int8",
-                "ms": "int16", 
-                "Time": "var * float32"}
+            self._branch["Time"] = "var * float32"
             for ch in add_channels:
-                self._branch[f"Ch{ch}"] = "var * float32"
+                self._branch[f"Ch{ch}"] = f"var * {wave_type}"
                 self._chConfig.append(f"Ch{ch}")
 
             self._fixed_length = False
 
+        # Branches filled per trigger; the others are derived at flush
+        self._filled = ["Timestamp"] + [k for k in ("Time",) if k in self._branch] + self._chConfig
+
         self._tree = self._file.mktree("rawWave", self._branch)
-        self._chunk_size = max(1, chunk_size)
         self._sample_num = sample_num
+        self._chunk_size, self._buffer_n = self._plan_buffers(
+            max(1, chunk_size), memory_budget
+        )
 
         self._wave_n = 0
 
-        self._buffer_n = 3
+        # Scalar branch dtypes, resolved once
+        self._scalar = {}
+        for name, typ in self._branch.items():
+            if not re.match(r"^.*\*", typ):
+                base = typ.strip()
+                if base not in self._scalar_dtypes:
+                    raise ValueError(f"Unsupported scalar type '{base}' for branch '{name}'")
+                self._scalar[name] = self._scalar_dtypes[base]
+
+        # Buffer pool: allocated once and recycled. The filler owns
+        # _buffer_now; full buffers go to the writer by index through _q and
+        # come back through _free once they are in the tree.
+        self._buffers = [self._new_buffer() for i in range(self._buffer_n)]
         if self._fixed_length:
-            self._buffers = [{} for i in range(self._buffer_n)]
-            for name, typ in self._branch.items():
-                match = re.match(r"^.*\* (.*)", typ)    # Any patter starts with '...* ', and capture rest of parts as data type
-                for i in range(self._buffer_n):
-                    if match:
-                        self._buffers[i][name] = np.empty((self._chunk_size, self._sample_num), dtype=match.group(1))
-                    else:
-                        self._buffers[i][name] = []
-        else:
-            self._buffers = [{k: [] for k in self._branch.keys()} for i in range(self._buffer_n)]  # Buffer
+            # float32 destination of the flush-time conversion, or uint8
+            # destination of the codec
+            self._converted = {
+                name: np.empty((self._chunk_size, self._sample_num), dtype=np.float32)
+                for name in self._convert_idx
+            }
+            if self._codec is not None:
+                self._converted = {
+                    name: np.empty((self._chunk_size, self._codec.blobSize(self._sample_num)),
+                                   dtype=np.uint8)
+                    for name in self._chConfig
+                }
+            # Columns derived at flush, sliced to the chunk length
+            self._derived_cols = {
+                name: np.empty(self._chunk_size, dtype=self._scalar[name])
+                for name in self._scalar if name not in self._filled
+            }
+            self._derived_cols["Run"][:] = self._runN
+            self._derived_cols["nTime"][:] = self._sample_num
+            self._row_index = np.arange(self._chunk_size, dtype=np.int32)
+        self._free = queue.Queue()
+        for i in range(1, self._buffer_n):
+            self._free.put(i)
         self._buffer_now = 0
         self._n_buffered = [0 for i in range(self._buffer_n)]
+        self._first_wave = [0 for i in range(self._buffer_n)]   # WaveN of row 0
+
+        # Overflow tier behind the buffer pool
+        self._spill = None
+        if spill_limit > 0 and self._fixed_length:
+            self._spill = SpillFile(
+                {k: (v.shape, v.dtype) for k, v in self._buffers[0].items()},
+                spill_dir, spill_limit,
+                prefix=os.path.splitext(os.path.basename(filename))[0] + "_",
+            )
+        self.spilled_chunks = 0     # chunks that went through the scratch file
+        self.bytes_written  = 0     # file size after the last extend
+        # (entry_start, entry_stop, first_ns, last_ns) per written chunk
+        self._chunks = []
+        # Called with this manager on the writer thread once the file is
+        # closed (RootRotator: run catalog)
+        self.on_close = None
 
-        self.max_queued = 2
         self._stop_queue = object()
 
-    def fill(self, **wave):
-        now = datetime.now()
-        self._buffers[self._buffer_now]["Year"].append(now.year)
-        self._buffers[self._buffer_now]["Month"].append(now.month)
-        self._buffers[self._buffer_now]["Day"].append(now.day)
-        self._buffers[self._buffer_now]["Hour"].append(now.hour)
-        self._buffers[self._buffer_now]["Min"].append(now.minute)
-        self._buffers[self._buffer_now]["Sec"].append(now.second)
-        self._buffers[self._buffer_now]["ms"].append(now.microsecond // 1000)
-        self._buffers[self._buffer_now]["Run"].append(self._runN)
-        self._buffers[self._buffer_now]["WaveN"].append(self._wave_n)
-        
+    # Fewest entries per chunk worth keeping three buffers for; below this
+    # the budget goes into two larger buffers instead.
+    MIN_CHUNK_3BUF = 10
+
+    def _plan_buffers(self, max_chunk, memory_budget):
+        """Return (chunk_size, buffer count) fitting memory_budget bytes."""
+        if memory_budget is None or not self._fixed_length:
+            return max_chunk, 3
+        per_entry = 8   # Timestamp
+        for name in self._filled[1:]:
+            match = re.match(r"^.*\* (.*)", self._branch[name])
+            per_entry += self._sample_num * np.dtype(self._buffer_dtype(name, match.group(1))).itemsize
+        converted = 4 * self._sample_num * len(self._convert_idx)   # one float32 set
+        if self._codec is not None:
+            converted = self._codec.blobSize(self._sample_num) * len(self._chConfig)
+        for buffer_n in (3, 2):
+            chunk = int(memory_budget // (buffer_n * per_entry + converted))
+            if chunk >= min(self.MIN_CHUNK_3BUF, max_chunk) or buffer_n == 2:
+                break
+        chunk = min(max(chunk, 1), max_chunk)
+        total = chunk * (buffer_n * per_entry + converted)
+        mb = float(_MEMORY_UNITS["MB"])
+        print(f"[I/O] ROOT write buffers: {buffer_n} x {chunk} entries "
+              f"({per_entry / mb:.3f} MB/entry), {total / mb:.1f} MB of "
+              f"{memory_budget / mb:.1f} MB budget")
+        if total > memory_budget:
+            print(f"[WARN] One entry exceeds the ROOT buffer budget; "
+                  f"using {total / mb:.1f} MB")
+        return chunk, buffer_n
+
+    def buffer_bytes(self):
+        """Memory held by the write buffers [bytes], for health metrics."""
+        total = 0
+        for buffer in self._buffers:
+            for data in buffer.values():
+                if isinstance(data, np.ndarray):
+                    total += data.nbytes
+                else:
+                    total += sum(np.asarray(v).nbytes for v in data)
+        if self._fixed_length:
+            total += sum(a.nbytes for a in self._converted.values())
+        return total
+
+    def _buffer_dtype(self, name, branch_dtype):
+        if name in self._convert_idx or (self._codec is not None and name in self._chConfig):
+            return "int16"
+        return branch_dtype
+
+    def _new_buffer(self):
+        if not self._fixed_length:
+            return {k: [] for k in self._filled}
+        buffer = {"Timestamp": np.empty(self._chunk_size, dtype=np.int64)}
+        for name in self._filled[1:]:
+            match = re.match(r"^.*\* (.*)", self._branch[name])    # Any patter starts with '...* ', and capture rest of parts as data type
+            buffer[name] = np.empty((self._chunk_size, self._sample_num), dtype=self._buffer_dtype(name, match.group(1)))
+        return buffer
+
+    def fill(self, timestamp=None, **wave):
+        """
+        timestamp: trigger time in ns since the epoch (int); default is now,
+        from this file's TriggerClock.
+        """
         required_key = self._chConfig[:]
         required_key.append("Time")
         missing = required_key - wave.keys()
@@ -101,24 +264,59 @@ class RootManager:
             print("ERROR: Missing branch:", missing, "when filling the tree")
             return
 
+        if timestamp is None:
+            timestamp = self.clock.now_ns()
+        buffer = self._buffers[self._buffer_now]
+        row = self._n_buffered[self._buffer_now]
+        if row == 0:
+            self._first_wave[self._buffer_now] = self._wave_n
+
         if self._fixed_length:
-            self._buffers[self._buffer_now]["nTime"].append(self._sample_num)
-            for k, v in wave.items():
-                self._buffers[self._buffer_now][k][self._n_buffered[self._buffer_now], :] = v
+            buffer["Timestamp"][row] = timestamp
+            for k in self._filled[1:]:
+                buffer[k][row, :] = wave[k]
         else:
-            for k, v in wave.items():
-                self._buffers[self._buffer_now][k].append(v)
+            buffer["Timestamp"].append(timestamp)
+            for k in self._filled[1:]:
+                buffer[k].append(wave[k])
         self._n_buffered[self._buffer_now] += 1
         if self._n_buffered[self._buffer_now] >= self._chunk_size:
             # print("Batch full")
-            buffer_old = self._buffer_now
-            self._q.put(buffer_old)
-            self._buffer_now = (self._buffer_now + 1) % self._buffer_n
+            self._hand_off()
 
         self._wave_n += 1
 
+    def _hand_off(self):
+        """Queue the full current buffer for the writer, continue in a free one."""
+        try:
+            free = self._free.get_nowait()
+        except queue.Empty:
+            free = None
+        if free is None and self._spill is not None:
+            # Writer behind: park the chunk on disk and refill the same buffer
+            n = self._n_buffered[self._buffer_now]
+            slot = self._spill.store(self._buffers[self._buffer_now], n)
+            if slot is not None:
+                self._q.put(_SpilledChunk(slot, n, self._first_wave[self._buffer_now]))
+                self._n_buffered[self._buffer_now] = 0
+                self.spilled_chunks += 1
+                return
+        self._q.put(self._buffer_now)
+        if free is None:
+            # Blocks while every other buffer is still queued or being written
+            free = self._free.get()
+        self._buffer_now = free
+
+    def backlog(self):
+        """Full chunks waiting for the writer thread (in memory or spilled)."""
+        return self._q.qsize()
+
+    def spill_bytes(self):
+        """Size of the scratch file [bytes], 0 if nothing was spilled."""
+        return 0 if self._spill is None else self._spill.size()
+
     def start_thread(self):
-        self._q = queue.Queue(self.max_queued)
+        self._q = queue.Queue()
         self._thd = threading.Thread(target=self.background_loop, daemon=True)
         self._thd.start()
         print("Start DAQ thread")
@@ -127,60 +325,627 @@ class RootManager:
         while True:
             buffer_n = self._q.get()
             if buffer_n is self._stop_queue:
+                self._finish()
                 print("Catch stop signal from queue. Thread stopped.")
                 break
             # print("Catch buffer ", buffer_n, " from queue")
-            self.flush(buffer_n)
+            if isinstance(buffer_n, _SpilledChunk):
+                chunk = buffer_n
+                self._write(self._spill.load(chunk.slot), chunk.n, chunk.first_wave)
+                self._spill.release(chunk.slot)
+            else:
+                self.flush(buffer_n)
+                self._free.put(buffer_n)
             self._q.task_done()
 
+    def _derived(self, first_wave, timestamp):
+        """Per-entry branches computed for a whole chunk at once."""
+        n = len(timestamp)
+        if not self._fixed_length:
+            out = {
+                "Run": np.full(n, self._runN, dtype=np.int32),
+                "WaveN": np.arange(first_wave, first_wave + n, dtype=np.int32),
+            }
+            if self._calendar:
+                out.update(calendarColumns(timestamp))
+            return out
+
+        out = {name: col[:n] for name, col in self._derived_cols.items()}
+        np.add(self._row_index[:n], first_wave, out=out["WaveN"])
+        if self._calendar:
+            for name, col in calendarColumns(timestamp).items():
+                out[name][:] = col
+        return out
+
     def flush(self, buffer_n):
-        if self._n_buffered[buffer_n] == 0:
+        n = self._n_buffered[buffer_n]
+        if n == 0:
             return
-        time_start = time.time()
-        out = {}
-        for name, typ in self._branch.items():
-            data = self._buffers[buffer_n][name]
+        self._write(self._buffers[buffer_n], n, self._first_wave[buffer_n])
 
-            # Variable-length (jagged) branch: "var * <type>"
-            if re.match(r"^.*\*", typ):
+        # Fixed-length buffers are reused as they are; only jagged ones
+        # (Python lists) start over
+        if not self._fixed_length:
+            self._buffers[buffer_n] = self._new_buffer()
+        self._n_buffered[buffer_n] = 0
+
+    def _write(self, buffer, n, first_wave):
+        """Extend the tree by the first n rows of a buffer."""
+        time_start = time.time()
+        timestamp = np.asarray(buffer["Timestamp"][:n], dtype=np.int64)
+        out = self._derived(first_wave, timestamp)
+        out["Timestamp"] = timestamp
+        for name in self._filled[1:]:
+            data = buffer[name]
+            if name in self._convert_idx:
+                idx = self._convert_idx[name]
                 if self._fixed_length:
-                    out[name] = data[:self._n_buffered[buffer_n]]
+                    out[name] = self._converter.convertChannel(
+                        idx, data[:n], self._converted[name],
+                    )
                 else:
-                    out[name] = ak.Array(data)
+                    out[name] = ak.Array([
+                        self._converter.convertChannel(idx, np.asarray(v))
+                        for v in data
+                    ])
+            elif self._codec is not None and name in self._chConfig:
+                out[name] = self._codec.encode(data[:n], self._converted[name])
+            elif self._fixed_length:
+                out[name] = data[:n]
             else:
-                # Scalar branch: cast to the right dtype
-                base = typ.strip()
-                if base not in self._scalar_dtypes:
-                    raise ValueError(f"Unsupported scalar type '{base}' for branch '{name}'")
-                out[name] = np.asarray(data, dtype=self._scalar_dtypes[base])
+                out[name] = ak.Array(data)
+        for name, dtype in self._scalar.items():
+            # Scalar branch: cast to the right dtype (no copy if it already is)
+            out[name] = np.asarray(out[name], dtype=dtype)
 
         # print("Conversion takes: ", time.time()-time_start, " secs")
         # Extend once per flush
-        self._tree.extend(out)
-
-        # Clear buffers
-        if self._fixed_length:
-            for name, typ in self._branch.items():
-                match = re.match(r"^.*\* (.*)", typ)    # Any patter starts with '...* ', and capture rest of parts as data type
-                if match:
-                    self._buffers[buffer_n][name] = np.empty((self._chunk_size, self._sample_num), dtype=match.group(1))
-                else:
-                    self._buffers[buffer_n][name] = []
-        else:
-            self._buffers[buffer_n] = {k: [] for k in self._branch.keys()}
-        self._n_buffered[buffer_n] = 0
+        self._tree.extend({name: out[name] for name in self._branch})
+        self.bytes_written = os.path.getsize(self._filename)
+        self._chunks.append((first_wave, first_wave + n,
+                             int(timestamp.min()), int(timestamp.max())))
         # print("Extend takes: ", time.time()-time_start, " secs")
 
-    def close(self):
-        self._q.join()                  # Wait for all buffer filled to tree
-        self.flush(self._buffer_now)    # Flush remaining data
+    def close_async(self):
+        """
+        Hand the rest of the file to the writer thread and return at once:
+        it writes the last (partial) buffer, closes the file and exits.
+        No fill() after this; wait_closed() waits for the writer.
+        """
+        if self._n_buffered[self._buffer_now]:
+            self._q.put(self._buffer_now)
         self._q.put(self._stop_queue)
+
+    def wait_closed(self, timeout=None):
+        """Wait until the file is closed; False on timeout."""
+        self._thd.join(timeout)
+        return not self._thd.is_alive()
+
+    def close(self):
+        self.close_async()
+        self.wait_closed()
+
+    def _finish(self):
+        """Close the file and the spill file (writer thread)."""
         self._file.close()
+        if self._wave_n:
+            print(f"[I/O] Data saved to ROOT file {self._filename}. File closed")
+        if self._spill is not None:
+            if self.spilled_chunks:
+                print(f"[I/O] {self.spilled_chunks} chunks of {self._filename} "
+                      f"went through the spill file")
+            self._spill.close()
+        _notifyClosed(self)
+
+    def catalog_entry(self):
+        """File summary for picoRunCatalog.RunCatalog.add_file (after close)."""
+        return _catalogEntry(self._filename, self._chConfig, self._sample_num,
+                             self._wave_n, self._chunks)
+
+    def getName(self):
+        return self._filename
+
+    def remove(self):
+        """Delete the file (after close), e.g. an unused pre-opened one."""
+        os.remove(self._filename)
+
+class BinaryWaveSink:
+    """
+    Raw binary alternative to RootManager with the same fill()/close()
+    interface (selected with "output_format": "binary").
+
+    One file set per rotation, <base> = <output_name>_<YYMMDD>_<NNNN>:
+      <base>.h2w   fixed-stride records, int16 ADC counts of shape
+                   (channels, samples) per trigger, C order
+      <base>.h2t   int64 trigger timestamps (ns since the epoch), one per
+                   record
+      <base>.json  header: rawStorageMeta() (ranges, maxADC, delta_t), the
+                   channel order, samples, time axis and record size;
+                   "entries" is filled in at close
+    Readers np.memmap the records without copying or parsing
+    (picoDAQReader.readBinary). A file cut short by a crash stays readable:
+    the entry count follows from the file sizes.
+
+    Buffers are recycled through a free list and written by one writer
+    thread, as in RootManager. Waveforms are always stored as ADC counts.
+    """
+
+    LAYOUT = "h2wave"
+
+    def __init__(self, filename, sample_num, add_channels, meta, chunk_size=1000,
+                 memory_budget=None, time_axis=None):
+        """
+        filename: path of the .h2w file. meta: rawStorageMeta() of the
+        channels, stored in the header.
+        """
+        if sample_num <= 0:
+            raise ValueError("BinaryWaveSink needs a fixed sample number")
+        self._filename = filename
+        self._base = os.path.splitext(filename)[0]
+        self._chConfig = [f"Ch{ch}" for ch in add_channels]
+        self._sample_num = sample_num
+        self.clock = TriggerClock()
+
+        record = len(self._chConfig) * sample_num * 2
+        self._chunk_size, self._buffer_n = chunk_size, 3
+        if memory_budget is not None:
+            self._chunk_size = int(min(chunk_size, max(1, memory_budget // (3 * (record + 8)))))
+        self._header = dict(
+            meta, layout=self.LAYOUT, version=1,
+            order=self._chConfig, samples=sample_num, record_bytes=record,
+            time_axis=None if time_axis is None else np.asarray(time_axis, dtype=np.float32).tolist(),
+            entries=None,
+        )
+        self._write_header()
+        self._wave_f  = open(filename, "wb")
+        self._time_f  = open(self._base + ".h2t", "wb")
+
+        self._buffers = [
+            (np.empty((self._chunk_size, len(self._chConfig), sample_num), dtype=np.int16),
+             np.empty(self._chunk_size, dtype=np.int64))
+            for i in range(self._buffer_n)
+        ]
+        self._free = queue.Queue()
+        for i in range(1, self._buffer_n):
+            self._free.put(i)
+        self._buffer_now = 0
+        self._n_buffered = [0 for i in range(self._buffer_n)]
+        self._wave_n = 0
+        self._stop_queue = object()
+
+        self.spilled_chunks = 0     # no overflow tier; for the health print
+        self.bytes_written  = 0
+        self._entries_written = 0
+        self._chunks = []           # as RootManager._chunks
+        self.on_close = None        # as RootManager.on_close
+
+    def _write_header(self):
+        with open(self._base + ".json", "w") as f:
+            json.dump(self._header, f)
+
+    def fill(self, timestamp=None, **wave):
+        """Same call as RootManager.fill(); Time is not stored per event."""
+        missing = set(self._chConfig) - wave.keys()
+        if missing:
+            print("ERROR: Missing branch:", missing, "when filling the binary file")
+            return
+        if timestamp is None:
+            timestamp = self.clock.now_ns()
+        waves, stamps = self._buffers[self._buffer_now]
+        row = self._n_buffered[self._buffer_now]
+        stamps[row] = timestamp
+        for i, name in enumerate(self._chConfig):
+            waves[row, i] = wave[name]
+        self._n_buffered[self._buffer_now] += 1
+        if self._n_buffered[self._buffer_now] >= self._chunk_size:
+            self._q.put(self._buffer_now)
+            # Blocks while every other buffer is still queued or being written
+            self._buffer_now = self._free.get()
+        self._wave_n += 1
+
+    def start_thread(self):
+        self._q = queue.Queue()
+        self._thd = threading.Thread(target=self.background_loop, daemon=True)
+        self._thd.start()
+
+    def background_loop(self):
+        while True:
+            buffer_n = self._q.get()
+            if buffer_n is self._stop_queue:
+                self._finish()
+                break
+            self.flush(buffer_n)
+            self._free.put(buffer_n)
+
+    def flush(self, buffer_n):
+        n = self._n_buffered[buffer_n]
+        if n == 0:
+            return
+        waves, stamps = self._buffers[buffer_n]
+        # Records first: a reader takes the shorter of the two files
+        self._wave_f.write(memoryview(waves[:n]))
+        self._time_f.write(memoryview(stamps[:n]))
+        self.bytes_written += waves[:n].nbytes + stamps[:n].nbytes
+        self._chunks.append((self._entries_written, self._entries_written + n,
+                             int(stamps[:n].min()), int(stamps[:n].max())))
+        self._entries_written += n
+        self._n_buffered[buffer_n] = 0
+
+    def backlog(self):
+        """Full chunks waiting for the writer thread."""
+        return self._q.qsize()
+
+    def buffer_bytes(self):
+        """Memory held by the write buffers [bytes], for health metrics."""
+        return sum(w.nbytes + t.nbytes for w, t in self._buffers)
+
+    def close_async(self):
+        """As RootManager.close_async()."""
+        if self._n_buffered[self._buffer_now]:
+            self._q.put(self._buffer_now)
+        self._q.put(self._stop_queue)
+
+    def wait_closed(self, timeout=None):
+        self._thd.join(timeout)
+        return not self._thd.is_alive()
+
+    def close(self):
+        self.close_async()
+        self.wait_closed()
+
+    def _finish(self):
+        self._wave_f.close()
+        self._time_f.close()
+        self._header["entries"] = self._wave_n
+        self._write_header()
+        if self._wave_n:
+            print(f"[I/O] Data saved to binary file {self._filename}. File closed")
+        _notifyClosed(self)
+
+    def catalog_entry(self):
+        """As RootManager.catalog_entry()."""
+        return _catalogEntry(self._filename, self._chConfig, self._sample_num,
+                             self._wave_n, self._chunks)
 
     def getName(self):
         return self._filename
 
+    def remove(self):
+        """Delete the file set (after close)."""
+        for path in (self._filename, self._base + ".h2t", self._base + ".json"):
+            os.remove(path)
+
+def _catalogEntry(path, channels, samples, entries, chunks):
+    return {
+        "path": path, "channels": channels, "samples": samples,
+        "entries": entries, "chunks": chunks,
+        "first_ns": min((c[2] for c in chunks), default=None),
+        "last_ns":  max((c[3] for c in chunks), default=None),
+    }
+
+def _notifyClosed(sink):
+    """Run a sink's on_close hook; a failing hook must not stop the writer."""
+    if sink.on_close is None:
+        return
+    try:
+        sink.on_close(sink)
+    except Exception as e:
+        print(f"[WARN] Close hook failed for {sink.getName()}: {e}")
+
+# Queue item for a chunk parked in the SpillFile instead of a buffer index
+_SpilledChunk = namedtuple("_SpilledChunk", "slot n first_wave")
+
+class SpillFile:
+    """
+    Memory-mapped scratch file of fixed-size slots, each holding one
+    RootManager chunk buffer (same arrays, same shapes). store() runs on the
+    acquisition thread and is a memory copy into the page cache; load() and
+    release() run on the writer thread. The file is created on the first
+    store() and grows one slot at a time up to limit bytes.
+    """
+
+    def __init__(self, layout, directory=None, limit=4 << 30, prefix="spill_"):
+        """layout: {name: (shape, dtype)} of one chunk buffer."""
+        self._layout = []
+        offset = 0
+        for name, (shape, dtype) in layout.items():
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            self._layout.append((name, offset, nbytes, shape, np.dtype(dtype)))
+            offset += -(-nbytes // 64) * 64
+        # Whole mapping-granularity units so every slot maps at its own offset
+        self.slot_bytes = -(-offset // mmap.ALLOCATIONGRANULARITY) * mmap.ALLOCATIONGRANULARITY
+        self._max_slots = int(limit // self.slot_bytes)
+        self._dir       = directory
+        self._prefix    = prefix
+        self._path      = None
+        self._fd        = None
+        self._views     = []        # slot -> {name: array backed by the file}
+        self._free      = []
+        self._lock      = threading.Lock()
+
+    def _grow(self):
+        if self._fd is None:
+            self._fd, self._path = tempfile.mkstemp(
+                prefix=self._prefix, suffix=".spill", dir=self._dir
+            )
+            print(f"[WARN] ROOT writer behind, spilling chunks to {self._path}")
+        slot = len(self._views)
+        os.ftruncate(self._fd, (slot + 1) * self.slot_bytes)
+        raw = np.memmap(self._path, dtype=np.uint8, mode="r+",
+                        offset=slot * self.slot_bytes, shape=(self.slot_bytes,))
+        self._views.append({
+            name: raw[off:off + nbytes].view(dtype).reshape(shape)
+            for name, off, nbytes, shape, dtype in self._layout
+        })
+        return slot
+
+    def store(self, buffer, n):
+        """Copy the first n rows of buffer into a slot; None if the file is full."""
+        with self._lock:
+            if self._free:
+                slot = self._free.pop()
+            elif len(self._views) < self._max_slots:
+                slot = self._grow()
+            else:
+                return None
+        view = self._views[slot]
+        for name, data in buffer.items():
+            view[name][:n] = data[:n]
+        return slot
+
+    def load(self, slot):
+        return self._views[slot]
+
+    def release(self, slot):
+        with self._lock:
+            self._free.append(slot)
+
+    def size(self):
+        return len(self._views) * self.slot_bytes
+
+    def close(self):
+        """Unmap and delete the scratch file."""
+        if self._fd is None:
+            return
+        self._views.clear()
+        os.close(self._fd)
+        self._fd = None
+        try:
+            os.remove(self._path)
+        except OSError as e:
+            print(f"[WARN] Could not remove spill file {self._path}: {e}")
+
+class RootRotator:
+    """
+    Rotates one digitizer's ROOT files (or BinaryWaveSink files, with
+    extension="h2w") without stopping acquisition.
+
+    Files are named <output_name>_<YYMMDD>_<NNNN>.<extension> after the local date
+    they start in; NNNN comes from an in-memory counter per date (the
+    directory is scanned once per date, so a restart continues the
+    numbering). The next file is always pre-opened on a background thread,
+    and a full file is closed by its own writer thread (close_async).
+
+    A file is due when any limit is reached: triggers, bytes on disk, or
+    the next wall-clock boundary, i.e. a multiple of interval_s counted
+    from local midnight. Local midnight is always a boundary, so a file
+    never spans two dates.
+
+    With a catalog (picoRunCatalog.RunCatalog), every file taken into use
+    is added to it by its writer thread once it is closed.
+    """
+
+    # Re-prepare the next file for the new date this long before midnight
+    LEAD_S = 5.0
+
+    def __init__(self, root_dir, output_name, open_file, triggers=10000,
+                 max_bytes=0, interval_s=0, extension="root", catalog=None):
+        """open_file: callable(filename) -> started RootManager or BinaryWaveSink."""
+        self._dir         = root_dir
+        self._ext         = extension
+        self._catalog     = catalog
+        self._output_name = output_name
+        self._open_file   = open_file
+        self.triggers     = triggers
+        self.max_bytes    = max_bytes
+        self.interval_s   = interval_s
+        self._seq         = {}      # date -> next sequence number
+        self._pool        = ThreadPoolExecutor(max_workers=1)
+        self._prepared    = None    # (date, future of RootManager)
+        self._closing     = []      # RootManagers closing on their writer
+        self._current     = None
+        self._boundary    = None    # datetime the current file ends at
+        self._lead_done   = False
+
+    def _name(self, date):
+        if date not in self._seq:
+            pattern = re.compile(
+                rf"{re.escape(self._output_name)}_{date}_(\d+)\.{self._ext}$"
+            )
+            used = [
+                int(m.group(1))
+                for path in glob.glob(f"{self._dir}/{self._output_name}_{date}_*.{self._ext}")
+                for m in [pattern.search(path)] if m
+            ]
+            self._seq[date] = max(used) + 1 if used else 0
+        seq = self._seq[date]
+        self._seq[date] += 1
+        return "{}/{}_{}_{:04d}.{}".format(self._dir, self._output_name, date, seq, self._ext)
+
+    def _prepare(self, date):
+        """Pre-open the next file for date on the background thread."""
+        if self._prepared is not None:
+            self._pool.submit(self._discard, self._prepared[1])
+        self._prepared = (date, self._pool.submit(
+            lambda: self._open_file(self._name(date))
+        ))
+
+    @staticmethod
+    def _discard(future):
+        """Close and delete a pre-opened file that was never used."""
+        root = future.result()
+        root.close()
+        root.remove()
+
+    def next_file(self, now=None):
+        """Retire the current file (if any) and return the next one."""
+        now = now or datetime.now()
+        date = now.strftime("%y%m%d")
+        if self._current is not None:
+            self.retire(self._current)
+        if self._prepared is None or self._prepared[0] != date:
+            self._prepare(date)
+        root = self._prepared[1].result()   # waits only if still opening
+        self._prepared = None
+        self._prepare(date)
+        self._current   = root
+        self._boundary  = self.nextBoundary(now, self.interval_s)
+        self._lead_done = False
+        if self._catalog is not None:
+            root.on_close = self._record
+        kind = "ROOT" if self._ext == "root" else "binary"
+        print(f"[I/O] Opening {kind} file {root.getName()}")
+        return root
+
+    def submit(self, fn, *args):
+        """Run fn(*args) on the background thread that pre-opens files."""
+        return self._pool.submit(fn, *args)
+
+    def _record(self, root):
+        """on_close hook: add a closed file to the catalog (writer thread)."""
+        kind = "root" if self._ext == "root" else "binary"
+        self._catalog.add_file(kind, self._output_name, root.catalog_entry())
+
+    @staticmethod
+    def nextBoundary(now, interval_s):
+        """First multiple of interval_s after now, from local midnight; at most the next midnight."""
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        next_midnight = midnight + timedelta(days=1)
+        if interval_s <= 0:
+            return next_midnight
+        elapsed = (now - midnight).total_seconds()
+        boundary = midnight + timedelta(seconds=(elapsed // interval_s + 1) * interval_s)
+        return min(boundary, next_midnight)
+
+    def due(self, trigger_cnt, now=None):
+        """True when the current file has reached a rotation limit."""
+        now = now or datetime.now()
+        if not self._lead_done and (self._boundary - now).total_seconds() < self.LEAD_S:
+            # The file after this boundary may start on a new date
+            self._lead_done = True
+            date = self._boundary.strftime("%y%m%d")
+            if self._prepared[0] != date:
+                self._prepare(date)
+        return ((self.triggers > 0 and trigger_cnt >= self.triggers)
+                or (self.max_bytes > 0 and self._current.bytes_written >= self.max_bytes)
+                or now >= self._boundary)
+
+    def retire(self, root):
+        """Close a full file on its writer thread."""
+        root.close_async()
+        self._closing = [r for r in self._closing if not r.wait_closed(0)]
+        self._closing.append(root)
+        if self._current is root:
+            self._current = None
+
+    def close(self):
+        """Close the current file and wait for all files; drop the pre-opened one."""
+        if self._current is not None:
+            self.retire(self._current)
+        if self._prepared is not None:
+            self._pool.submit(self._discard, self._prepared[1])
+            self._prepared = None
+        self._pool.shutdown(wait=True)
+        for root in self._closing:
+            root.wait_closed()
+        self._closing = []
+
+class TriggerClock:
+    """
+    int64 nanosecond wall-clock timestamps from the monotonic high-resolution
+    counter (time.perf_counter_ns), anchored to time.time_ns() once. Wall
+    clock steps (NTP, DST) after the anchor do not affect the timestamps.
+    """
+
+    def __init__(self):
+        self._wall0 = time.time_ns()
+        self._mono0 = time.perf_counter_ns()
+
+    def now_ns(self):
+        return self._wall0 + (time.perf_counter_ns() - self._mono0)
+
+    def wall_ns(self, mono_ns):
+        """perf_counter_ns() value(s) -> ns since the epoch."""
+        return self._wall0 + (np.asarray(mono_ns, dtype=np.int64) - self._mono0)
+
+def calendarColumns(timestamp_ns):
+    """
+    Year/Month/Day/Hour/Min/Sec/ms local-time columns for an int64 array of
+    ns-since-epoch timestamps (UTC offset taken at the first entry).
+    """
+    ts = np.asarray(timestamp_ns, dtype=np.int64)
+    if len(ts) == 0:
+        return {k: np.zeros(0, dtype=np.int64) for k in RootManager._calendar_branch}
+    utc_offset = datetime.fromtimestamp(ts[0] / 1e9).astimezone().utcoffset()
+    local = (ts + int(utc_offset.total_seconds() * 1e9)).astype("datetime64[ns]")
+    day   = local.astype("datetime64[D]")
+    month = local.astype("datetime64[M]")
+    ms_of_day = (local - day).astype("timedelta64[ms]").astype(np.int64)
+    return {
+        "Year":  local.astype("datetime64[Y]").astype(np.int64) + 1970,
+        "Month": month.astype(np.int64) % 12 + 1,
+        "Day":   (day - month.astype("datetime64[D]")).astype(np.int64) + 1,
+        "Hour":  ms_of_day // 3600000,
+        "Min":   ms_of_day // 60000 % 60,
+        "Sec":   ms_of_day // 1000 % 60,
+        "ms":    ms_of_day % 1000,
+    }
+
 class StreamManager:
+    """
+    Software trigger for continuous (streaming) acquisition.
+
+    Blocks of samples are pushed per channel into NumpyRingQueue rings with
+    Put(). NextWindows() scans the trigger channel for threshold crossings
+    (vectorised edge search, with noise_RMS-based hysteresis against
+    re-triggering on noise) and cuts [trigger - pre, trigger + post) windows
+    for every channel, the same geometry block mode produces. Samples that
+    can no longer contribute to a window are discarded from the rings.
+    Units are whatever the caller pushes (ADC counts or mV); the threshold
+    must be in the same units.
+    """
+
+    HYSTERESIS_SIGMA = 3.0   # re-arm once the signal is this many RMS back
+
+    def __init__(self, channels, trigger_channel, pre_samples, post_samples,
+                 capacity, dtype='int16', t=None):
+        self.channels        = list(channels)
+        self.trigger_channel = trigger_channel
+        self.pre             = int(pre_samples)
+        self.post            = int(post_samples)
+        self.sample_num      = self.pre + self.post
+        if capacity < 2 * self.sample_num:
+            raise ValueError("capacity must hold at least two windows")
+        self.rings = {ch: NumpyRingQueue(capacity, dtype=dtype)
+                      for ch in self.channels}
+        self.t = t if t is not None else np.arange(self.sample_num, dtype=np.float32)
+
+        self.thre      = 0
+        self.noise_RMS = 0
+        self.rising    = True
+
+        # Scan state, as indices relative to the ring head
+        self._scan_from     = 0      # first sample not yet searched
+        self._holdoff_until = 0      # no trigger before this (window overlap)
+        self._arm_since     = 0      # a re-arm sample must be at/after this
+        self._armed         = True
+
+        self.samples_seen   = 0      # total samples pushed per channel
+        self.head_index     = 0      # stream sample index of the ring head
+        self.dropped        = 0      # unscanned samples lost to a full ring
+        self.gaps           = []     # (first stream index, length) not searched
+        self.triggers       = 0
+
     def SetNoiseRMS(self, RMS):
         self.noise_RMS=RMS
 
@@ -193,8 +958,327 @@ class StreamManager:
     def SetFallingEdge(self):
         self.rising = False
 
-    def TriggerAndSave(self, signal, rootmng):
-        pass
+    def Put(self, signal):
+        """
+        Append one block per channel; signal: {channel: 1-D array}. When the
+        rings cannot take the block, the oldest samples are dropped to make
+        room, so the rings always hold a contiguous run of the stream.
+        """
+        n = len(signal[self.trigger_channel])
+        ring = self.rings[self.trigger_channel]
+        skip = max(0, n - ring.capacity())     # block larger than the rings
+        need = n - skip - ring.free_space()
+        if need > 0 or skip:
+            self._make_room(max(need, 0), skip)
+        for ch in self.channels:
+            self.rings[ch].put(signal[ch][skip:])
+        self.samples_seen += n
+
+    def _make_room(self, n, skip):
+        """
+        Drop the n oldest samples and skip the first `skip` of the incoming
+        block. Stream indices that can no longer be searched for a trigger
+        (with pre samples of history) are reported as a gap and the scan
+        restarts after it, so no window is cut across lost samples.
+        """
+        for ch in self.channels:
+            self.rings[ch].drop(n)
+        gap_from = self.head_index + self._scan_from
+        self.dropped += max(0, n - self._scan_from) + skip
+        self.head_index += n + skip
+        gap_to = self.head_index + max(self.pre, 1)
+        if gap_to <= gap_from:
+            # Only searched samples dropped: shift the scan state as usual
+            self._scan_from    -= n
+            self._holdoff_until = max(0, self._holdoff_until - n)
+            self._arm_since     = max(0, self._arm_since - n)
+            return
+        if self.gaps and sum(self.gaps[-1]) >= gap_from:
+            gap_from = self.gaps.pop()[0]       # continues the previous gap
+        self.gaps.append((gap_from, gap_to - gap_from))
+        print(f"[WARN] StreamManager: ring full, stream samples "
+              f"{gap_from} .. {gap_to - 1} not searched for triggers")
+        self._scan_from     = 0
+        self._holdoff_until = 0
+        self._arm_since     = 0
+        self._armed         = True
+
+    def NextWindows(self, out, index_out=None):
+        """
+        Cut up to len(out) triggered windows into out, an array of shape
+        (k, channels, pre + post). Returns the number of windows written.
+        index_out: optional int64 array; receives the stream sample index
+        (counted from the first Put) of each window's trigger point.
+        """
+        ring  = self.rings[self.trigger_channel]
+        avail = len(ring)
+        start = max(self._scan_from, self.pre, 1)
+        stop  = avail - self.post + 1          # last usable trigger index + 1
+        if stop <= start:
+            return 0
+
+        x   = ring.peek(avail)
+        hys = self.HYSTERESIS_SIGMA * self.noise_RMS
+        if self.rising:
+            above = x >= self.thre
+            below = x <= self.thre - hys
+        else:
+            above = x <= self.thre
+            below = x >= self.thre + hys
+        cand = np.flatnonzero(above[start:stop] & ~above[start - 1:stop - 1]) + start
+        idx  = np.arange(avail)
+        last_below = np.maximum.accumulate(np.where(below, idx, -1))
+
+        triggers = []
+        for c in cand:
+            if len(triggers) == len(out):
+                break
+            if c < self._holdoff_until:
+                continue
+            if not (self._armed or last_below[c - 1] >= self._arm_since):
+                continue
+            triggers.append(c)
+            self._armed         = False
+            self._arm_since     = c + 1
+            self._holdoff_until = c + self.post
+
+        if len(triggers) == len(out):
+            next_scan = triggers[-1] + 1
+        else:
+            next_scan = stop
+        if not self._armed and last_below[next_scan - 1] >= self._arm_since:
+            self._armed = True
+
+        if triggers:
+            data = {ch: (x if ch == self.trigger_channel else self.rings[ch].peek(avail))
+                    for ch in self.channels}
+            for k, c in enumerate(triggers):
+                for i, ch in enumerate(self.channels):
+                    out[k, i] = data[ch][c - self.pre:c + self.post]
+            if index_out is not None:
+                index_out[:len(triggers)] = np.asarray(triggers) + self.head_index
+            self.triggers += len(triggers)
+
+        # Keep pre samples of history before the next scan position
+        drop = max(0, next_scan - max(self.pre, 1))
+        for ch in self.channels:
+            self.rings[ch].drop(drop)
+        self.head_index    += drop
+        self._scan_from     = next_scan - drop
+        self._holdoff_until = max(0, self._holdoff_until - drop)
+        self._arm_since     = max(0, self._arm_since - drop)
+        return len(triggers)
+
+    def TriggerAndSave(self, signal, rootmng, max_windows=100):
+        """Push one block, then fill every complete triggered window."""
+        self.Put(signal)
+        out = np.empty((max_windows, len(self.channels), self.sample_num),
+                       dtype=self.rings[self.trigger_channel].buf.dtype)
+        n_saved = 0
+        while True:
+            n = self.NextWindows(out)
+            for k in range(n):
+                wave = {"Time": self.t}
+                for i, ch in enumerate(self.channels):
+                    wave[f"Ch{ch}"] = out[k, i]
+                rootmng.fill(**wave)
+            n_saved += n
+            if n < max_windows:
+                return n_saved
+
+class ReadyWaiter:
+    """
+    Blocks an acquisition thread until the armed capture completes, the
+    stop event is set, or interrupt() is called.
+
+    Event-driven (is_ready=None): hand notify() to the driver's block-ready
+    callback; the thread sleeps on a threading.Event and wakes as soon as the
+    driver signals completion.
+
+    Adaptive polling (is_ready=callable): for drivers without a callback. The
+    waiter learns the arm-to-ready period, sleeps through most of it without
+    polling and then polls with exponential back-off, so a 25 Hz trigger
+    costs a handful of wake-ups instead of ~4 per 10 ms. Waits longer than
+    warn_after (beam off) are not learned and the period is capped at a few
+    times the recent median, so an outage does not stretch the unpolled
+    sleep. A capture already complete when that sleep ends has no known
+    ready time: ready_ns is None and ready_bounds_ns holds (arm, seen), and
+    the period is learned again from the next capture.
+    """
+
+    STOP_CHECK_S = 0.1      # stop_event re-check interval while waiting
+    MIN_POLL_S   = 0.0005   # first back-off step after the learned period
+    MAX_POLL_S   = 0.01     # back-off ceiling (the old fixed poll interval)
+    LEAD         = 0.8      # fraction of the learned period slept unpolled
+    PERIOD_ALPHA = 0.1      # EMA weight when the period grows
+    PERIOD_CAP   = 2.0      # period at most this × median of recent waits
+    RECENT       = 16       # arm-to-ready times kept for the median
+
+    def __init__(self, stop_event, is_ready=None, warn_after=10, name=""):
+        self._stop_event  = stop_event
+        self._is_ready    = is_ready
+        self._warn_after  = warn_after
+        self._name        = name
+        self._done        = threading.Event()
+        self._interrupted = False
+        self._t_arm       = None
+        self.arm_ns       = None   # perf_counter_ns() at arm()
+        self._recent      = deque(maxlen=self.RECENT)
+        self.period       = None   # learned arm-to-ready time [s]
+        self.status       = None   # status passed to notify() by the driver
+        self.ready_ns     = None   # perf_counter_ns() when ready was seen
+        self.ready_bounds_ns = None  # (arm, seen) when ready_ns is unknown
+        self.untimed      = 0      # captures with unknown ready time
+        self.wakeups      = 0      # number of times wait() woke up
+
+    def arm(self):
+        """Call right before starting a capture."""
+        self._done.clear()
+        self._interrupted = False
+        self.status = None
+        self.ready_ns = None
+        self.ready_bounds_ns = None
+        self.arm_ns = time.perf_counter_ns()
+        self._t_arm = self.arm_ns / 1e9
+
+    def notify(self, status=None):
+        """Driver callback: the armed capture is complete."""
+        self.ready_ns = time.perf_counter_ns()
+        self.status = status
+        self._done.set()
+
+    def interrupt(self):
+        """Wake a blocked wait() immediately (used on shutdown)."""
+        self._interrupted = True
+        self._done.set()
+
+    def wait(self):
+        """
+        Return True when the capture is ready, False if interrupted or the
+        stop event was set first.
+        """
+        next_warn = self._warn_after
+        if self._is_ready is None:
+            while not self._done.wait(self.STOP_CHECK_S):
+                self.wakeups += 1
+                if self._stop_event.is_set():
+                    return False
+                next_warn = self._warn(next_warn)
+            self.wakeups += 1
+        else:
+            if self.period is not None:
+                # Unpolled sleep, still ended by stop or interrupt()
+                deadline = self._t_arm + self.period * self.LEAD
+                while not (self._stop_event.is_set() or self._interrupted):
+                    left = deadline - time.perf_counter()
+                    if left <= 0:
+                        break
+                    self._done.wait(min(left, self.STOP_CHECK_S))
+            delay = self.MIN_POLL_S
+            polls = 0
+            while not self._is_ready():
+                polls += 1
+                self.wakeups += 1
+                if self._stop_event.is_set() or self._interrupted:
+                    return False
+                next_warn = self._warn(next_warn)
+                self._done.wait(delay)
+                delay = min(delay * 2, self.MAX_POLL_S)
+            seen_ns = time.perf_counter_ns()
+            self.wakeups += 1
+            if polls == 0 and self.period is not None:
+                # Ready straight after the unpolled sleep: it completed at an
+                # unknown time since the arm, so the period is shorter than
+                # learned. Poll the next capture from the arm to relearn it.
+                self.ready_bounds_ns = (self.arm_ns, seen_ns)
+                self.untimed += 1
+                self.period = None
+                return not (self._interrupted or self._stop_event.is_set())
+            self.ready_ns = seen_ns
+
+        if self._interrupted or self._stop_event.is_set():
+            return False
+        self._learn(time.perf_counter() - self._t_arm)
+        return True
+
+    def _learn(self, dt):
+        # A wait past the warning threshold is an outage, not the period.
+        if dt > self._warn_after:
+            return
+        # Follow a shorter period at once (sleeping too long adds latency),
+        # grow slowly so one missing shot does not inflate the unpolled sleep.
+        self._recent.append(dt)
+        if self.period is None or dt < self.period:
+            self.period = dt
+        else:
+            self.period += self.PERIOD_ALPHA * (dt - self.period)
+        self.period = min(self.period,
+                          self.PERIOD_CAP * float(np.median(self._recent)))
+
+    def _warn(self, next_warn):
+        if time.perf_counter() - self._t_arm > next_warn:
+            print(f"[WARN]: {self._name}: No trigger for {next_warn} seconds")
+            next_warn += self._warn_after
+        return next_warn
+
+_CHANNEL_INPUT_RANGES = [10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000]
+
+_MEMORY_UNITS = {"": 1, "B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+def parseMemorySize(size):
+    """Bytes from a number (MB) or a string like "256 MB" / "1.5GB"."""
+    if isinstance(size, (int, float)):
+        return int(size * _MEMORY_UNITS["MB"])
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([KMG]?B?)\s*", size.upper())
+    if match is None:
+        raise ValueError(f"Cannot parse memory size '{size}'")
+    return int(float(match.group(1)) * _MEMORY_UNITS[match.group(2)])
+
+_ROOT_COMPRESSION = {
+    "ZLIB": uproot.ZLIB,
+    "LZMA": uproot.LZMA,
+    "LZ4":  uproot.LZ4,
+    "ZSTD": uproot.ZSTD,
+}
+
+def rootCompression(algorithm="ZLIB", level=1):
+    """
+    uproot compression object from a config name ("ZLIB", "LZMA", "LZ4",
+    "ZSTD") and level; None for "none" or level 0. Compresses a few bytes
+    once so a missing codec fails at startup, not in the writer thread.
+    """
+    name = str(algorithm).upper()
+    if name == "NONE" or level == 0:
+        return None
+    if name not in _ROOT_COMPRESSION:
+        raise ValueError(f"Unknown ROOT compression '{algorithm}', "
+                         f"use one of {list(_ROOT_COMPRESSION)} or 'none'")
+    compression = _ROOT_COMPRESSION[name](int(level))
+    try:
+        compression.compress(bytes(64))
+    except ImportError as e:
+        raise ValueError(f"ROOT compression {name} is not available: {e}") from e
+    return compression
+
+def rawStorageMeta(channels, ch_range, maxADC, ch_offset, delta_t):
+    """File-level metadata needed to convert stored ADC counts to mV."""
+    return {
+        "format":  "adc_int16",
+        "maxADC":  int(maxADC.value),
+        "delta_t": float(delta_t),        # ns per sample
+        "channels": {
+            f"Ch{ch}": {
+                "range":    int(ch_range[ch]),
+                "range_mV": _CHANNEL_INPUT_RANGES[ch_range[ch]],
+                "offset":   float(ch_offset[ch]),
+            }
+            for ch in channels
+        },
+    }
+
+def adcScale(range, maxADC):
+    """mV per ADC count for a range index (same table as fastAdc2mV)."""
+    return _CHANNEL_INPUT_RANGES[range] / maxADC.value
 
 def fastAdc2mV(bufferADC, range, maxADC, offset=0):
     """ 
@@ -213,6 +1297,51 @@ def fastAdc2mV(bufferADC, range, maxADC, offset=0):
     
     return bufferV
 
+class AdcConverter:
+    """
+    Batched ADC count -> float32 mV conversion with the per-channel scale
+    and offset computed once. Same result as fastAdc2mV (to float32
+    precision) without its per-call table lookup and int64/float64
+    temporaries.
+    """
+
+    def __init__(self, channels, ch_range, maxADC, ch_offset):
+        self.channels = list(channels)
+        self.scale  = np.array(
+            [adcScale(ch_range[ch], maxADC) for ch in self.channels],
+            dtype=np.float32,
+        )
+        self.offset = np.array(
+            [ch_offset[ch] for ch in self.channels], dtype=np.float32
+        )
+        # Broadcast shapes for (n_triggers, n_channels, n_samples) blocks
+        self._scale_b  = self.scale[None, :, None]
+        self._offset_b = self.offset[None, :, None]
+
+    def convert(self, adc, out=None):
+        """
+        Convert an int16 block of shape (n_triggers, n_channels, n_samples).
+        out: preallocated float32 array of at least n_triggers rows; the
+        first n_triggers rows are overwritten and returned.
+        """
+        if out is None:
+            out = np.empty(adc.shape, dtype=np.float32)
+        res = out[:len(adc)]
+        np.multiply(adc, self._scale_b, out=res)
+        if self.offset.any():
+            np.subtract(res, self._offset_b, out=res)
+        return res
+
+    def convertChannel(self, i, adc, out=None):
+        """Convert one channel's (n_triggers, n_samples) ADC rows (index i)."""
+        if out is None:
+            out = np.empty(adc.shape, dtype=np.float32)
+        res = out[:len(adc)]
+        np.multiply(adc, self.scale[i], out=res)
+        if self.offset[i]:
+            np.subtract(res, self.offset[i], out=res)
+        return res
+
 def getVoltageRange(range, offset=0):
     channelInputRanges = [10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000]
     return [-channelInputRanges[range]-offset, channelInputRanges[range]-offset]
@@ -305,6 +1434,26 @@ class NumpyRingQueue:
         self.size -= n
         return out
 
+    def peek(self, n: int):
+        """Copy the oldest n elements without removing them."""
+        if n > self.size:
+            raise Exception("Queue empty: not enough elements to peek")
+        out = np.empty(n, dtype=self.buf.dtype)
+        end = self.maxsize - self.head
+        first = min(n, end)
+        out[:first] = self.buf[self.head:self.head + first]
+        rem = n - first
+        if rem:
+            out[first:] = self.buf[0:rem]
+        return out
+
+    def drop(self, n: int):
+        """Discard the oldest n elements (no copy)."""
+        n = min(n, self.size)
+        self.head = (self.head + n) % self.maxsize
+        self.size -= n
+        return n
+
     # ----- convenience (scalar) -----
     def add(self, value):
         # keep your old name; pushes a single value
@@ -318,4 +1467,145 @@ class NumpyRingQueue:
         if self.is_Null():
             raise Exception("Queue empty")
         return self.buf[self.head]
-        
\ No newline at end of file
+        
+
+
+class SharedMemoryRing:
+    """
+    Single-producer / single-consumer message ring in shared memory, used to
+    pass GUI updates (averaged waveforms, trends, errors) from a digitizer
+    process to the coordinator without pickling the arrays.
+
+    Each message is a dict of scalars, strings and NumPy arrays. It is framed
+    as [uint32 length][JSON header][raw array bytes], padded to 8 bytes. The
+    read/write positions are monotonic uint64 byte counters at the start of
+    the segment. Only the producer advances the write counter and only the
+    consumer advances the read counter, and each counter is written after the
+    payload, so no lock is needed (aligned 8-byte stores).
+    """
+
+    _HEADER = 64
+    _WRAP   = 0xFFFFFFFF   # length marker: continue at the start of the ring
+
+    def __init__(self, name=None, size=8 * 1024 * 1024):
+        if name is None:
+            size = (size + 7) // 8 * 8
+            self._shm = shared_memory.SharedMemory(
+                create=True, size=self._HEADER + size
+            )
+            self._owner = True
+        else:
+            self._shm = self._attach(name)
+            self._owner = False
+        self.name   = self._shm.name
+        self._count = np.ndarray((2,), dtype=np.uint64, buffer=self._shm.buf[:16])
+        self._data  = np.ndarray(
+            (self._shm.size - self._HEADER,), dtype=np.uint8,
+            buffer=self._shm.buf[self._HEADER:],
+        )
+        self.size = len(self._data) // 8 * 8
+        if self._owner:
+            self._count[:] = 0
+        self.dropped = 0   # messages rejected because the ring was full
+
+    @staticmethod
+    def _attach(name):
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13. Child processes share the parent's resource
+            # tracker, and the creator's unlink() unregisters the segment.
+            return shared_memory.SharedMemory(name=name)
+
+    # ----- message codec -----
+    @staticmethod
+    def encode(msg):
+        header, blobs, offset = {}, [], 0
+        for k, v in msg.items():
+            if isinstance(v, np.ndarray):
+                v = np.ascontiguousarray(v)
+                header[k] = {"dtype": v.dtype.str, "shape": v.shape, "off": offset}
+                blobs.append(v.tobytes())
+                offset += v.nbytes
+            elif isinstance(v, np.generic):
+                header[k] = {"v": v.item()}
+            else:
+                header[k] = {"v": v}
+        head = json.dumps(header).encode()
+        return len(head).to_bytes(4, "little") + head + b"".join(blobs)
+
+    @staticmethod
+    def decode(buf):
+        n_head = int.from_bytes(buf[:4], "little")
+        header = json.loads(bytes(buf[4:4 + n_head]))
+        body   = buf[4 + n_head:]
+        msg = {}
+        for k, h in header.items():
+            if "v" in h:
+                msg[k] = h["v"]
+            else:
+                dtype = np.dtype(h["dtype"])
+                count = int(np.prod(h["shape"]))
+                msg[k] = np.frombuffer(
+                    body, dtype=dtype, count=count, offset=h["off"]
+                ).reshape(h["shape"]).copy()
+        return msg
+
+    # ----- producer -----
+    def put(self, msg):
+        """Write one message; returns False (and drops it) if the ring is full."""
+        payload = self.encode(msg)
+        rec     = (4 + len(payload) + 7) // 8 * 8
+        head, tail = int(self._count[0]), int(self._count[1])
+        pos     = tail % self.size
+        to_end  = self.size - pos
+        need    = rec if rec <= to_end else to_end + rec
+        if rec > self.size or need > self.size - (tail - head):
+            self.dropped += 1
+            return False
+        if rec > to_end:
+            self._data[pos:pos + 4] = np.frombuffer(
+                self._WRAP.to_bytes(4, "little"), np.uint8
+            )
+            tail += to_end
+            pos = 0
+        self._data[pos:pos + 4] = np.frombuffer(
+            len(payload).to_bytes(4, "little"), np.uint8
+        )
+        self._data[pos + 4:pos + 4 + len(payload)] = np.frombuffer(payload, np.uint8)
+        self._count[1] = tail + rec   # publish after the payload is in place
+        return True
+
+    # ----- consumer -----
+    def get_all(self):
+        """Pop every complete message currently in the ring."""
+        out = []
+        head, tail = int(self._count[0]), int(self._count[1])
+        while head < tail:
+            pos = head % self.size
+            n = int.from_bytes(self._data[pos:pos + 4].tobytes(), "little")
+            if n == self._WRAP:
+                head += self.size - pos
+                continue
+            out.append(self.decode(self._data[pos + 4:pos + 4 + n].tobytes()))
+            head += (4 + n + 7) // 8 * 8
+        self._count[0] = head
+        return out
+
+    def close(self):
+        del self._count, self._data
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class SharedRingQueue:
+    """queue.Queue-like put() front end for a SharedMemoryRing producer."""
+
+    def __init__(self, ring):
+        self._ring = ring
+
+    def put(self, item, block=True, timeout=None):
+        if not self._ring.put(item):
+            print(f"[WARN] GUI update ring full, dropped "
+                  f"{self._ring.dropped} message(s)")
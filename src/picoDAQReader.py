@@ -0,0 +1,198 @@
+# picoDAQReader.py
+# Offline readers for the ROOT files written by picoDAQAssistant.RootManager.
+#
+# Files written with "root_storage": "raw" hold int16 ADC counts plus a JSON
+# TObjString "H2Meta" with the conversion constants; mV files hold float32 mV
+# and no metadata. readWaves() returns mV for both, converting raw files
+# lazily (only the requested channels and entries), or the raw counts with
+# unit="adc".
+#
+# Raw files written with a "root_codec" hold each channel as uint8 blobs
+# (delta + zigzag + byte/bit shuffle, see picoWaveCodec); H2Meta names the
+# codec and readWaves() decodes them to int16 counts first.
+#
+# Files written with "root_time_axis": "file" have no per-event Time branch;
+# the constant axis is the single entry of the side tree "timeAxis" and is
+# broadcast back to (N, samples) on read.
+#
+# Files written before the int64 Timestamp branch hold the trigger time only
+# as local-time Year/Month/Day/Hour/Min/Sec/ms branches; calendarTimestamp()
+# turns those into ns since the epoch (ms resolution).
+#
+# Files written with "output_format": "binary" (picoDAQAssistant.
+# BinaryWaveSink) are read with readBinary() / readBinaryDay(): the int16
+# records are memory-mapped, so channels come back as strided views without
+# copying or parsing.
+
+import glob
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import uproot
+
+from . import picoWaveCodec
+
+TREE_NAME = "rawWave"
+META_NAME = "H2Meta"
+TIME_NAME = "timeAxis"
+CALENDAR_BRANCHES = ("Year", "Month", "Day", "Hour", "Min", "Sec", "ms")
+
+
+def readMeta(path):
+    """
+    Return the H2Meta dict of a ROOT file, or None for files stored in mV.
+    """
+    with uproot.open(path) as f:
+        return _readMeta(f)
+
+
+def _readMeta(f):
+    if META_NAME not in f:
+        return None
+    return json.loads(str(f[META_NAME]))
+
+
+def readTimeAxis(path):
+    """
+    Return the time axis of a fixed-length ROOT file as a 1-D float32
+    array, from "timeAxis" or else from the first event's Time.
+    """
+    with uproot.open(path) as f:
+        return _readTimeAxis(f)
+
+
+def _readTimeAxis(f):
+    if TIME_NAME in f:
+        return f[TIME_NAME]["Time"].array(library="np")[0]
+    return f[TREE_NAME]["Time"].array(library="np", entry_stop=1)[0]
+
+
+def calendarTimestamp(cols):
+    """
+    int64 ns since the epoch from the local-time CALENDAR_BRANCHES arrays of
+    a file written without Timestamp. Each entry gets the UTC offset of this
+    machine's time zone at its local hour, so a DST change inside the file
+    is followed (the repeated autumn hour is ambiguous).
+    """
+    c = {k: np.asarray(cols[k], dtype=np.int64) for k in CALENDAR_BRANCHES}
+    month = ((c["Year"] - 1970) * 12 + c["Month"] - 1).astype("datetime64[M]")
+    day = month.astype("datetime64[D]") + (c["Day"] - 1)
+    local_ms = (day.astype(np.int64) * 86_400_000 + c["Hour"] * 3_600_000
+                + c["Min"] * 60_000 + c["Sec"] * 1000 + c["ms"])
+    hours, inverse = np.unique(local_ms // 3_600_000, return_inverse=True)
+    offset_ms = np.array([
+        (datetime(1970, 1, 1) + timedelta(hours=int(h))).astimezone()
+        .utcoffset().total_seconds() * 1000 for h in hours
+    ], dtype=np.int64)
+    return (local_ms - offset_ms[inverse]) * 1_000_000
+
+
+def adc2mV(adc, ch_meta, maxADC):
+    """Convert ADC counts to float32 mV using one channel's H2Meta entry."""
+    scale = np.float32(ch_meta["range_mV"] / maxADC)
+    out = adc.astype(np.float32)
+    out *= scale
+    out -= np.float32(ch_meta["offset"])
+    return out
+
+
+def readWaves(path, channels=None, entry_start=None, entry_stop=None,
+              unit="mV"):
+    """
+    Read waveforms from one ROOT file.
+
+    channels: list of branch names ("ChA", ...); default all channels.
+    unit:     "mV" (float32) or "adc" (int16, raw files only).
+    Returns a dict {"Time": (N, samples), "ChX": (N, samples), ...}. For
+    files with a per-file time axis, "Time" is a read-only broadcast view.
+    """
+    if unit not in ("mV", "adc"):
+        raise ValueError(f"unit must be 'mV' or 'adc', not '{unit}'")
+    with uproot.open(path) as f:
+        meta = _readMeta(f)
+        tree = f[TREE_NAME]
+        if channels is None:
+            channels = [k for k in tree.keys() if k.startswith("Ch")]
+        time_once = TIME_NAME in f
+        arrays = tree.arrays(
+            ([] if time_once else ["Time"]) + list(channels), library="np",
+            entry_start=entry_start, entry_stop=entry_stop,
+        )
+        if time_once:
+            n = len(range(tree.num_entries)[slice(entry_start, entry_stop)])
+            axis = _readTimeAxis(f)
+            arrays["Time"] = np.broadcast_to(axis, (n, len(axis)))
+
+    if meta is None:
+        if unit == "adc":
+            raise ValueError(f"{path} stores mV; ADC counts are not available")
+        return arrays
+    if "codec" in meta:
+        for ch in channels:
+            arrays[ch] = picoWaveCodec.decode(arrays[ch], meta["samples"],
+                                              meta["codec"])
+    if unit == "mV":
+        for ch in channels:
+            arrays[ch] = adc2mV(arrays[ch], meta["channels"][ch],
+                                meta["maxADC"])
+    return arrays
+
+
+def readBinaryHeader(path):
+    """Return the JSON header of a binary waveform file (.h2w)."""
+    with open(os.path.splitext(path)[0] + ".json") as f:
+        return json.load(f)
+
+
+def readBinary(path, channels=None, unit="adc"):
+    """
+    Memory-map one binary waveform file (.h2w).
+
+    Returns a dict {"Timestamp": (N,) int64 ns, "Time": (N, samples),
+    "ChX": (N, samples), ...}. With unit="adc" the channels are read-only
+    int16 views into the mapped file (random access touches only the pages
+    read); unit="mV" converts the requested channels to float32. "Time" is a
+    broadcast view of the header's time axis (k * delta_t if it has none).
+    A file still open or cut short by a
+    crash is read up to its last complete record.
+    """
+    if unit not in ("mV", "adc"):
+        raise ValueError(f"unit must be 'mV' or 'adc', not '{unit}'")
+    meta = readBinaryHeader(path)
+    base = os.path.splitext(path)[0]
+    order, samples = meta["order"], meta["samples"]
+    n = min(os.path.getsize(path) // meta["record_bytes"],
+            os.path.getsize(base + ".h2t") // 8)
+    if channels is None:
+        channels = order
+
+    if n:
+        records = np.memmap(path, dtype=np.int16, mode="r",
+                            shape=(n, len(order), samples))
+        stamps = np.memmap(base + ".h2t", dtype=np.int64, mode="r", shape=(n,))
+    else:                                    # np.memmap refuses empty files
+        records = np.empty((0, len(order), samples), dtype=np.int16)
+        stamps = np.empty(0, dtype=np.int64)
+    axis = meta.get("time_axis")
+    if axis is None:
+        axis = np.arange(samples) * meta["delta_t"]
+    axis = np.asarray(axis, dtype=np.float32)
+
+    arrays = {"Timestamp": stamps, "Time": np.broadcast_to(axis, (n, samples))}
+    for ch in channels:
+        arrays[ch] = records[:, order.index(ch)]
+        if unit == "mV":
+            arrays[ch] = adc2mV(arrays[ch], meta["channels"][ch], meta["maxADC"])
+    return arrays
+
+
+def readBinaryDay(directory, output_name, date, channels=None, unit="adc"):
+    """
+    readBinary() every file of one day (<output_name>_<YYMMDD>_*.h2w, in
+    sequence order). Returns a list of the per-file dicts, so a day of data
+    stays memory-mapped rather than being concatenated.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, f"{output_name}_{date}_*.h2w")))
+    return [readBinary(p, channels=channels, unit=unit) for p in paths]
@@ -0,0 +1,131 @@
+# picoDeviceRegistry.py
+# Process-wide registry of attached PicoScope units.
+#
+# PS2000 units can only be identified by opening them, so the old per-worker
+# scan (open everything, read serials, close the rest) cost O(k^2) opens for
+# k units and let one worker close a unit another was about to use. The
+# registry enumerates each driver family once, caches serial -> handle and
+# hands every H2LaserDigitizer the handle for its serial. A family is
+# re-enumerated only when a serial is requested that is not cached yet
+# (unit plugged in after startup).
+#
+# picosdk imports are deferred like in H2LaserDigitizer.
+
+import ctypes
+import threading
+
+from .H2Exceptions import DigitizerInitError
+
+
+class PicoDeviceRegistry:
+    def __init__(self):
+        self._lock       = threading.Lock()   # guards _claimed
+        self._scan_lock  = {"ps2000": threading.Lock(),
+                            "ps3000a": threading.Lock()}
+        self._ps2000     = {}     # serial -> open, not yet claimed handle
+        self._ps3000a    = None   # serials reported by ps3000aEnumerateUnits
+        self._claimed    = {}     # serial -> (family, handle) handed out
+        self.open_calls  = 0      # driver open calls, for startup diagnostics
+
+    def _claim(self, serial, family, handle):
+        with self._lock:
+            if serial in self._claimed:
+                raise DigitizerInitError(
+                    f"[ERROR] Digitizer {serial} is already used by another "
+                    f"configuration"
+                )
+            self._claimed[serial] = (family, handle)
+
+    # ----- PS2000 ------------------------------------------------------------
+    def _enumerate_ps2000(self):
+        from picosdk.ps2000 import ps2000
+        while True:
+            self.open_calls += 1
+            h = ps2000.ps2000_open_unit()
+            if h <= 0:
+                break
+            self._ps2000[_ps2000Serial(h)] = h
+        print(f"[INIT] {len(self._ps2000)} unused pico2000 detected")
+
+    def claim_ps2000(self, serial):
+        """Return the open handle (int) of PS2000 unit serial, or None."""
+        with self._scan_lock["ps2000"]:
+            if serial not in self._ps2000:
+                self._enumerate_ps2000()
+            if serial not in self._ps2000:
+                return None
+            self._claim(serial, "ps2000", self._ps2000[serial])
+            return self._ps2000.pop(serial)
+
+    # ----- PS3000A -----------------------------------------------------------
+    def _enumerate_ps3000a(self):
+        from picosdk.ps3000a import ps3000a
+        count   = ctypes.c_int16()
+        serials = ctypes.create_string_buffer(256)
+        length  = ctypes.c_int16(len(serials))
+        ps3000a.ps3000aEnumerateUnits(
+            ctypes.byref(count), serials, ctypes.byref(length)
+        )
+        text = serials.value.decode(errors="ignore")
+        self._ps3000a = [s for s in text.split(",") if s]
+        print(f"[INIT] {len(self._ps3000a)} pico3000 detected")
+
+    def open_ps3000a(self, serial):
+        """
+        Open PS3000A unit serial. Returns (status, handle); status is the
+        ps3000aOpenUnit status (the caller handles the power-source codes),
+        handle is None if the unit is not attached.
+        """
+        from picosdk.ps3000a import ps3000a
+        with self._scan_lock["ps3000a"]:
+            if self._ps3000a is None or serial not in self._ps3000a:
+                self._enumerate_ps3000a()
+            if serial not in self._ps3000a:
+                return None, None
+            self._claim(serial, "ps3000a", None)
+        # Opening by serial touches only that unit, so units open in parallel
+        handle = ctypes.c_int16()
+        self.open_calls += 1
+        status = ps3000a.ps3000aOpenUnit(
+            ctypes.byref(handle), ctypes.create_string_buffer(serial.encode())
+        )
+        with self._lock:
+            self._claimed[serial] = ("ps3000a", handle.value)
+        return status, handle
+
+    # ----- common ------------------------------------------------------------
+    def release(self, serial):
+        """Forget a claimed unit; call after the worker closed its handle."""
+        with self._lock:
+            self._claimed.pop(serial, None)
+
+    def reset(self):
+        """
+        Drop all cached state without closing anything, e.g. in a forked
+        child whose inherited handles belong to the parent.
+        """
+        self.__init__()
+
+    def close_unclaimed(self):
+        """Close PS2000 units that were opened while scanning but not used."""
+        with self._scan_lock["ps2000"]:
+            if not self._ps2000:
+                return
+            from picosdk.ps2000 import ps2000
+            for handle in self._ps2000.values():
+                ps2000.ps2000_close_unit(handle)
+            self._ps2000.clear()
+
+
+def _ps2000Serial(handle):
+    from picosdk.ps2000 import ps2000
+    buf = ctypes.create_string_buffer(64)
+    ps2000.ps2000_get_unit_info(
+        ctypes.c_int16(handle), buf,
+        ctypes.c_int16(len(buf)), ctypes.c_int16(4),
+    )
+    return buf.value.decode(errors="ignore")
+
+
+# The one registry of this process
+registry = PicoDeviceRegistry()
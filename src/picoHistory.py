@@ -0,0 +1,325 @@
+# picoHistory.py
+# Trend data loading for the history viewer (runners/run_history_viewer.py).
+#
+# loadRange() reads the daily CSV files of a date range on a thread pool
+# (the pandas C parser releases the GIL), parses only the timestamp and the
+# requested channel columns as float64, skips missing days and copies the
+# rows inside the time window into preallocated arrays.
+#
+# Parsed columns are kept in a per-day npz cache, one float64 array per
+# column, next to the size and mtime (ns) of the CSV they came from:
+#   <cache_path>/<run_name>_<YYMMDD>.csv.npz
+# A cache file is used only while size and mtime still match, so past days
+# are parsed once and today's file (still appended by the digitizer) is
+# parsed again on every load. Columns not cached yet are parsed alone and
+# added to the file. Cache files are written to a temporary name and
+# renamed, so an interrupted write leaves no broken entry behind.
+#
+# CsvTail follows the file the digitizer is appending to (follow mode): it
+# keeps a byte offset and parses only complete new lines, and moves on to
+# the next <YYMMDD> file once the digitizer has opened it. MinMaxPyramid
+# holds the min/max decimation levels for the history window.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+def _cacheName(cache_path, path):
+    return os.path.join(cache_path, os.path.basename(path) + ".npz")
+
+
+def _readCache(cache_file, stat):
+    """Columns of a cache file, or {} if missing, stale or unreadable."""
+    try:
+        with np.load(cache_file) as data:
+            if (int(data["_size"]) != stat.st_size
+                    or int(data["_mtime_ns"]) != stat.st_mtime_ns):
+                return {}
+            return {k: data[k] for k in data.files if not k.startswith("_")}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _writeCache(cache_file, stat, columns):
+    tmp = cache_file + ".tmp.npz"
+    try:
+        np.savez(tmp, _size=stat.st_size, _mtime_ns=stat.st_mtime_ns, **columns)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        print(f"[WARN] Could not write history cache {cache_file}: {e}")
+
+
+def loadDay(path, columns, cache_path=None):
+    """
+    The given columns of one daily CSV file as float64 arrays {column:
+    array}, from the cache where it is still valid. cache_path: cache
+    directory, None to always parse. Returns (columns, parsed) with parsed
+    True if the CSV file had to be read.
+    """
+    stat = os.stat(path)
+    cache_file = _cacheName(cache_path, path) if cache_path else None
+    cached = _readCache(cache_file, stat) if cache_file is not None else {}
+    missing = [c for c in columns if c not in cached]
+    if not missing:
+        return {c: cached[c] for c in columns}, False
+
+    try:
+        df = pd.read_csv(path, usecols=missing,
+                         dtype={c: np.float64 for c in missing})
+    except ValueError as e:
+        raise RuntimeError(f"{path}: missing required column ({e})") from e
+    cached.update((c, df[c].to_numpy()) for c in missing)
+    if cache_file is not None:
+        # stat taken before the read: a row appended meanwhile changes the
+        # mtime, so that cache entry is simply parsed again next time
+        _writeCache(cache_file, stat, cached)
+    return {c: cached[c] for c in columns}, True
+
+
+def dayFiles(data_path, run_name, start_time, end_time):
+    """Paths of the daily CSV files from start_time to end_time (by date)."""
+    paths = []
+    day = start_time
+    while day.date() <= end_time.date():
+        paths.append(os.path.join(data_path, f"{run_name}_{day.strftime('%y%m%d')}.csv"))
+        day += timedelta(days=1)
+    return paths
+
+
+def loadRange(data_path, run_name, channels, start_time, end_time,
+              cache_path=None, workers=None, stats=None):
+    """
+    {"timestamp": [s], <channel>: ...} of the daily CSV files of run_name,
+    rows with start_time < timestamp < end_time (local naive datetimes).
+    channels: one column name or a list. Days without a file are skipped;
+    stats (optional dict) receives "parsed", "cached" and "missing" (paths).
+    """
+    if isinstance(channels, str):
+        channels = [channels]
+    columns = ["timestamp"] + [c for c in channels if c != "timestamp"]
+    start_ts, end_ts = start_time.timestamp(), end_time.timestamp()
+    paths = dayFiles(data_path, run_name, start_time, end_time)
+    present = [p for p in paths if os.path.exists(p)]
+
+    workers = workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        days = list(pool.map(lambda p: loadDay(p, columns, cache_path), present))
+
+    if stats is not None:
+        stats["parsed"] = sum(parsed for _, parsed in days)
+        stats["cached"] = len(days) - stats["parsed"]
+        stats["missing"] = [p for p in paths if p not in present]
+
+    masks = [(data, (data["timestamp"] > start_ts) & (data["timestamp"] < end_ts))
+             for data, _ in days]
+    counts = [int(np.count_nonzero(mask)) for _, mask in masks]
+    out = {c: np.empty(sum(counts), dtype=np.float64) for c in columns}
+    row = 0
+    for (data, mask), n in zip(masks, counts):
+        for c in columns:
+            out[c][row:row + n] = data[c][mask]
+        row += n
+    return out
+
+
+class CsvTail:
+    """
+    Incremental reader of the daily CSV files of one run, from a given day
+    on. poll() returns the rows appended since the last call. The files
+    are opened read-only for each poll and never locked, so the digitizer
+    appending to them is not affected. A line without its newline (a row
+    being written) is left for the next poll.
+    """
+
+    def __init__(self, data_path, run_name, channels, day, after=None):
+        """
+        day: date (or datetime) of the first file to follow. after: skip
+        rows with timestamp <= after (the rows already loaded).
+        """
+        self.data_path = data_path
+        self.run_name  = run_name
+        self.columns   = ["timestamp"] + [c for c in channels if c != "timestamp"]
+        self.after     = after
+        self._open_day(datetime(day.year, day.month, day.day))
+
+    def _open_day(self, day):
+        self.day     = day
+        self.path    = os.path.join(self.data_path,
+                                    f"{self.run_name}_{day.strftime('%y%m%d')}.csv")
+        self._offset = 0
+        self._index  = None   # column positions, from the header line
+
+    def _read_new(self):
+        """Complete rows appended to the current file since the last read."""
+        try:
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < self._offset:            # replaced or truncated
+                    self._offset, self._index = 0, None
+                f.seek(self._offset)
+                chunk = f.read(size - self._offset)
+        except FileNotFoundError:
+            return []
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return []
+        self._offset += end
+        lines = chunk[:end].decode().splitlines()
+        if self._index is None:
+            header = lines.pop(0).split(",")
+            missing = [c for c in self.columns if c not in header]
+            if missing:
+                raise RuntimeError(f"{self.path}: missing required column {missing}")
+            self._index = [header.index(c) for c in self.columns]
+        rows = []
+        for line in lines:
+            fields = line.split(",")
+            rows.append([float(fields[i]) for i in self._index])
+        return rows
+
+    def poll(self, now=None):
+        """
+        {column: array} of the new rows (time order). At a date change the
+        current file is read to its end once the next day's file exists
+        (the digitizer closes a file before it opens the next one); days
+        without a file are passed over.
+        """
+        now = now or datetime.now()
+        today = datetime(now.year, now.month, now.day)
+        rows = []
+        while True:
+            nxt = self.day + timedelta(days=1)
+            switch = nxt <= today and (
+                os.path.exists(os.path.join(
+                    self.data_path, f"{self.run_name}_{nxt.strftime('%y%m%d')}.csv"))
+                or nxt < today
+            )
+            rows += self._read_new()
+            if not switch:
+                break
+            self._open_day(nxt)
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), len(self.columns))
+        if self.after is not None:
+            data = data[data[:, 0] > self.after]
+        return {c: data[:, i].copy() for i, c in enumerate(self.columns)}
+
+
+class MinMaxPyramid:
+    """
+    Min/max decimation levels of one trend series for interactive plotting.
+    Level k holds, for every bin of FACTOR**k consecutive rows, the row
+    index of its minimum and of its maximum. view() picks the finest level
+    with at most about one bin per pixel of the visible x-range and returns
+    those two points per bin in time order, so every spike stays visible at
+    any zoom while the curve never holds more than ~2 × width points.
+    """
+
+    FACTOR = 4
+
+    def __init__(self, t, v):
+        self.n   = 0
+        self._t  = np.empty(0)
+        self._v  = np.empty(0)
+        self._lo = []    # levels 1, 2, ...: bin min row indices (buffers)
+        self._hi = []    # ... and max row indices
+        self._bins = []  # bins in use per level
+        self.append(t, v)
+
+    @property
+    def t(self):
+        return self._t[:self.n]
+
+    @property
+    def v(self):
+        return self._v[:self.n]
+
+    @property
+    def levels(self):
+        """[(lo, hi)] per level; level 0 is every row."""
+        idx = np.arange(self.n)
+        return [(idx, idx)] + [(lo[:m], hi[:m]) for lo, hi, m
+                               in zip(self._lo, self._hi, self._bins)]
+
+    @staticmethod
+    def _reserve(buf, used, size):
+        """buf with room for size entries; capacity doubles, so growth is
+        amortised O(1) per entry."""
+        if size <= len(buf):
+            return buf
+        new = np.empty(max(size, 2 * len(buf)), dtype=buf.dtype)
+        new[:used] = buf[:used]
+        return new
+
+    def append(self, t, v):
+        """
+        Add rows at the end (follow mode). Rows go into buffers with spare
+        capacity, and on every level only the bins from the one holding the
+        first new row on are recomputed: O(new rows + levels × FACTOR).
+        """
+        t = np.asarray(t, dtype=np.float64)
+        first, n = self.n, self.n + len(t)
+        self._t = self._reserve(self._t, first, n)
+        self._v = self._reserve(self._v, first, n)
+        self._t[first:n] = t
+        self._v[first:n] = v
+        self.n = n
+
+        # first: first changed entry of the level below, size: its length
+        size, k = n, 0
+        while size > 1:
+            if k == len(self._lo):
+                self._lo.append(np.empty(0, dtype=np.int64))
+                self._hi.append(np.empty(0, dtype=np.int64))
+                self._bins.append(0)
+                first = 0                     # new level: every bin
+            b = first // self.FACTOR
+            bins = -(-size // self.FACTOR)
+            lo, hi = self._reduce(k, b * self.FACTOR, size)
+            self._lo[k] = self._reserve(self._lo[k], b, bins)
+            self._hi[k] = self._reserve(self._hi[k], b, bins)
+            self._lo[k][b:bins] = lo
+            self._hi[k][b:bins] = hi
+            self._bins[k] = bins
+            first, size = b, bins
+            k += 1
+
+    def _reduce(self, k, start, stop):
+        """Bins of level k + 1 from entries [start, stop) of level k."""
+        if k == 0:
+            lo = hi = np.arange(start, stop)
+        else:
+            lo, hi = self._lo[k - 1][start:stop], self._hi[k - 1][start:stop]
+        bins = -(-len(lo) // self.FACTOR)
+        pad = bins * self.FACTOR - len(lo)
+        # Padding repeats the last bin, which cannot change its min/max
+        lo = np.concatenate([lo, np.repeat(lo[-1:], pad)]).reshape(bins, self.FACTOR)
+        hi = np.concatenate([hi, np.repeat(hi[-1:], pad)]).reshape(bins, self.FACTOR)
+        rows = np.arange(bins)
+        return (lo[rows, np.argmin(self._v[lo], axis=1)],
+                hi[rows, np.argmax(self._v[hi], axis=1)])
+
+    def view(self, x0, x1, width):
+        """
+        (t, v, level) to draw for the x-range [x0, x1] on width pixels; one
+        row beyond either end is included so the curve reaches the edges.
+        """
+        t, v, n = self.t, self.v, self.n
+        i0 = max(int(np.searchsorted(t, x0, side="left")) - 1, 0)
+        i1 = min(int(np.searchsorted(t, x1, side="right")) + 1, n)
+        if i1 <= i0:
+            return t[:0], v[:0], 0
+        width = max(int(width), 1)
+        level = 0
+        while level < len(self._lo) and (i1 - i0) / self.FACTOR ** level > width:
+            level += 1
+        if level == 0:
+            return t[i0:i1], v[i0:i1], 0
+        size = self.FACTOR ** level
+        b0, b1 = i0 // size, (i1 - 1) // size + 1
+        lo, hi = self._lo[level - 1][b0:b1], self._hi[level - 1][b0:b1]
+        idx = np.stack([np.minimum(lo, hi), np.maximum(lo, hi)], axis=1).ravel()
+        return t[idx], v[idx], level
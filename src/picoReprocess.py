@@ -0,0 +1,281 @@
+# picoReprocess.py
+# Offline reprocessing of rawWave ROOT archives (runners/run_reprocess.py).
+#
+# Each ROOT file is read in chunks with uproot.iterate on a worker process
+# of a ProcessPoolExecutor. Per trigger and channel the features are
+# computed for a whole chunk at once (numpy, no per-event loop):
+#   baseline      mean over baseline_window_ns                [mV]
+#   baseline_rms  RMS about that mean                          [mV]
+#   area          sum over area_window_ns minus the baseline,
+#                 times delta_t                                [nV·s]
+#   peak_min      lowest sample in area_window_ns - baseline   [mV]
+#   peak_max      highest sample in area_window_ns - baseline  [mV]
+# Raw (int16) files are processed in ADC counts and scaled once per chunk:
+# the H2Meta offset cancels against the baseline, so the counts are never
+# converted to mV arrays. Codec files are decoded chunk-wise.
+#
+# Files written before the Timestamp branch get it from their local-time
+# Year ... ms branches (ms resolution); files with neither have no
+# Timestamp column in their features file.
+#
+# Output, in output_path:
+#   <file>.features.npz   Timestamp + <Ch>_<feature> columns per input file
+#   summary.csv           one row per input file: time range, entries and
+#                         mean/std of every feature, rebuilt from the npz
+#                         files at the end of every run
+#   reprocess.json        the settings the features were computed with
+# A features file is written to a temporary name and renamed when complete,
+# so an interrupted run resumes with the files that are still missing; a
+# rerun with other settings into the same output_path is refused.
+
+import csv
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import uproot
+
+from . import picoDAQReader, picoWaveCodec
+
+FEATURES = ("baseline", "baseline_rms", "area", "peak_min", "peak_max")
+
+
+def findFiles(root_path, output_name, start_date=None, end_date=None):
+    """
+    <output_name>_<YYMMDD>_<NNNN>.root files in root_path, in order,
+    optionally limited to dates "YYYY-MM-DD" .. "YYYY-MM-DD" (inclusive).
+    """
+    pattern = re.compile(rf"{re.escape(output_name)}_(\d{{6}})_(\d+)\.root$")
+    lo = datetime.strptime(start_date, "%Y-%m-%d").strftime("%y%m%d") if start_date else None
+    hi = datetime.strptime(end_date, "%Y-%m-%d").strftime("%y%m%d") if end_date else None
+    found = []
+    for path in glob.glob(os.path.join(root_path, f"{output_name}_*.root")):
+        m = pattern.search(path)
+        if m is None:
+            continue
+        date = m.group(1)
+        if (lo and date < lo) or (hi and date > hi):
+            continue
+        found.append((date, int(m.group(2)), path))
+    return [path for date, seq, path in sorted(found)]
+
+
+def windowSlice(time_axis, window_ns):
+    """Sample slice of a time axis covering [window_ns[0], window_ns[1])."""
+    lo, hi = np.searchsorted(time_axis, window_ns, side="left")
+    if hi <= lo:
+        raise ValueError(f"Window {list(window_ns)} ns holds no samples of the "
+                         f"time axis [{time_axis[0]}, {time_axis[-1]}] ns")
+    return slice(int(lo), int(hi))
+
+
+def extractFeatures(wave, scale, delta_t, area_win, base_win):
+    """
+    Features of one channel for a chunk of waveforms (n, samples), given in
+    ADC counts (scale = mV per count) or mV (scale = 1). area_win, base_win:
+    sample slices (windowSlice). Returns {feature: float64 (n,)}.
+    """
+    base = wave[:, base_win].astype(np.float64)
+    baseline = base.mean(axis=1)
+    base -= baseline[:, None]
+    rms = np.sqrt(np.mean(base * base, axis=1))
+
+    area_part = wave[:, area_win]
+    n_area = area_part.shape[1]
+    area = (np.sum(area_part, axis=1, dtype=np.float64) - n_area * baseline)
+    return {
+        "baseline":     baseline * scale,           # offset added by caller
+        "baseline_rms": rms * scale,
+        "area":         area * (scale * delta_t * 1e-3),   # mV·ns → nV·s
+        "peak_min":     (area_part.min(axis=1) - baseline) * scale,
+        "peak_max":     (area_part.max(axis=1) - baseline) * scale,
+    }
+
+
+def reprocessFile(path, out_path, settings, step_size="100 MB"):
+    """
+    Compute the features of one ROOT file and write out_path (npz). Runs
+    on a worker process. Returns (path, entries, input bytes).
+    """
+    with uproot.open(path) as f:
+        meta = picoDAQReader._readMeta(f)
+        tree = f[picoDAQReader.TREE_NAME]
+        if tree.num_entries:
+            axis = picoDAQReader._readTimeAxis(f)
+        keys = tree.keys()
+        channels = settings.get("channels") or [
+            k for k in keys if k.startswith("Ch")
+        ]
+        entries = tree.num_entries
+    if "Timestamp" in keys:
+        time_branches = ["Timestamp"]
+    elif all(k in keys for k in picoDAQReader.CALENDAR_BRANCHES):
+        time_branches = list(picoDAQReader.CALENDAR_BRANCHES)
+    else:
+        time_branches = []
+
+    columns = {}
+    if time_branches:
+        columns["Timestamp"] = np.empty(entries, dtype=np.int64)
+    for ch in channels:
+        for feat in FEATURES:
+            columns[f"{ch}_{feat}"] = np.empty(entries, dtype=np.float64)
+
+    if entries:
+        delta_t = float(axis[1] - axis[0]) if len(axis) > 1 else 0.0
+        area_win = windowSlice(axis, settings["area_window_ns"])
+        base_win = windowSlice(axis, settings["baseline_window_ns"])
+        row = 0
+        for chunk in uproot.iterate({path: picoDAQReader.TREE_NAME},
+                                    time_branches + list(channels),
+                                    step_size=step_size, library="np"):
+            n = len(next(iter(chunk.values())))
+            if time_branches == ["Timestamp"]:
+                columns["Timestamp"][row:row + n] = chunk["Timestamp"]
+            elif time_branches:
+                columns["Timestamp"][row:row + n] = picoDAQReader.calendarTimestamp(chunk)
+            for ch in channels:
+                wave, scale, offset = chunk[ch], 1.0, 0.0
+                if wave.dtype == object:
+                    raise ValueError(f"{path}: variable-length waveforms are not supported")
+                if meta is not None:
+                    if "codec" in meta:
+                        wave = picoWaveCodec.decode(wave, meta["samples"], meta["codec"])
+                    scale = meta["channels"][ch]["range_mV"] / meta["maxADC"]
+                    offset = meta["channels"][ch]["offset"]
+                feats = extractFeatures(wave, scale, delta_t, area_win, base_win)
+                feats["baseline"] -= offset
+                for feat in FEATURES:
+                    columns[f"{ch}_{feat}"][row:row + n] = feats[feat]
+            row += n
+
+    # Complete files only: resume skips what exists under the final name
+    tmp = out_path + ".tmp.npz"
+    np.savez(tmp, **columns)
+    os.replace(tmp, out_path)
+    return path, entries, os.path.getsize(path)
+
+
+def _featuresName(output_path, path):
+    return os.path.join(output_path, os.path.basename(path)[:-5] + ".features.npz")
+
+
+def _checkSettings(output_path, settings):
+    """Store settings in reprocess.json, or refuse to mix with other ones."""
+    meta_path = os.path.join(output_path, "reprocess.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            stored = json.load(f)
+        if stored != settings:
+            raise ValueError(
+                f"{output_path} holds features computed with {stored}; "
+                f"use another output_path for {settings}"
+            )
+        return
+    with open(meta_path, "w") as f:
+        json.dump(settings, f, indent=1)
+
+
+def writeSummary(output_path, files):
+    """One row per input file with entries, time range and feature mean/std."""
+    rows = []
+    for path in files:
+        feat_path = _featuresName(output_path, path)
+        if not os.path.exists(feat_path):
+            continue
+        with np.load(feat_path) as data:
+            # No Timestamp column for files without any trigger time
+            ts = data["Timestamp"] if "Timestamp" in data.files else None
+            entries = len(data[data.files[0]]) if data.files else 0
+            row = {
+                "file": os.path.basename(path),
+                "entries": entries,
+                "first_timestamp": int(ts[0]) if ts is not None and len(ts) else "",
+                "last_timestamp": int(ts[-1]) if ts is not None and len(ts) else "",
+            }
+            for name in data.files:
+                if name == "Timestamp":
+                    continue
+                col = data[name]
+                row[f"{name}_mean"] = float(col.mean()) if len(col) else ""
+                row[f"{name}_std"] = float(col.std()) if len(col) else ""
+        rows.append(row)
+    summary_path = os.path.join(output_path, "summary.csv")
+    fields = list(dict.fromkeys(k for row in rows for k in row))
+    with open(summary_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    return summary_path
+
+
+def reprocess(config, progress=print):
+    """
+    Reprocess the files selected by config (see config/config_reprocess.py)
+    on a process pool. Files whose features already exist are skipped.
+    Returns a dict with files, processed, skipped, failed, entries, seconds.
+    """
+    settings = {
+        "area_window_ns":     list(config["area_window_ns"]),
+        "baseline_window_ns": list(config["baseline_window_ns"]),
+        "channels":           config.get("channels"),
+    }
+    output_path = config["output_path"]
+    os.makedirs(output_path, exist_ok=True)
+    _checkSettings(output_path, settings)
+
+    files = findFiles(config["root_path"], config["output_name"],
+                      config.get("start_date"), config.get("end_date"))
+    todo = [p for p in files if not os.path.exists(_featuresName(output_path, p))]
+    workers = int(config.get("workers", 0)) or os.cpu_count() or 1
+    step_size = config.get("step_size", "100 MB")
+    progress(f"[REPRO] {len(files)} files of '{config['output_name']}', "
+             f"{len(files) - len(todo)} already done, {len(todo)} to process "
+             f"on {workers} workers")
+
+    stats = {"files": len(files), "processed": 0, "skipped": len(files) - len(todo),
+             "failed": [], "entries": 0, "bytes": 0}
+    t0 = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            pool.submit(reprocessFile, p, _featuresName(output_path, p),
+                        settings, step_size): p
+            for p in todo
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                _, entries, nbytes = future.result()
+            except Exception as e:
+                stats["failed"].append(path)
+                progress(f"[WARN] {os.path.basename(path)} failed: {e}")
+                continue
+            stats["processed"] += 1
+            stats["entries"] += entries
+            stats["bytes"] += nbytes
+            elapsed = time.perf_counter() - t0
+            done = stats["processed"] + len(stats["failed"])
+            eta = elapsed / done * (len(todo) - done)
+            progress(f"[REPRO] {done}/{len(todo)} files, "
+                     f"{stats['entries']} triggers, "
+                     f"{stats['bytes'] / 2**20 / elapsed:.1f} MB/s, "
+                     f"ETA {eta:.0f} s")
+    except KeyboardInterrupt:
+        progress("[REPRO] Interrupted; finished files are kept, rerun to resume")
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown(wait=True)
+    stats["seconds"] = time.perf_counter() - t0
+
+    summary = writeSummary(output_path, files)
+    progress(f"[REPRO] {stats['processed']} files processed in "
+             f"{stats['seconds']:.1f} s, {len(stats['failed'])} failed; "
+             f"summary in {summary}")
+    return stats
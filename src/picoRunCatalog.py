@@ -0,0 +1,179 @@
+# picoRunCatalog.py
+# SQLite catalog of the ROOT, binary and CSV files written by the DAQ.
+#
+# One row per file (path, device = output_name, channels, sample number,
+# first/last trigger Timestamp, entries, bytes) plus one row per written
+# chunk of waveform files (entry range and its Timestamp range). The writer
+# threads add a file when it is closed (RootRotator), the digitizer updates
+# its daily CSV file at every rotation. Several digitizers, threads or
+# processes may share one catalog: every call opens its own connection, the
+# database runs in WAL mode and writers wait for each other (timeout).
+#
+# query(start_ns, stop_ns) returns the files and entry ranges covering a
+# time window through the first_ns indexes. Files never span two dates and
+# chunks lie inside their file, so candidates are searched only from
+# start_ns - MAX_SPAN_NS on and the lookup stays O(log n) in the catalog
+# size. Entry ranges have chunk granularity (at most one chunk of extra
+# entries at either end).
+
+import json
+import os
+import sqlite3
+from collections import namedtuple
+
+# Longest time one file can cover (one date, plus a DST shift)
+MAX_SPAN_NS = 2 * 86400 * 10**9
+
+# One file's part of a query: entries [entry_start, entry_stop)
+CatalogHit = namedtuple(
+    "CatalogHit", ["path", "device", "kind", "entry_start", "entry_stop",
+                   "first_ns", "last_ns"]
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id        INTEGER PRIMARY KEY,
+    path      TEXT UNIQUE NOT NULL,
+    kind      TEXT NOT NULL,          -- "root", "binary" or "csv"
+    device    TEXT NOT NULL,          -- output_name of the digitizer
+    channels  TEXT NOT NULL,          -- JSON list
+    samples   INTEGER,
+    first_ns  INTEGER,
+    last_ns   INTEGER,
+    entries   INTEGER NOT NULL,
+    bytes     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_time ON files (kind, first_ns);
+CREATE INDEX IF NOT EXISTS files_device_time ON files (device, kind, first_ns);
+CREATE TABLE IF NOT EXISTS chunks (
+    file_id     INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    entry_start INTEGER NOT NULL,
+    entry_stop  INTEGER NOT NULL,
+    first_ns    INTEGER NOT NULL,
+    last_ns     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_time ON chunks (file_id, last_ns);
+"""
+
+
+class RunCatalog:
+    def __init__(self, path, timeout=30.0):
+        self.path    = path
+        self.timeout = timeout
+        db = self._connect()
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=self.timeout)
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA foreign_keys=ON")
+        return db
+
+    def add_file(self, kind, device, entry):
+        """
+        Insert or replace one file. entry: dict with path, channels,
+        samples, entries, first_ns, last_ns and optionally chunks, a list
+        of (entry_start, entry_stop, first_ns, last_ns), as returned by
+        RootManager/BinaryWaveSink.catalog_entry(). The byte size is taken
+        from the file unless entry has "bytes".
+        """
+        path = os.path.abspath(entry["path"])
+        db = self._connect()
+        try:
+            with db:
+                db.execute("DELETE FROM files WHERE path = ?", (path,))
+                cur = db.execute(
+                    "INSERT INTO files (path, kind, device, channels, samples,"
+                    " first_ns, last_ns, entries, bytes)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, kind, device, json.dumps(list(entry["channels"])),
+                     entry.get("samples"), entry["first_ns"], entry["last_ns"],
+                     entry["entries"], entry.get("bytes") or os.path.getsize(entry["path"])),
+                )
+                db.executemany(
+                    "INSERT INTO chunks VALUES (?, ?, ?, ?, ?)",
+                    [(cur.lastrowid,) + tuple(c) for c in entry.get("chunks", ())],
+                )
+        finally:
+            db.close()
+
+    def update_csv(self, device, path, channels, first_ns, last_ns, rows):
+        """
+        Widen the row of a daily CSV file by rows written since the last
+        update (the file may be appended to by several runs a day).
+        """
+        path_abs = os.path.abspath(path)
+        db = self._connect()
+        try:
+            with db:
+                db.execute(
+                    "INSERT INTO files (path, kind, device, channels, samples,"
+                    " first_ns, last_ns, entries, bytes)"
+                    " VALUES (?, 'csv', ?, ?, NULL, ?, ?, ?, ?)"
+                    " ON CONFLICT (path) DO UPDATE SET"
+                    " first_ns = min(coalesce(first_ns, excluded.first_ns), excluded.first_ns),"
+                    " last_ns  = max(coalesce(last_ns, excluded.last_ns), excluded.last_ns),"
+                    " entries  = entries + excluded.entries,"
+                    " bytes    = excluded.bytes",
+                    (path_abs, device, json.dumps(list(channels)), first_ns,
+                     last_ns, rows, os.path.getsize(path)),
+                )
+        finally:
+            db.close()
+
+    def query(self, start_ns, stop_ns, device=None, kind="root"):
+        """
+        Files of one kind with triggers in [start_ns, stop_ns], in time
+        order, each with the entry range covering the window. A file whose
+        chunks all miss the window (it falls in a trigger gap) is left out;
+        files without chunk rows (CSV) are returned whole.
+        """
+        sql = ("SELECT id, path, device, first_ns, last_ns, entries FROM files"
+               " WHERE kind = ? AND first_ns BETWEEN ? AND ? AND last_ns >= ?")
+        args = [kind, start_ns - MAX_SPAN_NS, stop_ns, start_ns]
+        if device is not None:
+            sql += " AND device = ?"
+            args.append(device)
+        sql += " ORDER BY first_ns"
+        db = self._connect()
+        try:
+            hits = []
+            for file_id, path, dev, first_ns, last_ns, entries in db.execute(sql, args).fetchall():
+                span = db.execute(
+                    "SELECT min(entry_start), max(entry_stop), min(first_ns),"
+                    " max(last_ns) FROM chunks"
+                    " WHERE file_id = ? AND last_ns >= ? AND first_ns <= ?",
+                    (file_id, start_ns, stop_ns),
+                ).fetchone()
+                if span[0] is None:
+                    if db.execute("SELECT 1 FROM chunks WHERE file_id = ? LIMIT 1",
+                                  (file_id,)).fetchone() is not None:
+                        continue
+                    span = (0, entries, first_ns, last_ns)
+                hits.append(CatalogHit(path, dev, kind, *span))
+            return hits
+        finally:
+            db.close()
+
+    def files(self, device=None, kind=None):
+        """All file rows (dicts), in time order."""
+        sql, args = "SELECT * FROM files WHERE 1", []
+        if device is not None:
+            sql += " AND device = ?"
+            args.append(device)
+        if kind is not None:
+            sql += " AND kind = ?"
+            args.append(kind)
+        db = self._connect()
+        try:
+            db.row_factory = sqlite3.Row
+            rows = [dict(r) for r in db.execute(sql + " ORDER BY first_ns", args)]
+        finally:
+            db.close()
+        for row in rows:
+            row["channels"] = json.loads(row["channels"])
+        return rows
@@ -0,0 +1,361 @@
+# picoTrendStore.py
+# Columnar binary trend files, written next to (or instead of) the daily CSV.
+#
+# One file per digitizer and day, <output_name>_<YYMMDD>.h2trend:
+#   header    b"H2TR", uint32 version, uint32 n, n bytes of JSON
+#             {"columns": ["timestamp", <channel names>...], "dtype": "<f8"}
+#   segments  appended as rows are flushed, each
+#               b"H2SG", uint32 rows, float64 first / last timestamp,
+#               then every column as rows float64 values (column-major)
+#   footer    written at close: one (offset, rows, t_first, t_last) record
+#             per segment, then uint64 footer offset, uint32 segment count,
+#             b"H2IX"
+# Segments are only ever appended, so a reader can open the file while the
+# digitizer writes it; without a footer (file still open, or a crash) the
+# segment headers are walked instead. Reopening a file of the same day
+# drops the footer (or a torn last segment) and continues appending.
+#
+# readTrend()/readTrendRange() return numpy columns straight from the
+# bytes (no text parsing) and skip segments outside the time range by
+# their headers.
+#
+# TrendRollup keeps 1 min / 10 min / 1 h rollups (mean, min, max, std,
+# count per channel) of the trend rows in files of the same format,
+# <output_name>_<label>_<YYMMDD>.h2trend; readRollup() loads them and
+# pickRollup() chooses the resolution for a time span.
+#
+# trendToCsv() converts any trend file back to the CSV layout:
+#   python3 -m src.picoTrendStore data/trend/det10a2_251218.h2trend [out.csv]
+
+import csv
+import json
+import os
+import struct
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+MAGIC    = b"H2TR"
+VERSION  = 1
+_HEAD    = struct.Struct("<4sII")       # magic, version, JSON length
+_SEGMENT = struct.Struct("<4sIdd")      # b"H2SG", rows, t_first, t_last
+_TRAILER = struct.Struct("<QI4s")       # footer offset, segments, b"H2IX"
+_INDEX   = np.dtype([("offset", "<u8"), ("rows", "<u4"),
+                     ("t_first", "<f8"), ("t_last", "<f8")])
+
+
+class TrendWriter:
+    """
+    Buffered writer of one trend file. append() stores a row in a
+    preallocated buffer; a segment is written when flush_rows rows are
+    buffered or flush_s seconds have passed, and os.fsync() runs at most
+    every fsync_s seconds (and at close).
+    """
+
+    def __init__(self, path, columns, flush_rows=256, flush_s=30.0, fsync_s=60.0):
+        """columns: value column names; the timestamp column is added first."""
+        self.path       = path
+        self.columns    = ["timestamp"] + list(columns)
+        self.flush_rows = flush_rows
+        self.flush_s    = flush_s
+        self.fsync_s    = fsync_s
+        self._buffer    = np.empty((len(self.columns), flush_rows), dtype="<f8")
+        self._n         = 0
+        self._index     = []
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._f = open(path, "r+b")
+            self._reopen()
+        else:
+            self._f = open(path, "w+b")
+            head = json.dumps({"columns": self.columns, "dtype": "<f8"}).encode()
+            self._f.write(_HEAD.pack(MAGIC, VERSION, len(head)) + head)
+        self._last_flush = time.monotonic()
+        self._last_fsync = self._last_flush
+
+    def _reopen(self):
+        """Continue an existing file of the same day after its last segment."""
+        columns, data_start = _readHeader(self._f)
+        if columns != self.columns:
+            raise ValueError(f"{self.path} has columns {columns}, not {self.columns}")
+        self._index = _scanSegments(self._f, data_start, len(columns))
+        end = data_start
+        if self._index:
+            last = self._index[-1]
+            end = last[0] + _SEGMENT.size + last[1] * 8 * len(columns)
+        # Drops the footer, or a segment torn by a crash
+        self._f.truncate(end)
+        self._f.seek(end)
+
+    def append(self, timestamp, values):
+        """Add one row: timestamp [s since the epoch] and one value per column."""
+        self._buffer[0, self._n] = timestamp
+        self._buffer[1:, self._n] = values
+        self._n += 1
+        if (self._n >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_s):
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as one segment."""
+        n = self._n
+        self._last_flush = time.monotonic()
+        if n == 0:
+            return
+        offset = self._f.tell()
+        t_first, t_last = float(self._buffer[0, 0]), float(self._buffer[0, n - 1])
+        self._f.write(_SEGMENT.pack(b"H2SG", n, t_first, t_last))
+        self._f.write(np.ascontiguousarray(self._buffer[:, :n]).tobytes())
+        self._f.flush()
+        self._index.append((offset, n, t_first, t_last))
+        self._n = 0
+        if self._last_flush - self._last_fsync >= self.fsync_s:
+            os.fsync(self._f.fileno())
+            self._last_fsync = self._last_flush
+
+    def close(self):
+        """Flush, write the footer index and fsync."""
+        self.flush()
+        footer = self._f.tell()
+        self._f.write(np.array(self._index, dtype=_INDEX).tobytes())
+        self._f.write(_TRAILER.pack(footer, len(self._index), b"H2IX"))
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+
+
+def _readHeader(f):
+    f.seek(0)
+    magic, version, n = _HEAD.unpack(f.read(_HEAD.size))
+    if magic != MAGIC:
+        raise ValueError(f"{f.name} is not a trend file")
+    meta = json.loads(f.read(n))
+    return meta["columns"], _HEAD.size + n
+
+
+def _scanSegments(f, data_start, n_cols):
+    """(offset, rows, t_first, t_last) of every complete segment."""
+    size = os.fstat(f.fileno()).st_size
+    # Footer present: take the index from it
+    if size >= data_start + _TRAILER.size:
+        f.seek(size - _TRAILER.size)
+        footer, count, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+        if magic == b"H2IX" and footer + count * _INDEX.itemsize + _TRAILER.size == size:
+            f.seek(footer)
+            index = np.frombuffer(f.read(count * _INDEX.itemsize), dtype=_INDEX)
+            return [tuple(row) for row in index.tolist()]
+    # No footer: walk the segment headers
+    index, offset = [], data_start
+    while offset + _SEGMENT.size <= size:
+        f.seek(offset)
+        magic, rows, t_first, t_last = _SEGMENT.unpack(f.read(_SEGMENT.size))
+        end = offset + _SEGMENT.size + rows * 8 * n_cols
+        if magic != b"H2SG" or end > size:
+            break
+        index.append((offset, rows, t_first, t_last))
+        offset = end
+    return index
+
+
+def readTrend(path, columns=None, start=None, end=None):
+    """
+    Columns of one trend file as float64 arrays, {"timestamp": ..., name:
+    ...}. start/end: optional time range [s since the epoch]; segments
+    outside it are not read.
+    """
+    with open(path, "rb") as f:
+        names, data_start = _readHeader(f)
+        index = _scanSegments(f, data_start, len(names))
+        columns = ["timestamp"] + [c for c in (columns or names[1:]) if c != "timestamp"]
+        missing = set(columns) - set(names)
+        if missing:
+            raise KeyError(f"{path} has no column(s) {sorted(missing)}")
+        index = [s for s in index
+                 if (start is None or s[3] >= start) and (end is None or s[2] <= end)]
+        total = sum(s[1] for s in index)
+        out = {c: np.empty(total, dtype=np.float64) for c in columns}
+        row = 0
+        for offset, rows, t_first, t_last in index:
+            for c in columns:
+                f.seek(offset + _SEGMENT.size + names.index(c) * rows * 8)
+                f.readinto(memoryview(out[c][row:row + rows]).cast("B"))
+            row += rows
+    if start is not None or end is not None:
+        ts = out["timestamp"]
+        keep = np.ones(len(ts), dtype=bool)
+        if start is not None:
+            keep &= ts >= start
+        if end is not None:
+            keep &= ts <= end
+        out = {c: v[keep] for c, v in out.items()}
+    return out
+
+
+def readTrendRange(trend_dir, output_name, start, end, columns=None):
+    """
+    Concatenated columns of all daily trend files between two datetimes
+    (local naive, as in the history config). Missing days are skipped.
+    """
+    parts = []
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day.date() <= end.date():
+        path = os.path.join(trend_dir, f"{output_name}_{day.strftime('%y%m%d')}.h2trend")
+        if os.path.exists(path):
+            parts.append(readTrend(path, columns, start.timestamp(), end.timestamp()))
+        day += timedelta(days=1)
+    if not parts:
+        return {c: np.empty(0) for c in ["timestamp"] + list(columns or [])}
+    return {c: np.concatenate([p[c] for p in parts]) for c in parts[0]}
+
+
+def trendToCsv(path, csv_path=None):
+    """Write a trend file in the daily CSV layout; returns the CSV path."""
+    csv_path = csv_path or os.path.splitext(path)[0] + ".csv"
+    data = readTrend(path)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(data))
+        writer.writerows(zip(*(col.tolist() for col in data.values())))
+    return csv_path
+
+
+# Rollup series: label → window length [s]
+ROLLUP_RESOLUTIONS = {"1m": 60, "10m": 600, "1h": 3600}
+ROLLUP_STATS       = ("mean", "min", "max", "std", "count")
+
+
+class TrendRollup:
+    """
+    Incremental rollups of the trend rows: per resolution and channel the
+    mean, min, max, std and count of the rows in each window (aligned to
+    multiples of the window length since the epoch). A window is appended
+    when the first row of the next one arrives, and at close (then with
+    the rows seen so far). Each resolution goes to its own daily trend
+    file <output_name>_<label>_<YYMMDD>.h2trend (date of the window start)
+    with the window start as timestamp and columns <channel>_<stat>.
+    """
+
+    def __init__(self, trend_dir, output_name, channels,
+                 resolutions=ROLLUP_RESOLUTIONS):
+        self.trend_dir   = trend_dir
+        self.output_name = output_name
+        self.channels    = list(channels)
+        self.resolutions = dict(resolutions)
+        self.columns     = [f"{ch}_{stat}" for ch in self.channels
+                            for stat in ROLLUP_STATS]
+        n = len(self.channels)
+        # Per resolution: window start and shifted sums (shift = first row,
+        # keeps the variance exact for values far from zero)
+        self._win = {label: {"start": None, "count": 0,
+                             "shift": np.zeros(n), "s1": np.zeros(n),
+                             "s2": np.zeros(n), "min": np.zeros(n),
+                             "max": np.zeros(n)}
+                     for label in self.resolutions}
+        self._writers = {}   # label → (date, TrendWriter)
+
+    def add(self, timestamp, values):
+        """Add one trend row: timestamp [s since the epoch], one value per channel."""
+        v = np.asarray(values, dtype=np.float64)
+        for label, length in self.resolutions.items():
+            win = self._win[label]
+            start = float(np.floor(timestamp / length) * length)
+            if win["start"] != start:
+                if win["count"]:
+                    self._emit(label)
+                win["start"], win["count"] = start, 0
+                win["shift"][:] = v
+                win["s1"].fill(0)
+                win["s2"].fill(0)
+                win["min"][:] = v
+                win["max"][:] = v
+            d = v - win["shift"]
+            win["s1"] += d
+            win["s2"] += d * d
+            np.minimum(win["min"], v, out=win["min"])
+            np.maximum(win["max"], v, out=win["max"])
+            win["count"] += 1
+
+    def _emit(self, label):
+        win = self._win[label]
+        n = win["count"]
+        mean = win["s1"] / n
+        std = np.sqrt(np.maximum(win["s2"] / n - mean * mean, 0.0))
+        row = np.stack([mean + win["shift"], win["min"], win["max"], std,
+                        np.full(len(self.channels), float(n))], axis=1).ravel()
+        date = datetime.fromtimestamp(win["start"]).strftime("%y%m%d")
+        current = self._writers.get(label)
+        if current is None or current[0] != date:
+            if current is not None:
+                current[1].close()
+            path = os.path.join(self.trend_dir,
+                                f"{self.output_name}_{label}_{date}.h2trend")
+            current = (date, TrendWriter(path, self.columns, flush_rows=64))
+            self._writers[label] = current
+        current[1].append(win["start"], row)
+
+    def close(self):
+        """Append the open (partial) windows and close the files."""
+        for label, win in self._win.items():
+            if win["count"]:
+                self._emit(label)
+                win["count"] = 0
+        for _, writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+
+def readRollup(trend_dir, output_name, label, start, end, channels=None):
+    """
+    Rollup rows of one resolution between two datetimes: {"timestamp":
+    window start, <channel>_<stat>: ...}. Windows written twice (a partial
+    window at a stop and the rest after a restart) are merged.
+    """
+    columns = None
+    if channels is not None:
+        columns = [f"{ch}_{stat}" for ch in channels for stat in ROLLUP_STATS]
+    # The window holding start begins before it
+    start = start - timedelta(seconds=ROLLUP_RESOLUTIONS.get(label, 0))
+    data = readTrendRange(trend_dir, f"{output_name}_{label}", start, end, columns)
+    ts = data["timestamp"]
+    if len(ts) < 2 or np.all(np.diff(ts) > 0):
+        return data
+    starts, inverse = np.unique(ts, return_inverse=True)
+    out = {"timestamp": starts}
+    for ch in {k.rsplit("_", 1)[0] for k in data if k != "timestamp"}:
+        n, mean = data[f"{ch}_count"], data[f"{ch}_mean"]
+        var = data[f"{ch}_std"] ** 2
+        count = np.bincount(inverse, n, len(starts))
+        m = np.bincount(inverse, n * mean, len(starts)) / count
+        # Pooled variance about the merged mean
+        dm = mean - m[inverse]
+        pooled = np.bincount(inverse, n * (var + dm * dm), len(starts)) / count
+        lo = np.full(len(starts), np.inf)
+        hi = np.full(len(starts), -np.inf)
+        np.minimum.at(lo, inverse, data[f"{ch}_min"])
+        np.maximum.at(hi, inverse, data[f"{ch}_max"])
+        out.update({f"{ch}_mean": m, f"{ch}_min": lo, f"{ch}_max": hi,
+                    f"{ch}_std": np.sqrt(pooled),
+                    f"{ch}_count": count})
+    return {k: out[k] for k in data}
+
+
+def pickRollup(span_s, max_points=20000, row_s=4.0):
+    """
+    Resolution to load for a time span: None (the trend rows themselves,
+    one per row_s seconds) if they fit in max_points, otherwise the finest
+    rollup label with at most max_points windows (the coarsest if none).
+    """
+    if span_s / row_s <= max_points:
+        return None
+    for label, length in sorted(ROLLUP_RESOLUTIONS.items(), key=lambda kv: kv[1]):
+        if span_s / length <= max_points:
+            return label
+    return max(ROLLUP_RESOLUTIONS, key=ROLLUP_RESOLUTIONS.get)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("usage: python3 -m src.picoTrendStore <file.h2trend> [out.csv]")
+        sys.exit(2)
+    print(f"[I/O] Wrote {trendToCsv(*sys.argv[1:])}")
@@ -0,0 +1,109 @@
+# picoWaveCodec.py
+# Pre-filter codec for int16 ADC waveforms in ROOT files.
+#
+# Photodiode waveforms are mostly flat baseline with a short pulse, so
+# consecutive samples differ by a few counts. Each waveform row is
+#   1. delta-encoded along the samples (first sample kept as is; int16
+#      arithmetic wraps, so every input round-trips exactly),
+#   2. zigzag-mapped to uint16 so small negative steps also have zero
+#      high bits,
+#   3. byte-shuffled (all low bytes, then all high bytes) or bit-shuffled
+#      (16 bit planes, LSB first, 8 samples per byte).
+# The result is a fixed-size uint8 blob per row. The ROOT basket compression
+# (root_compression) then sees long runs of zero bytes instead of noisy
+# int16 pairs.
+#
+# numpy only, so analysis code can decode without uproot. Encoding runs
+# chunk-wise on the RootManager writer thread; decode() is used by
+# picoDAQReader.readWaves().
+
+import numpy as np
+
+CODECS = ("byteshuffle", "bitshuffle")
+
+
+class WaveCodec:
+    def __init__(self, shuffle="bitshuffle"):
+        if shuffle not in CODECS:
+            raise ValueError(f"Unknown waveform codec '{shuffle}', "
+                             f"use one of {list(CODECS)}")
+        self.shuffle = shuffle
+        self.name    = f"delta-zigzag-{shuffle}"   # stored in H2Meta
+
+    def blobSize(self, samples):
+        """Bytes per encoded waveform of the given sample count."""
+        return _blobSize(self.shuffle, samples)
+
+    def encode(self, adc, out=None):
+        """
+        Encode int16 rows of shape (n, samples).
+        out: preallocated uint8 array of at least n rows of blobSize(samples);
+        the first n rows are overwritten and returned.
+        """
+        adc = np.asarray(adc, dtype=np.int16)
+        n, samples = adc.shape
+        if out is None:
+            out = np.empty((n, self.blobSize(samples)), dtype=np.uint8)
+        res = out[:n]
+        z = _zigzag(_delta(adc))
+        if self.shuffle == "byteshuffle":
+            res.reshape(n, 2, samples)[:] = (
+                z.astype("<u2").view(np.uint8).reshape(n, samples, 2).transpose(0, 2, 1)
+            )
+        else:
+            planes = res.reshape(n, 16, (samples + 7) // 8)
+            z_bytes = z.astype("<u2").view(np.uint8).reshape(n, samples, 2)
+            bit = np.empty((n, samples), dtype=np.uint8)
+            for k in range(2):
+                byte = np.ascontiguousarray(z_bytes[:, :, k])
+                for b in range(8):
+                    np.right_shift(byte, b, out=bit)
+                    np.bitwise_and(bit, 1, out=bit)
+                    # packbits is several times faster on a bool view
+                    planes[:, 8 * k + b] = np.packbits(bit.view(np.bool_), axis=1)
+        return res
+
+
+def decode(blob, samples, codec):
+    """
+    Decode uint8 blobs of shape (n, blob bytes) back to int16 ADC counts of
+    shape (n, samples). codec: WaveCodec.name as stored in H2Meta.
+    """
+    shuffle = codec.rsplit("-", 1)[-1]
+    if codec != f"delta-zigzag-{shuffle}" or shuffle not in CODECS:
+        raise ValueError(f"Unknown waveform codec '{codec}'")
+    blob = np.asarray(blob, dtype=np.uint8)
+    n = len(blob)
+    if blob.shape[1:] != (_blobSize(shuffle, samples),):
+        raise ValueError(f"Blob size {blob.shape[1:]} does not match "
+                         f"{samples} samples for {codec}")
+    if shuffle == "byteshuffle":
+        z = np.ascontiguousarray(
+            blob.reshape(n, 2, samples).transpose(0, 2, 1)
+        ).view("<u2").reshape(n, samples).astype(np.uint16)
+    else:
+        planes = blob.reshape(n, 16, (samples + 7) // 8)
+        z = np.zeros((n, samples), dtype=np.uint16)
+        for b in range(16):
+            bits = np.unpackbits(planes[:, b], axis=1, count=samples)
+            z |= bits.astype(np.uint16) << b
+    d = (z >> 1) ^ (np.uint16(0) - (z & 1))          # inverse zigzag
+    return np.cumsum(d.view(np.int16), axis=1, dtype=np.int16)
+
+
+def _blobSize(shuffle, samples):
+    if shuffle == "byteshuffle":
+        return 2 * samples
+    return 16 * ((samples + 7) // 8)
+
+
+def _delta(adc):
+    d = np.empty_like(adc)
+    d[:, :1] = adc[:, :1]
+    np.subtract(adc[:, 1:], adc[:, :-1], out=d[:, 1:])
+    return d
+
+
+def _zigzag(d):
+    """int16 -> uint16 with 0, -1, 1, -2, ... mapped to 0, 1, 2, 3, ..."""
+    return (d.view(np.uint16) << 1) ^ (d >> 15).view(np.uint16)
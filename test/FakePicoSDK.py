@@ -0,0 +1,436 @@
+# FakePicoSDK.py
+# Hardware-free stand-in for the parts of picosdk used by H2LaserDigitizer.
+#
+# install() registers fake `picosdk`, `picosdk.ps3000a`, `picosdk.ps2000`
+# and `picosdk.functions` modules in sys.modules, so the *real* hardware code
+# paths of H2LaserDigitizer (initPico3000, initPico2000, the block-capture
+# methods and _close_hardware) run unchanged against simulated scopes.
+# Triggers arrive at TRIGGER_RATE_HZ and every captured segment holds a square
+# pulse whose height encodes its capture index, so tests can check that
+# segments are read back in order. Both fakes record trigger-to-readout
+# latency and how often the driver was polled.
+
+import ctypes
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+
+PICO_OK = 0
+PICO_NOT_SUPPORTED = 0x43
+
+BlockReadyType = ctypes.CFUNCTYPE(
+    None, ctypes.c_int16, ctypes.c_uint32, ctypes.c_void_p
+)
+StreamingReadyType = ctypes.CFUNCTYPE(
+    None, ctypes.c_int16, ctypes.c_int32, ctypes.c_uint32, ctypes.c_int16,
+    ctypes.c_uint32, ctypes.c_int16, ctypes.c_int16, ctypes.c_void_p
+)
+
+
+class FakePs3000a:
+    TRIGGER_RATE_HZ = 1000.0
+    SERIALS         = ["FAKE/0001", "FAKE/3000"]   # attached units
+    OPEN_DELAY_S    = 0.0     # time one OpenUnit call takes
+    MAX_SAMPLES     = 64 * 1024 * 1024   # device memory, samples per channel
+    TRIGGER_INFO    = True    # ps3000aGetTriggerInfoBulk available (3000D)
+
+    PS3000A_CHANNEL = {
+        "PS3000A_CHANNEL_A": 0, "PS3000A_CHANNEL_B": 1,
+        "PS3000A_CHANNEL_C": 2, "PS3000A_CHANNEL_D": 3,
+        "PS3000A_EXTERNAL":  4,
+    }
+    PS3000A_RANGE = {
+        f"PS3000A_{name}": i for i, name in enumerate([
+            "10mV", "20mV", "50mV", "100mV", "200mV", "500mV",
+            "1V", "2V", "5V", "10V", "20V", "50V",
+        ])
+    }
+    PS3000A_COUPLING = {"PS3000A_AC": 0, "PS3000A_DC": 1}
+    PS3000A_THRESHOLD_DIRECTION = {
+        "PS3000A_RISING": 2, "PS3000A_FALLING": 3,
+    }
+    PS3000A_TIME_UNITS = {
+        "PS3000A_FS": 0, "PS3000A_PS": 1, "PS3000A_NS": 2,
+        "PS3000A_US": 3, "PS3000A_MS": 4, "PS3000A_S": 5,
+    }
+    BlockReadyType     = BlockReadyType
+    StreamingReadyType = StreamingReadyType
+
+    def __init__(self):
+        self.n_segments  = 1
+        self.n_captures  = 1
+        self.buffers     = {}     # (channel, segment) -> int16 ndarray view
+        self.armed_at    = None
+        self.capture_cnt = 0      # total triggers delivered so far
+        self.calls       = {}     # API name -> call count
+        self.latencies   = []     # trigger-to-readout delay per arm [s]
+        self._timer      = None
+        self._fired      = None   # when the ready callback actually ran
+        self._epoch      = time.perf_counter()   # time-stamp counter zero
+        self.stream_pulses = 0    # pulses delivered in streaming mode
+        self.trigger_times = []   # simulated trigger instants, perf_counter [s]
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    # ----- unit ----------------------------------------------------------
+    def ps3000aEnumerateUnits(self, count_ref, serials, length_ref):
+        self._count("ps3000aEnumerateUnits")
+        text = ",".join(self.SERIALS).encode()
+        count_ref._obj.value = len(self.SERIALS)
+        serials.value = text
+        length_ref._obj.value = len(text)
+        return PICO_OK
+
+    def ps3000aOpenUnit(self, handle_ref, serial):
+        self._count("ps3000aOpenUnit")
+        time.sleep(self.OPEN_DELAY_S)
+        serial = serial.value.decode() if serial is not None else self.SERIALS[0]
+        handle_ref._obj.value = self.SERIALS.index(serial) + 1
+        return PICO_OK
+
+    def ps3000aChangePowerSource(self, handle, state):
+        return PICO_OK
+
+    def ps3000aStop(self, handle):
+        self._count("ps3000aStop")
+        self.armed_at = None
+        if self._timer is not None:
+            self._timer.cancel()
+        return PICO_OK
+
+    def ps3000aCloseUnit(self, handle):
+        self._count("ps3000aCloseUnit")
+        return PICO_OK
+
+    # ----- setup ---------------------------------------------------------
+    def ps3000aSetChannel(self, handle, ch, enabled, coupling, rng, offset):
+        return PICO_OK
+
+    def ps3000aMaximumValue(self, handle, value_ref):
+        value_ref._obj.value = 32512
+        return PICO_OK
+
+    def ps3000aSetSimpleTrigger(self, handle, *args):
+        return PICO_OK
+
+    def ps3000aGetTimebase2(self, handle, timebase, n_samples, interval_ref,
+                            oversample, max_samples_ref, segment):
+        interval_ref._obj.value = max(1, timebase - 2) * 8.0
+        self._dt = interval_ref._obj.value * 1e-9
+        max_samples_ref._obj.value = min(
+            self.MAX_SAMPLES // self.n_segments, 32767
+        )
+        return PICO_OK
+
+    def ps3000aMemorySegments(self, handle, n_segments, max_samples_ref):
+        self._count("ps3000aMemorySegments")
+        self.n_segments = n_segments
+        max_samples_ref._obj.value = self.MAX_SAMPLES // n_segments
+        return PICO_OK
+
+    def ps3000aSetNoOfCaptures(self, handle, n_captures):
+        self.n_captures = n_captures
+        return PICO_OK
+
+    def ps3000aSetDataBuffers(self, handle, ch, buf_max, buf_min, length,
+                              segment, mode):
+        self.buffers[(ch, segment)] = np.ctypeslib.as_array(
+            buf_max, shape=(length,)
+        )
+        return PICO_OK
+
+    def ps3000aSetDataBuffer(self, handle, ch, buf, length, segment, mode):
+        self.buffers[(ch, segment)] = np.ctypeslib.as_array(
+            buf, shape=(length,)
+        )
+        return PICO_OK
+
+    # ----- acquisition ---------------------------------------------------
+    def ps3000aRunBlock(self, handle, pre, post, timebase, oversample,
+                        time_indisposed, segment, ready_cb, param):
+        self._count("ps3000aRunBlock")
+        self.armed_at = time.perf_counter()
+        self._pre     = pre
+        self._post    = post
+        self._fired   = None
+        if ready_cb is not None:
+            def fire():
+                # The timer may run late; the simulated triggers follow it,
+                # so the reported trigger times match the ready callback.
+                self._fired = time.perf_counter()
+                ready_cb(handle, PICO_OK, None)
+            self._timer = threading.Timer(self._due() - self.armed_at, fire)
+            self._timer.start()
+        return PICO_OK
+
+    def _due(self):
+        return self.armed_at + self.n_captures / self.TRIGGER_RATE_HZ
+
+    def _is_ready(self):
+        if self.armed_at is None:
+            return False
+        return time.perf_counter() >= self._due()
+
+    def _segment_triggers(self, from_seg, to_seg):
+        """Simulated trigger instants of the segments of the current arm:
+        the last one a post-trigger window before the ready callback, the
+        others one trigger period apart."""
+        ready = self._fired if self._fired is not None else self._due()
+        last = ready - self._post * self._dt + self.TRIGGER_OFFSET_PS * 1e-12
+        seg = np.arange(from_seg, to_seg + 1)
+        return last - (self.n_captures - 1 - seg) / self.TRIGGER_RATE_HZ
+
+    def _record_latency(self):
+        if self.armed_at is not None:
+            self.latencies.append(time.perf_counter() - self._due())
+
+    def ps3000aIsReady(self, handle, ready_ref):
+        self._count("ps3000aIsReady")
+        ready_ref._obj.value = 1 if self._is_ready() else 0
+        return PICO_OK
+
+    def _fill_segment(self, segment):
+        self.capture_cnt += 1
+        for (ch, seg), buf in self.buffers.items():
+            if seg != segment:
+                continue
+            buf[:] = 0
+            buf[self._pre:self._pre + 10] = -(self.capture_cnt % 30000)
+
+    def ps3000aGetValues(self, handle, start, n_samples_ref, ratio, mode,
+                         segment, overflow_ref):
+        self._count("ps3000aGetValues")
+        self._record_latency()
+        self._fill_segment(segment)
+        return PICO_OK
+
+    def ps3000aGetValuesBulk(self, handle, n_samples_ref, from_seg, to_seg,
+                             ratio, mode, overflow_ref):
+        self._count("ps3000aGetValuesBulk")
+        self._record_latency()
+        for seg in range(from_seg, to_seg + 1):
+            self._fill_segment(seg)
+        self.trigger_times.extend(self._segment_triggers(from_seg, to_seg))
+        return PICO_OK
+
+    # The capture completes (ready) one post-trigger window after the
+    # trigger; report a sub-sample offset like the real driver.
+    TRIGGER_OFFSET_PS = -3000
+
+    def ps3000aGetTriggerTimeOffset64(self, handle, time_ref, units_ref,
+                                      segment):
+        self._count("ps3000aGetTriggerTimeOffset64")
+        time_ref._obj.value  = self.TRIGGER_OFFSET_PS
+        units_ref._obj.value = self.PS3000A_TIME_UNITS["PS3000A_PS"]
+        self.trigger_times.extend(self._segment_triggers(0, 0))
+        return PICO_OK
+
+    def ps3000aGetValuesTriggerTimeOffsetBulk64(self, handle, times, units,
+                                                from_seg, to_seg):
+        self._count("ps3000aGetValuesTriggerTimeOffsetBulk64")
+        for seg in range(from_seg, to_seg + 1):
+            times[seg]  = self.TRIGGER_OFFSET_PS
+            units[seg]  = self.PS3000A_TIME_UNITS["PS3000A_PS"]
+        return PICO_OK
+
+    # Counter starts just below the 48-bit wrap and carries junk in the
+    # upper bits, which the real driver leaves undefined.
+    COUNTER_START = (1 << 48) - 1_000_000
+    COUNTER_JUNK  = 0x5A5A << 48
+
+    def ps3000aGetTriggerInfoBulk(self, handle, infos, from_seg, to_seg):
+        self._count("ps3000aGetTriggerInfoBulk")
+        if not self.TRIGGER_INFO:
+            return PICO_NOT_SUPPORTED
+        ticks = np.round((self._segment_triggers(from_seg, to_seg) - self._epoch)
+                         / self._dt).astype(np.int64)
+        for seg, tick in zip(range(from_seg, to_seg + 1), ticks):
+            infos[seg].status = PICO_OK
+            infos[seg].segmentIndex = seg
+            infos[seg].timeStampCounter = (
+                ((self.COUNTER_START + int(tick)) & ((1 << 48) - 1))
+                | self.COUNTER_JUNK
+            )
+        return PICO_OK
+
+    # ----- streaming -----------------------------------------------------
+    def ps3000aRunStreaming(self, handle, interval_ref, units, pre, post,
+                            auto_stop, ratio, mode, buffer_size):
+        self._count("ps3000aRunStreaming")
+        self._stream_dt  = interval_ref._obj.value * 1e-9
+        self._stream_t0  = time.perf_counter()
+        self._stream_pos = 0
+        self._period     = max(20, int(round(
+            1.0 / (self.TRIGGER_RATE_HZ * self._stream_dt)
+        )))
+        return PICO_OK
+
+    def ps3000aGetStreamingLatestValues(self, handle, ready_cb, param):
+        """Deliver the samples due since the last call; positive pulses of
+        10 samples every 1/TRIGGER_RATE_HZ whose height encodes the pulse
+        index, on top of +-4 ADC noise."""
+        self._count("ps3000aGetStreamingLatestValues")
+        due = int((time.perf_counter() - self._stream_t0) / self._stream_dt)
+        length = min(len(buf) for (ch, seg), buf in self.buffers.items())
+        n = min(due - self._stream_pos, length)
+        if n <= 0:
+            return PICO_OK
+        idx   = self._stream_pos + np.arange(n)
+        # First pulse half a period in, so it has pre-trigger history
+        phase = (idx + self._period // 2) % self._period
+        pulse = (4000 + (idx // self._period) % 20000).astype(np.int16)
+        for (ch, seg), buf in self.buffers.items():
+            noise = np.random.randint(-4, 5, size=n).astype(np.int16)
+            buf[:n] = np.where(phase < 10, pulse, noise)
+        self.stream_pulses += int(np.count_nonzero(phase == 0))
+        self.trigger_times.extend(
+            self._stream_t0 + idx[phase == 0] * self._stream_dt
+        )
+        self._stream_pos   += n
+        ready_cb(handle, n, 0, 0, 0, 0, 0, None)
+        return PICO_OK
+
+
+class FakePs2000:
+    TRIGGER_RATE_HZ = 25.0
+    SERIALS         = ["FAKE/2000"]   # one entry per attached unit
+    OPEN_DELAY_S    = 0.0             # time one ps2000_open_unit call takes
+
+    PS2000_CHANNEL = {"PS2000_CHANNEL_A": 0, "PS2000_CHANNEL_B": 1}
+    PS2000_VOLTAGE_RANGE = {
+        f"PS2000_{name}": i for i, name in enumerate([
+            "10mV", "20mV", "50mV", "100mV", "200mV", "500mV",
+            "1V", "2V", "5V", "10V", "20V",
+        ])
+    }
+    PICO_COUPLING = {"AC": 0, "DC": 1}
+
+    def __init__(self):
+        self.open_handles = set()
+        self.armed_at     = None
+        self.capture_cnt  = 0
+        self.calls        = {}
+        self.latencies    = []
+        self._next_unit   = 0
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    # ----- unit ----------------------------------------------------------
+    def ps2000_open_unit(self):
+        self._count("ps2000_open_unit")
+        time.sleep(self.OPEN_DELAY_S)
+        free = [i for i in range(len(self.SERIALS))
+                if i + 1 not in self.open_handles]
+        if not free:
+            return 0
+        handle = free[0] + 1
+        self.open_handles.add(handle)
+        return handle
+
+    def ps2000_get_unit_info(self, handle, buf, length, info):
+        h = handle.value if hasattr(handle, "value") else handle
+        buf.value = self.SERIALS[h - 1].encode()
+        return len(buf.value)
+
+    def ps2000_stop(self, handle):
+        self.armed_at = None
+        return 1
+
+    def ps2000_close_unit(self, handle):
+        self._count("ps2000_close_unit")
+        h = handle.value if hasattr(handle, "value") else handle
+        self.open_handles.discard(h)
+        return 1
+
+    # ----- setup ---------------------------------------------------------
+    def ps2000_set_channel(self, handle, ch, enabled, coupling, rng):
+        return 1
+
+    def ps2000_set_trigger(self, handle, *args):
+        return 1
+
+    def ps2000_get_timebase(self, handle, timebase, n_samples, interval_ref,
+                            units_ref, oversample, max_samples_ref):
+        interval_ref._obj.value = 10 * 2 ** timebase
+        max_samples_ref._obj.value = 8064
+        return 1
+
+    # ----- acquisition ---------------------------------------------------
+    def ps2000_run_block(self, handle, n_samples, timebase, oversample,
+                         time_indisposed_ref):
+        self._count("ps2000_run_block")
+        self.armed_at = time.perf_counter()
+        self._n       = n_samples
+        return 1
+
+    def _due(self):
+        return self.armed_at + 1.0 / self.TRIGGER_RATE_HZ
+
+    def ps2000_ready(self, handle):
+        self._count("ps2000_ready")
+        if self.armed_at is None:
+            return 0
+        return 1 if time.perf_counter() >= self._due() else 0
+
+    def ps2000_get_values(self, handle, buf_a, buf_b, buf_c, buf_d,
+                          overflow_ref, n_samples):
+        self._count("ps2000_get_values")
+        if self.armed_at is not None:
+            self.latencies.append(time.perf_counter() - self._due())
+        self.capture_cnt += 1
+        for ptr in (buf_a, buf_b):
+            if ptr is None:
+                continue
+            buf = np.ctypeslib.as_array(ptr, shape=(self._n,))
+            buf[:] = 0
+            buf[10:20] = -(self.capture_cnt % 30000)
+        return self._n
+
+
+def _assert_pico_ok(status):
+    if status != PICO_OK:
+        raise Exception(f"PicoSDK returned status {status}")
+
+
+def _assert_pico2000_ok(status):
+    if status <= 0:
+        raise Exception(f"PicoSDK (ps2000) returned status {status}")
+
+
+def _mV2adc(millivolts, range_idx, max_adc):
+    ranges = [10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000]
+    return int(millivolts * max_adc.value / ranges[range_idx])
+
+
+def install():
+    """
+    Register the fake SDK in sys.modules and return the (ps3000a, ps2000)
+    fakes so tests can inspect call counts and latencies.
+    """
+    fake_3000a = FakePs3000a()
+    fake_2000  = FakePs2000()
+
+    pkg       = types.ModuleType("picosdk")
+    mod_3000a = types.ModuleType("picosdk.ps3000a")
+    mod_2000  = types.ModuleType("picosdk.ps2000")
+    mod_func  = types.ModuleType("picosdk.functions")
+
+    mod_3000a.ps3000a            = fake_3000a
+    mod_2000.ps2000              = fake_2000
+    mod_func.assert_pico_ok      = _assert_pico_ok
+    mod_func.assert_pico2000_ok  = _assert_pico2000_ok
+    mod_func.mV2adc              = _mV2adc
+    pkg.ps3000a   = mod_3000a
+    pkg.ps2000    = mod_2000
+    pkg.functions = mod_func
+
+    sys.modules["picosdk"]           = pkg
+    sys.modules["picosdk.ps3000a"]   = mod_3000a
+    sys.modules["picosdk.ps2000"]    = mod_2000
+    sys.modules["picosdk.functions"] = mod_func
+    return fake_3000a, fake_2000
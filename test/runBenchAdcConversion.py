@@ -0,0 +1,102 @@
+# runBenchAdcConversion.py
+# ADC -> mV conversion micro-benchmark — no hardware required.
+#
+# Compares, on one chunk of int16 waveforms of shape
+# (n_triggers, n_channels, n_samples):
+#   per-trigger  fastAdc2mV per channel per trigger, stored into a float32
+#                buffer (the original acquisition loop + RootManager path)
+#   per-channel  fastAdc2mV once per channel over the whole chunk
+#   AdcConverter one in-place call into a preallocated float32 block
+# for the 1000-sample / 3-channel setup and for 100k-sample waveforms.
+# Checks that all paths agree and that AdcConverter is the fastest.
+#
+# Run from project root:
+#   python3 test/runBenchAdcConversion.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ctypes
+import time
+
+import numpy as np
+
+from src import picoDAQAssistant
+from src.banner import print_banner, print_footer
+
+CHANNELS = ["A", "B", "C"]
+CH_RANGE = {"A": 7, "B": 7, "C": 6}        # 2 V, 2 V, 1 V
+OFFSET   = {"A": 0, "B": 0, "C": 12.5}
+MAX_ADC  = ctypes.c_int16(32767)
+
+CASES = [
+    # (n_triggers, n_samples, repeats)
+    (1000, 1000,   5),
+    (10,   100000, 5),
+]
+
+
+def per_trigger(block, out):
+    for t in range(block.shape[0]):
+        for i, ch in enumerate(CHANNELS):
+            out[t, i] = picoDAQAssistant.fastAdc2mV(
+                block[t, i], CH_RANGE[ch], MAX_ADC, OFFSET[ch]
+            )
+    return out
+
+
+def per_channel(block, out):
+    for i, ch in enumerate(CHANNELS):
+        out[:, i] = picoDAQAssistant.fastAdc2mV(
+            block[:, i], CH_RANGE[ch], MAX_ADC, OFFSET[ch]
+        )
+    return out
+
+
+def best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_case(n_triggers, n_samples, repeats):
+    rng   = np.random.default_rng(1)
+    block = rng.integers(-32768, 32767, (n_triggers, len(CHANNELS), n_samples),
+                         dtype=np.int16)
+    mbytes = block.nbytes / 1e6
+    conv   = picoDAQAssistant.AdcConverter(CHANNELS, CH_RANGE, MAX_ADC, OFFSET)
+
+    out_ref = np.empty(block.shape, dtype=np.float32)
+    out_ch  = np.empty(block.shape, dtype=np.float32)
+    out_new = np.empty(block.shape, dtype=np.float32)
+    paths = {
+        "per-trigger ": lambda: per_trigger(block, out_ref),
+        "per-channel ": lambda: per_channel(block, out_ch),
+        "AdcConverter": lambda: conv.convert(block, out_new),
+    }
+    times = {name: best_time(fn, repeats) for name, fn in paths.items()}
+
+    agree = (np.allclose(out_ref, out_new, atol=1e-3)
+             and np.allclose(out_ch, out_new, atol=1e-3))
+    print(f"[TEST] {n_triggers} triggers x {len(CHANNELS)} ch x "
+          f"{n_samples} samples ({mbytes:.1f} MB int16):")
+    for name, t in times.items():
+        print(f"[TEST]   {name}  {t * 1e3:8.2f} ms  {mbytes / t:8.0f} MB/s  "
+              f"x{times['per-trigger '] / t:5.1f}")
+    print(f"[TEST]   results agree: {agree}")
+    return agree and times["AdcConverter"] == min(times.values())
+
+
+def main():
+    print_banner("ADC Conversion  —  Micro-benchmark  (no hardware)")
+    ok = all([run_case(*case) for case in CASES])
+    print_footer("ADC Conversion Benchmark")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# runBenchBinarySink.py
+# Binary waveform sink vs ROOT benchmark — no hardware required.
+#
+# 1. Replays N_TRIGGERS synthetic waveforms (VirtualDigitizer pulses, 3
+#    channels x 1000 samples, int16 ADC counts) through
+#      - RootManager, raw storage, uncompressed and ZLIB:1
+#      - picoDAQAssistant.BinaryWaveSink
+#    and reports write MB/s (int16 payload per second of wall time) and
+#    bytes per trigger.
+# 2. Random access: reads N_RANDOM single triggers at random entries of one
+#    channel (uproot: arrays() of one entry; binary: picoDAQReader.
+#    readBinary() view) and a full sequential read of that channel; checks
+#    that every read matches the replayed data.
+# 3. Runs VirtualDigitizer headless with "output_format": "binary" and
+#    "root_rotate_triggers": 200, and checks the rotated .h2w/.h2t/.json
+#    sets with picoDAQReader.readBinaryDay().
+#
+# Run from project root:
+#   python3 test/runBenchBinarySink.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import uproot
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src import picoDAQAssistant, picoDAQReader
+from src.banner import print_banner, print_footer
+
+N_TRIGGERS = 2000
+N_RANDOM   = 200
+SAMPLES    = 1000
+CHANNELS   = ["A", "B", "C"]
+PER_FILE   = 200
+
+CONFIG = {
+    "run_mode": "continuous",
+    "channels": CHANNELS,
+    "channel_name": ["355", "212", "820"],
+    "voltage_range": {ch: "2V" for ch in CHANNELS},
+    "sample_number": SAMPLES,
+    "delta_t": 10,
+    "pre_trigger": 10,
+    "output_name": "bench_binary",
+}
+
+
+class _InstantVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 1e9    # no pacing: only the waveform generator
+
+
+class _FastVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 250.0
+
+
+def synthetic_waves(data_path):
+    """(N_TRIGGERS, channels, samples) int16 block and the digitizer."""
+    dig = _InstantVirtualDigitizer(
+        name="BenchWaves", config=dict(CONFIG, data_path=data_path),
+        update_queue=queue.Queue(), stop_event=threading.Event(),
+    )
+    block = np.empty((N_TRIGGERS, len(CHANNELS), SAMPLES), dtype=np.int16)
+    for k in range(N_TRIGGERS):
+        dig._capture_block()
+        for i, ch in enumerate(CHANNELS):
+            block[k, i] = dig.bufferMax[ch]
+    return block, dig
+
+
+def open_sink(kind, path, dig):
+    meta = picoDAQAssistant.rawStorageMeta(
+        CHANNELS, dig.ch_range, dig.maxADC, dig.ch_offset, dig.delta_t,
+    )
+    if kind == "binary":
+        return picoDAQAssistant.BinaryWaveSink(
+            filename=path, sample_num=SAMPLES, add_channels=CHANNELS,
+            meta=meta, time_axis=dig.t,
+        )
+    return picoDAQAssistant.RootManager(
+        filename=path, runN=0, sample_num=SAMPLES, add_channels=CHANNELS,
+        raw_meta=meta, time_axis=dig.t,
+        compression=picoDAQAssistant.rootCompression(*kind),
+    )
+
+
+def replay(block, dig, kind, path):
+    sink = open_sink(kind, path, dig)
+    sink.start_thread()
+    wall0 = time.perf_counter()
+    for k in range(N_TRIGGERS):
+        wave = {"Time": dig.t}
+        for i, ch in enumerate(CHANNELS):
+            wave[f"Ch{ch}"] = block[k, i]
+        sink.fill(**wave)
+    sink.close()
+    return block.nbytes / 2**20 / (time.perf_counter() - wall0)
+
+
+def random_reads(block, kind, path, picks):
+    """(µs per random single-trigger read, full-read MB/s, data ok)."""
+    ok = True
+    if kind == "binary":
+        t0 = time.perf_counter()
+        cha = picoDAQReader.readBinary(path, channels=["ChA"])["ChA"]
+        for k in picks:
+            row = cha[k]
+            ok = ok and np.array_equal(row, block[k, 0])
+        t1 = time.perf_counter()
+        full = np.array(picoDAQReader.readBinary(path, channels=["ChA"])["ChA"])
+        t2 = time.perf_counter()
+    else:
+        with uproot.open(path) as f:
+            tree = f["rawWave"]
+            t0 = time.perf_counter()
+            for k in picks:
+                row = tree["ChA"].array(library="np", entry_start=k,
+                                        entry_stop=k + 1)[0]
+                ok = ok and np.array_equal(row, block[k, 0])
+            t1 = time.perf_counter()
+            full = tree["ChA"].array(library="np")
+            t2 = time.perf_counter()
+    ok = ok and np.array_equal(full, block[:, 0])
+    return (t1 - t0) / len(picks) * 1e6, full.nbytes / 2**20 / (t2 - t1), ok
+
+
+def bench():
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    block, dig = synthetic_waves(tmp)
+    picks = np.random.default_rng(3).integers(0, N_TRIGGERS, N_RANDOM)
+    print(f"[TEST] {N_TRIGGERS} triggers x {len(CHANNELS)} channels x "
+          f"{SAMPLES} samples, {N_RANDOM} random single-trigger reads")
+    print(f"[TEST] {'sink':12s} {'write MB/s':>10s} {'B/trigger':>10s} "
+          f"{'random µs':>10s} {'full MB/s':>10s}")
+    ok = True
+    speeds = {}
+    for label, kind, name in (("ROOT none",   ("none", 0), "none.root"),
+                              ("ROOT ZLIB:1", ("ZLIB", 1), "zlib.root"),
+                              ("binary",      "binary",    "bench_0000.h2w")):
+        path = os.path.join(tmp, name)
+        mbs = replay(block, dig, kind, path)
+        size = sum(os.path.getsize(p) for p in
+                   glob.glob(os.path.splitext(path)[0] + ".*"))
+        us, full_mbs, intact = random_reads(block, kind, path, picks)
+        speeds[label] = (mbs, us)
+        print(f"[TEST] {label:12s} {mbs:10.1f} {size / N_TRIGGERS:10.0f} "
+              f"{us:10.1f} {full_mbs:10.1f}" + ("" if intact else "  DATA MISMATCH"))
+        ok = ok and intact
+
+    data = picoDAQReader.readBinary(os.path.join(tmp, "bench_0000.h2w"), unit="mV")
+    mv_ok = np.allclose(data["ChB"], dig.adc_converter.convertChannel(1, block[:, 1]))
+    header = picoDAQReader.readBinaryHeader(os.path.join(tmp, "bench_0000.h2w"))
+    ok = (ok and mv_ok and header["entries"] == N_TRIGGERS
+          and speeds["binary"][1] < speeds["ROOT ZLIB:1"][1])
+    print(f"[TEST] binary mV conversion={mv_ok}, header entries={header['entries']}")
+    return ok
+
+
+def virtual_run():
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+    cfg = dict(next(iter(VIRTUAL_CONFIGS.values())), data_path=data_path,
+               output_format="binary", root_rotate_triggers=PER_FILE)
+    stop_event = threading.Event()
+    worker = _FastVirtualDigitizer(
+        name="Virtual-binary", config=cfg,
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(3.0)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    date = datetime.now().strftime("%y%m%d")
+    files = picoDAQReader.readBinaryDay(f"{data_path}/bin", cfg["output_name"],
+                                       date, unit="mV")
+    ts = np.concatenate([f["Timestamp"] for f in files]) if files else np.empty(0)
+    full_ok = all(len(f["ChA"]) == PER_FILE for f in files[:-1])
+    # Square pulse of about -700 mV starting at 10 % of the window
+    pulse_ok = bool(files) and abs(float(np.median(files[0]["ChA"][:, 150])) + 700) < 50
+    no_root = not glob.glob(f"{data_path}/root/*.root")
+    print(f"[TEST] VirtualDigitizer: {len(files)} binary files, {len(ts)} "
+          f"triggers, {PER_FILE} per file={full_ok}, pulse at -700 mV={pulse_ok}, "
+          f"no ROOT files={no_root}")
+    return (len(files) >= 2 and full_ok and pulse_ok and no_root
+            and bool(np.all(np.diff(ts) > 0)))
+
+
+def main():
+    print_banner("BinaryWaveSink  —  Binary vs ROOT Benchmark  (no hardware)")
+    ok = all([bench(), virtual_run()])
+    print_footer("Binary Sink Benchmark")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
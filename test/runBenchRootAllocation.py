@@ -0,0 +1,82 @@
+# runBenchRootAllocation.py
+# RootManager long-run allocation benchmark — no hardware required.
+#
+# Fills one RootManager with 200k triggers (3 channels x 200 samples, int16
+# ADC counts converted at flush) through its writer thread, and samples the
+# traced Python/numpy memory every 10 % of the run. With the recycled buffer
+# pool the steady state must stay flat: growth after warm-up is limited to
+# the ROOT file's own basket bookkeeping.
+#
+# Run from project root:
+#   python3 test/runBenchRootAllocation.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ctypes
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import uproot
+
+from src import picoDAQAssistant
+from src.banner import print_banner, print_footer
+
+N_TRIGGERS = 200000
+SAMPLES    = 200
+CHANNELS   = ["A", "B", "C"]
+MAX_GROWTH_MB = 2.0   # allowed growth between 20 % and 100 % of the run
+
+
+def main():
+    print_banner("RootManager  —  Long-Run Allocation Benchmark  (no hardware)")
+
+    path = os.path.join(tempfile.mkdtemp(prefix="h2daq_"), "alloc.root")
+    conv = picoDAQAssistant.AdcConverter(
+        CHANNELS, {ch: 7 for ch in CHANNELS}, ctypes.c_int16(32767),
+        {ch: 0 for ch in CHANNELS},
+    )
+    t    = np.arange(SAMPLES, dtype=np.float32)
+    rng  = np.random.default_rng(0)
+    adc  = rng.integers(-2000, 2000, (len(CHANNELS), SAMPLES), dtype=np.int16)
+    wave = {"Time": t}
+    for i, ch in enumerate(CHANNELS):
+        wave[f"Ch{ch}"] = adc[i]
+
+    tracemalloc.start()
+    rm = picoDAQAssistant.RootManager(
+        filename=path, runN=0, sample_num=SAMPLES, add_channels=CHANNELS,
+        chunk_size=1000, converter=conv,
+    )
+    rm.start_thread()
+
+    samples = []
+    t0 = time.perf_counter()
+    for k in range(N_TRIGGERS):
+        rm.fill(**wave)
+        if (k + 1) % (N_TRIGGERS // 10) == 0:
+            samples.append(tracemalloc.get_traced_memory()[0] / 2**20)
+    rm.close()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.stop()
+
+    with uproot.open(path) as f:
+        entries = f["rawWave"].num_entries
+
+    print("[TEST] traced memory [MB] at 10 % .. 100 %: "
+          + " ".join(f"{m:.1f}" for m in samples))
+    growth = samples[-1] - samples[1]
+    print(f"[TEST] {entries} entries in {elapsed:.1f} s "
+          f"({N_TRIGGERS / elapsed:.0f} fills/s), "
+          f"steady-state growth {growth:.2f} MB")
+
+    ok = entries == N_TRIGGERS and growth < MAX_GROWTH_MB
+    print_footer("RootManager Allocation Benchmark")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# runBenchRootCompression.py
+# ROOT compression benchmark — no hardware required.
+#
+# Generates N_TRIGGERS synthetic waveforms with VirtualDigitizer's pulse
+# generator (3 channels x 1000 samples, int16 ADC counts) and replays them
+# through RootManager and its writer thread once per compression option and
+# storage mode ("mV": float32 converted at flush, "raw": int16 + H2Meta).
+# Reports for each:
+#   MB/s      uncompressed basket bytes written per second of wall time
+#   CPU s     process CPU time (all threads) for fill + write + close
+#   ratio     uncompressed / compressed basket bytes (TTree fTotBytes /
+#             fZipBytes)
+#   max Hz    trigger rate the writer sustains at this throughput
+# and checks that every file reads back with all entries intact.
+#
+# Run from project root:
+#   python3 test/runBenchRootCompression.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+import uproot
+
+from test.VirtualDigitizer import VirtualDigitizer
+from src import picoDAQAssistant
+from src.banner import print_banner, print_footer
+
+N_TRIGGERS = 1000
+SAMPLES    = 1000
+CHANNELS   = ["A", "B", "C"]
+
+# (algorithm, level) as in "root_compression" / "root_compression_level"
+OPTIONS = [
+    ("none", 0),
+    ("ZLIB", 1),
+    ("ZLIB", 6),
+    ("LZ4",  1),
+    ("ZSTD", 1),
+    ("ZSTD", 5),
+    ("LZMA", 1),
+]
+
+CONFIG = {
+    "run_mode": "continuous",
+    "channels": CHANNELS,
+    "channel_name": ["355", "212", "820"],
+    "voltage_range": {ch: "2V" for ch in CHANNELS},
+    "sample_number": SAMPLES,
+    "delta_t": 10,
+    "pre_trigger": 10,
+    "output_name": "bench_compression",
+}
+
+
+class _InstantVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 1e9    # no pacing: only the waveform generator
+
+
+def synthetic_waves(data_path):
+    """(N_TRIGGERS, channels, samples) int16 block and the digitizer."""
+    dig = _InstantVirtualDigitizer(
+        name="BenchWaves", config=dict(CONFIG, data_path=data_path),
+        update_queue=queue.Queue(), stop_event=threading.Event(),
+    )
+    block = np.empty((N_TRIGGERS, len(CHANNELS), SAMPLES), dtype=np.int16)
+    for k in range(N_TRIGGERS):
+        dig._capture_block()
+        for i, ch in enumerate(CHANNELS):
+            block[k, i] = dig.bufferMax[ch]
+    return block, dig
+
+
+def replay(block, dig, path, storage, algorithm, level):
+    raw_meta = None
+    if storage == "raw":
+        raw_meta = picoDAQAssistant.rawStorageMeta(
+            CHANNELS, dig.ch_range, dig.maxADC, dig.ch_offset, dig.delta_t,
+        )
+    root = picoDAQAssistant.RootManager(
+        filename=path, runN=0, sample_num=SAMPLES, add_channels=CHANNELS,
+        raw_meta=raw_meta,
+        converter=None if raw_meta else dig.adc_converter,
+        compression=picoDAQAssistant.rootCompression(algorithm, level),
+    )
+    root.start_thread()
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for k in range(N_TRIGGERS):
+        wave = {"Time": dig.t}
+        for i, ch in enumerate(CHANNELS):
+            wave[f"Ch{ch}"] = block[k, i]
+        root.fill(**wave)
+    root.close()
+    wall = time.perf_counter() - wall0
+    cpu  = time.process_time() - cpu0
+
+    with uproot.open(path) as f:
+        tree  = f["rawWave"]
+        tot   = tree.member("fTotBytes")
+        zipped = tree.member("fZipBytes")
+        cha   = tree["ChA"].array(library="np")
+    expect = block[:, 0] if raw_meta else dig.adc_converter.convertChannel(0, block[:, 0])
+    intact = len(cha) == N_TRIGGERS and np.array_equal(cha, expect)
+    return tot / 2**20 / wall, cpu, tot / zipped, N_TRIGGERS / wall, intact
+
+
+def main():
+    print_banner("RootManager  —  Compression Benchmark  (no hardware)")
+
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    block, dig = synthetic_waves(tmp)
+    print(f"[TEST] {N_TRIGGERS} triggers x {len(CHANNELS)} channels x "
+          f"{SAMPLES} samples per run")
+    print(f"[TEST] {'storage':7s} {'option':8s} {'MB/s':>8s} {'CPU s':>7s} "
+          f"{'ratio':>6s} {'max Hz':>8s}")
+    ok = True
+    for storage in ("mV", "raw"):
+        for algorithm, level in OPTIONS:
+            path = os.path.join(tmp, f"{storage}_{algorithm}{level}.root")
+            mbs, cpu, ratio, hz, intact = replay(
+                block, dig, path, storage, algorithm, level
+            )
+            label = algorithm if algorithm == "none" else f"{algorithm}:{level}"
+            print(f"[TEST] {storage:7s} {label:8s} {mbs:8.1f} {cpu:7.2f} "
+                  f"{ratio:6.2f} {hz:8.0f}" + ("" if intact else "  DATA MISMATCH"))
+            ok = ok and intact
+
+    print_footer("Compression Benchmark")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
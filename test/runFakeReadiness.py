@@ -0,0 +1,146 @@
+# runFakeReadiness.py
+# Trigger-readiness test — no hardware required.
+#
+# Runs the real PS3000A (block-ready callback) and PS2000 (adaptive polling)
+# capture paths of H2LaserDigitizer against FakePicoSDK at 25 Hz, headless.
+# Reports per device:
+#   - trigger-to-readout latency (median / 99th percentile)
+#   - driver polls and waiter wake-ups per trigger (idle CPU proxy)
+#   - time from stop request to thread exit
+# Then drives picoDAQAssistant.ReadyWaiter (adaptive polling) directly
+# through beam outages longer than warn_after: the learned period and the
+# readout latency must stay at the trigger period level after the outage,
+# and a stop during the unpolled sleep must return at once.
+#
+# Run from project root:
+#   python3 test/runFakeReadiness.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from test import FakePicoSDK
+from src import picoDAQAssistant
+from src.H2LaserDigitizer import H2LaserDigitizer
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 4.0
+RATE_HZ     = 25.0
+
+COMMON = {
+    "run_mode": "continuous",
+    "channels": ["A"],
+    "channel_name": ["Sig"],
+    "voltage_range": {"A": "2V"},
+    "offset": {"A": 0},
+    "sample_number": 1000,
+    "trigger_channel": "A",
+    "trigger_level": 200,
+    "pre_trigger": 10,
+    "trigger_edge": "RISING",
+    "trigger_delay": 0,
+    "auto_trigger": 0,
+    "output_name": "fake_ready",
+}
+
+DEVICES = {
+    "3405D": dict(COMMON, model="3405D", serial="FAKE/3000", timebase=52),
+    "2204A": dict(COMMON, model="2204A", serial="FAKE/2000", timebase=8),
+}
+
+
+def run_once(model):
+    fake_3000a, fake_2000 = FakePicoSDK.install()
+    fake = fake_3000a if model == "3405D" else fake_2000
+    fake.TRIGGER_RATE_HZ = RATE_HZ
+
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+
+    stop_event = threading.Event()
+    worker = H2LaserDigitizer(
+        name=f"Fake{model}", config=dict(DEVICES[model], data_path=data_path),
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(RUN_SECONDS)
+
+    t_stop = time.perf_counter()
+    stop_event.set()
+    worker.interrupt()
+    worker.join()
+    stop_s = time.perf_counter() - t_stop
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    lat_ms   = np.array(fake.latencies) * 1e3
+    n_trig   = len(lat_ms)
+    polls    = fake.calls.get("ps3000aIsReady", 0) + fake.calls.get("ps2000_ready", 0)
+    wakeups  = worker._ready_waiter.wakeups
+    print(
+        f"[TEST] {model}: {n_trig} triggers, "
+        f"latency median {np.median(lat_ms):.2f} ms / "
+        f"p99 {np.percentile(lat_ms, 99):.2f} ms, "
+        f"polls/trigger {polls / max(n_trig, 1):.1f}, "
+        f"wake-ups/trigger {wakeups / max(n_trig, 1):.1f}, "
+        f"stop in {stop_s * 1e3:.0f} ms"
+    )
+    # The old 10 ms sleep-poll gave ~5 ms median latency and ~4 polls/trigger.
+    return np.median(lat_ms) < 5.0 and stop_s < 0.5
+
+
+def outage():
+    period = 1.0 / RATE_HZ
+    gaps = [1.5] + [period] * 20 + [1.5] + [period] * 20   # outage first
+    stop_event = threading.Event()
+    due = [0.0]
+    waiter = picoDAQAssistant.ReadyWaiter(
+        stop_event, is_ready=lambda: time.perf_counter() >= due[0],
+        warn_after=1, name="outage",
+    )
+    late = []
+    for k, gap in enumerate(gaps):
+        waiter.arm()
+        due[0] = time.perf_counter() + gap
+        waiter.wait()
+        if k > 0 and gaps[k - 1] > 1.0:
+            continue      # first shot after an outage may be caught unpolled
+        late.append(time.perf_counter() - due[0])
+    learned = waiter.period
+    late_ms = np.max(late) * 1e3
+
+    # Stop while in a (forced) 5 s unpolled sleep
+    waiter.period = 5.0
+    waiter.arm()
+    due[0] = time.perf_counter() + 10.0
+    threading.Timer(0.05, stop_event.set).start()
+    t0 = time.perf_counter()
+    waiter.wait()
+    stop_s = time.perf_counter() - t0
+    print(
+        f"[TEST] outage: period after two 1.5 s outages "
+        f"{learned * 1e3:.1f} ms (trigger {period * 1e3:.0f} ms), "
+        f"max latency {late_ms:.1f} ms, {waiter.untimed} untimed, "
+        f"stop in unpolled sleep {stop_s * 1e3:.0f} ms"
+    )
+    return learned < 2 * period and late_ms < period * 1e3 and stop_s < 0.2
+
+
+def main():
+    print_banner("Fake PicoScope  —  Trigger Readiness Test  (no hardware)")
+    ok = all([run_once(model) for model in DEVICES] + [outage()])
+    print_footer("Fake Readiness Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
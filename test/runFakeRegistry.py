@@ -0,0 +1,96 @@
+# runFakeRegistry.py
+# Multi-unit startup test — no hardware required.
+#
+# Initialises four PS2000 and two PS3000A fake units through
+# H2LaserDAQManager (parallel init + picoDeviceRegistry), with every driver
+# open call taking OPEN_DELAY_S like a real USB open. Checks that
+#   - each PS2000 unit was opened once (k + 1 ps2000_open_unit calls instead
+#     of k * (k + 1) with the old per-worker scan)
+#   - every worker got the handle of its own serial
+#   - no unit is left open after the workers are closed
+#
+# Run from project root:
+#   python3 test/runFakeRegistry.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import time
+
+from test import FakePicoSDK
+from src.H2LaserDAQManager import H2LaserDAQManager
+from src.banner import print_banner, print_footer
+
+OPEN_DELAY_S = 0.2
+PS2000_UNITS = ["FAKE/2001", "FAKE/2002", "FAKE/2003", "FAKE/2004"]
+
+COMMON = {
+    "run_mode": "continuous",
+    "channels": ["A"],
+    "channel_name": ["Sig"],
+    "voltage_range": {"A": "2V"},
+    "offset": {"A": 0},
+    "sample_number": 1000,
+    "trigger_channel": "A",
+    "trigger_level": 200,
+    "pre_trigger": 10,
+    "trigger_edge": "RISING",
+    "trigger_delay": 0,
+    "auto_trigger": 0,
+    "output_name": "fake_registry",
+}
+
+
+def main():
+    print_banner("Fake PicoScopes  —  Device Registry Startup Test  (no hardware)")
+
+    fake_3000a, fake_2000 = FakePicoSDK.install()
+    fake_2000.SERIALS       = PS2000_UNITS
+    fake_2000.OPEN_DELAY_S  = OPEN_DELAY_S
+    fake_3000a.OPEN_DELAY_S = OPEN_DELAY_S
+
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    configs = {
+        f"PS2000-{i}": dict(COMMON, model="2204A", serial=serial, timebase=8,
+                            data_path=data_path)
+        for i, serial in enumerate(PS2000_UNITS)
+    }
+    for serial in fake_3000a.SERIALS:
+        configs[f"PS3000-{serial}"] = dict(
+            COMMON, model="3405D", serial=serial, timebase=52,
+            data_path=data_path,
+        )
+
+    t0 = time.perf_counter()
+    manager = H2LaserDAQManager(configs)
+    startup_s = time.perf_counter() - t0
+
+    handles_ok = all(
+        fake_2000.SERIALS[w.chandle.value - 1] == w.serial
+        for w in manager.workers.values() if w.model == "2204A"
+    ) and all(
+        fake_3000a.SERIALS[w.chandle.value - 1] == w.serial
+        for w in manager.workers.values() if w.model == "3405D"
+    )
+    opens_2000 = fake_2000.calls.get("ps2000_open_unit", 0)
+
+    # Workers were never started, so close them directly
+    for w in manager.workers.values():
+        w.close()
+    all_closed = not fake_2000.open_handles
+
+    k = len(PS2000_UNITS)
+    print(f"[TEST] {len(configs)} devices ready in {startup_s:.2f} s, "
+          f"ps2000_open_unit calls={opens_2000} (old scan: {k * (k + 1)}), "
+          f"ps3000aOpenUnit calls={fake_3000a.calls.get('ps3000aOpenUnit', 0)}, "
+          f"own handles={handles_ok}, all closed={all_closed}")
+
+    ok = opens_2000 == k + 1 and handles_ok and all_closed
+    print_footer("Fake Registry Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
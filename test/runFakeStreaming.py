@@ -0,0 +1,150 @@
+# runFakeStreaming.py
+# Streaming mode with software trigger — no hardware required.
+#
+# Runs the real PS3000A streaming path of H2LaserDigitizer against
+# FakePicoSDK, headless: the fake scope streams continuously with a short
+# positive pulse at TRIGGER_RATE_HZ, StreamManager cuts pre/post-trigger
+# windows in software, and the windows go through the normal block-mode
+# processing into ROOT. Checks that no pulse was missed, that every window
+# has its pulse at the pre-trigger position, and that windows are in order.
+# Then overflows a StreamManager directly (blocks pushed while the reader
+# stalls): every window cut afterwards must still have its pulse at the
+# pre-trigger position and the true stream index of it, and the lost stretch
+# must be reported as a gap.
+#
+# Run from project root:
+#   python3 test/runFakeStreaming.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+import uproot
+
+from test import FakePicoSDK
+from src import picoDAQAssistant
+from src.H2LaserDigitizer import H2LaserDigitizer
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 3.0
+RATE_HZ     = 2000.0
+
+FAKE_CONFIG = {
+    "run_mode": "continuous",
+    "model": "3405D",
+    "serial": "FAKE/0001",
+    "channels": ["A", "B"],
+    "channel_name": ["355", "212"],
+    "voltage_range": {"A": "2V", "B": "2V"},
+    "offset": {"A": 0, "B": 0},
+    "timebase": 52,
+    "sample_number": 100,
+    "trigger_channel": "A",
+    "trigger_level": 200,
+    "pre_trigger": 10,
+    "trigger_edge": "RISING",
+    "trigger_delay": 0,
+    "auto_trigger": 0,
+    "streaming": True,
+    "noise_rms": 0.2,
+    "output_name": "fake_stream",
+}
+
+
+def overflow():
+    pre, post, period, block = 10, 90, 250, 1000
+    sm = picoDAQAssistant.StreamManager(
+        channels=["A", "B"], trigger_channel="A", pre_samples=pre,
+        post_samples=post, capacity=4 * block + 2 * (pre + post), t=None,
+    )
+    sm.SetThreshold(200)
+    out = np.empty((64, 2, pre + post), dtype=np.int16)
+    index = np.empty(64, dtype=np.int64)
+    got_index, aligned = [], True
+
+    def drain():
+        nonlocal aligned
+        while True:
+            n = sm.NextWindows(out, index)
+            got_index.extend(index[:n].tolist())
+            # Pulse height encodes its stream index
+            aligned = aligned and bool(np.all(
+                out[:n, 0, pre] == 1000 + index[:n] // period % 20000))
+            if n < len(out):
+                return
+
+    for b in range(60):
+        idx = b * block + np.arange(block)
+        x = np.where((idx + period // 2) % period < 10,
+                     1000 + idx // period % 20000, 0).astype(np.int16)
+        sm.Put({"A": x, "B": x})
+        if not 20 <= b < 30:          # reader stalls for 10 blocks
+            drain()
+    drain()
+
+    true = list(range(period // 2, 60 * block, period))
+    lost = [k for k in true if any(a <= k < a + n for a, n in sm.gaps)]
+    expect = [k for k in true if k not in lost and k + post <= 60 * block]
+    exact = got_index == expect
+    print(f"[TEST] ring overflow: {len(sm.gaps)} gap(s) {sm.gaps}, "
+          f"{len(got_index)} windows, {len(lost)} pulses in the gap, "
+          f"stream indices exact={exact}, aligned={aligned}")
+    return exact and aligned and len(sm.gaps) == 1
+
+
+def main():
+    print_banner("Fake PS3000A  —  Streaming Software-Trigger Test  (no hardware)")
+
+    fake, _ = FakePicoSDK.install()
+    fake.TRIGGER_RATE_HZ = RATE_HZ
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+
+    stop_event = threading.Event()
+    worker = H2LaserDigitizer(
+        name="FakeStream", config=dict(FAKE_CONFIG, data_path=data_path),
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(RUN_SECONDS)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    waves = []
+    for path in sorted(glob.glob(f"{data_path}/root/*.root")):
+        with uproot.open(path) as f:
+            waves.append(f["rawWave"]["ChA"].array(library="np"))
+    waves = np.concatenate(waves)
+
+    pre      = worker.preTriggerSamples
+    aligned  = bool(np.all(waves[:, pre] > 100) and np.all(waves[:, pre - 1] < 100))
+    heights  = waves[:, pre]
+    in_order = bool(np.all(np.diff(heights) > 0))
+    # Pulses still in the ring (no post-trigger samples yet) are not stored
+    missed   = fake.stream_pulses - len(waves)
+    ok       = aligned and in_order and 0 <= missed <= 1
+
+    print(
+        f"[TEST] streamed {fake.stream_pulses} pulses, stored {len(waves)} "
+        f"windows ({len(waves) / RUN_SECONDS:.0f} Hz), missed={missed}, "
+        f"aligned={aligned}, in order={in_order}, "
+        f"ring drops={worker.stream_manager.dropped}"
+    )
+    ok = overflow() and ok
+    print_footer("Fake Streaming Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# runFakeTimestamps.py
+# Per-trigger timestamp test — no hardware required.
+#
+# Runs the real PS3000A block, rapid-block and streaming paths of
+# H2LaserDigitizer against FakePicoSDK, headless, and compares the int64
+# Timestamp branch of the ROOT files with the instants at which the fake
+# scope triggered (it places its triggers by when its ready callback ran):
+#   - timestamps are strictly increasing and close to the wall clock
+#   - trigger-to-trigger intervals match the simulated ones (jitter), also
+#     between the segments of one rapid-block arm, from the time-stamp
+#     counter or, on units without it, spread evenly from the arm
+#   - the derived Year ... ms branches agree with Timestamp
+#
+# Run from project root:
+#   python3 test/runFakeTimestamps.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import uproot
+
+from test import FakePicoSDK
+from src.H2LaserDigitizer import H2LaserDigitizer
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 2.0
+
+FAKE_CONFIG = {
+    "run_mode": "continuous",
+    "model": "3405D",
+    "serial": "FAKE/0001",
+    "channels": ["A"],
+    "channel_name": ["355"],
+    "voltage_range": {"A": "2V"},
+    "offset": {"A": 0},
+    "timebase": 52,
+    "sample_number": 100,
+    "trigger_channel": "A",
+    "trigger_level": 200,
+    "pre_trigger": 10,
+    "trigger_edge": "RISING",
+    "trigger_delay": 0,
+    "auto_trigger": 0,
+    "noise_rms": 0.2,
+    "output_name": "fake_time",
+}
+
+MODES = {
+    # mode: (extra config, fake settings, trigger rate, max |jitter| p99 in
+    # µs). Block-mode jitter is the time from the fake's ready callback to
+    # the waiter's stamp. Evenly spread segments are off by the callback's
+    # lateness spread over the batch; allow two trigger periods.
+    "block":      ({},                  {},                      200.0,  500.0),
+    "rapid":      ({"rapid_block": 50}, {},                      1000.0, 500.0),
+    "rapid-even": ({"rapid_block": 50}, {"TRIGGER_INFO": False}, 1000.0, 2000.0),
+    "streaming":  ({"streaming": True}, {},                      2000.0, 1.0),
+}
+
+
+def run_once(mode):
+    extra, settings, rate, max_jitter_us = MODES[mode]
+    fake, _ = FakePicoSDK.install()
+    fake.TRIGGER_RATE_HZ = rate
+    for key, value in settings.items():
+        setattr(fake, key, value)
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+
+    t_start = time.time_ns()
+    stop_event = threading.Event()
+    worker = H2LaserDigitizer(
+        name=f"Fake-{mode}", config=dict(FAKE_CONFIG, data_path=data_path, **extra),
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(RUN_SECONDS)
+    stop_event.set()
+    worker.interrupt()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    path = sorted(glob.glob(f"{data_path}/root/*.root"))[0]
+    with uproot.open(path) as f:
+        cols = f["rawWave"].arrays(
+            ["Timestamp", "Year", "Month", "Day", "Hour", "Min", "Sec", "ms"],
+            library="np",
+        )
+    ts   = cols["Timestamp"]
+    true = np.array(fake.trigger_times)
+    n    = min(len(ts), len(true))
+
+    # Intervals relative to the first trigger; a constant offset between the
+    # fake's clock and the file anchor cancels out.
+    jitter_us = ((ts[:n] - ts[0]) - (true[:n] - true[0]) * 1e9) / 1e3
+    p99 = np.percentile(np.abs(jitter_us), 99)
+
+    first = datetime.fromtimestamp(ts[0] / 1e9)
+    calendar_ok = (
+        (cols["Year"][0], cols["Month"][0], cols["Day"][0], cols["Hour"][0],
+         cols["Min"][0], cols["Sec"][0], cols["ms"][0])
+        == (first.year, first.month, first.day, first.hour,
+            first.minute, first.second, first.microsecond // 1000)
+    )
+    increasing = bool(np.all(np.diff(ts) > 0))
+    near_wall  = abs(int(ts[0]) - t_start) < 5e9
+
+    print(
+        f"[TEST] {mode:10s}: {len(ts)} triggers, dtype={ts.dtype}, "
+        f"interval jitter p99 {p99:.3f} µs, increasing={increasing}, "
+        f"near wall clock={near_wall}, calendar={calendar_ok}"
+    )
+    return (ts.dtype == np.int64 and increasing and near_wall
+            and calendar_ok and p99 < max_jitter_us)
+
+
+def main():
+    print_banner("Fake PS3000A  —  Trigger Timestamp Test  (no hardware)")
+    ok = all([run_once(mode) for mode in MODES])
+    print_footer("Fake Timestamp Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# runHistoryCache.py
+# History viewer parsed-CSV cache test — no hardware required.
+#
+# 1. Writes a month of daily trend CSV files (25 Hz / 100 triggers,
+#    3 channels) with csv.DictWriter, as the digitizer does.
+# 2. Loads the month through picoHistory.loadRange() twice: the first load
+#    parses every day and fills the cache, the second must read only cache
+#    files and take well under a second. Both must equal the values of the
+#    original pd.read_csv + timestamp mask path.
+# 3. Appends rows to the last day (today's file still being written) and
+#    checks that only that day is parsed again and the new rows appear.
+#
+# Run from project root:
+#   python3 test/runHistoryCache.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src import picoHistory
+from src.banner import print_banner, print_footer
+
+NAMES   = ["355", "212", "820"]
+DAYS    = 30
+PER_DAY = 25 * 86400 // 100
+START   = datetime(2025, 12, 1)
+RNG     = np.random.default_rng(3)
+
+
+def write_day(path, day, n, mode="w"):
+    ts = day.timestamp() + (np.arange(n) + RNG.random(n)) * 86400 / PER_DAY
+    with open(path, mode, newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["timestamp"] + NAMES)
+        if mode == "w":
+            writer.writeheader()
+        for t in ts.tolist():
+            writer.writerow({"timestamp": t,
+                             **{c: v for c, v in zip(NAMES, RNG.normal(1e-3, 1e-4, 3).tolist())}})
+
+
+def reference(data_path, channel, start, end):
+    """The pre-cache loader: pd.read_csv and mask per day."""
+    t, val = [], []
+    day = start
+    while day.date() <= end.date():
+        df = pd.read_csv(os.path.join(data_path, f"trend_{day.strftime('%y%m%d')}.csv"))
+        mask = (df["timestamp"] > start.timestamp()) & (df["timestamp"] < end.timestamp())
+        t.extend(df.loc[mask, "timestamp"].to_numpy())
+        val.extend(df.loc[mask, channel].to_numpy())
+        day += timedelta(days=1)
+    return np.array(t), np.array(val)
+
+
+def load(data_path, cache_path, start, end):
+    stats = {}
+    t0 = time.perf_counter()
+    data = picoHistory.loadRange(data_path, "trend", "212", start, end,
+                                 cache_path, stats=stats)
+    return data["timestamp"], data["212"], stats, time.perf_counter() - t0
+
+
+def main():
+    print_banner("picoHistory  —  Parsed-CSV Cache Test  (no hardware)")
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    data_path = os.path.join(tmp, "csv")
+    cache_path = os.path.join(data_path, ".history_cache")
+    os.makedirs(cache_path)
+    for d in range(DAYS):
+        day = START + timedelta(days=d)
+        write_day(os.path.join(data_path, f"trend_{day.strftime('%y%m%d')}.csv"), day, PER_DAY)
+
+    start = START + timedelta(hours=6)
+    end = START + timedelta(days=DAYS - 1, hours=23, minutes=59)
+    ref_t, ref_v = reference(data_path, "212", start, end)
+
+    ts, val, stats1, first = load(data_path, cache_path, start, end)
+    first_ok = (stats1.get("parsed") == DAYS and np.array_equal(ts, ref_t)
+                and np.array_equal(val, ref_v))
+    ts, val, stats2, second = load(data_path, cache_path, start, end)
+    second_ok = (stats2.get("cached") == DAYS and not stats2.get("parsed")
+                 and np.array_equal(ts, ref_t) and np.array_equal(val, ref_v))
+    print(f"[TEST] month of {len(ts)} rows: first load {first:.2f} s "
+          f"({stats1.get('parsed')} days parsed), cached load {second * 1e3:.0f} ms "
+          f"({stats2.get('cached')} days cached), values match pd.read_csv="
+          f"{first_ok and second_ok}")
+
+    last = START + timedelta(days=DAYS - 1)
+    time.sleep(0.01)
+    write_day(os.path.join(data_path, f"trend_{last.strftime('%y%m%d')}.csv"),
+              last, 50, mode="a")
+    ref_t, ref_v = reference(data_path, "212", start, end)
+    ts, val, stats3, third = load(data_path, cache_path, start, end)
+    grow_ok = (stats3.get("parsed") == 1 and stats3.get("cached") == DAYS - 1
+               and np.array_equal(ts, ref_t) and np.array_equal(val, ref_v))
+    print(f"[TEST] growing last day: {stats3.get('parsed')} day re-parsed, "
+          f"{stats3.get('cached')} cached, load {third * 1e3:.0f} ms, "
+          f"new rows present={grow_ok}")
+
+    ok = first_ok and second_ok and grow_ok and second < 1.0
+    print_footer("History Cache Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# runHistoryDecimation.py
+# History viewer min/max decimation test — no hardware required.
+#
+# Builds picoHistory.MinMaxPyramid over a month of trend rows (one per 4 s)
+# with 300 single-row spikes up and down, then queries view() for x-ranges
+# from the whole month down to ten minutes on 800 and 1 500 pixel plots:
+#   - never more than ~2 points per pixel,
+#   - points in time order,
+#   - every spike inside the range is drawn within its bin (as itself, or
+#     as a larger spike sharing the bin),
+#   - the lowest and highest point equal those of the raw rows in range.
+# Reports the build time and the time per view() call (the work done on
+# every pan / zoom step of the H2HistoryApp window).
+#
+# Run from project root:
+#   python3 test/runHistoryDecimation.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+import numpy as np
+
+from src import picoHistory
+from src.banner import print_banner, print_footer
+
+ROWS   = 30 * 86400 // 4
+SPIKES = 300
+RNG    = np.random.default_rng(23)
+
+
+def main():
+    print_banner("picoHistory  —  Min/Max Decimation Test  (no hardware)")
+    t = 1_764_000_000.0 + np.arange(ROWS) * 4.0 + RNG.random(ROWS) * 0.01
+    v = 1e-3 + RNG.normal(0, 2e-5, ROWS) + 1e-5 * np.sin(np.arange(ROWS) / 5000)
+    spikes = RNG.choice(ROWS, SPIKES, replace=False)
+    v[spikes[::2]] += 5e-4
+    v[spikes[1::2]] -= 5e-4
+
+    t0 = time.perf_counter()
+    pyramid = picoHistory.MinMaxPyramid(t, v)
+    build = time.perf_counter() - t0
+
+    spans = [30 * 86400, 7 * 86400, 86400, 3600, 600]
+    ok = True
+    calls, elapsed = 0, 0.0
+    for span in spans:
+        for width in (800, 1500):
+            for x0 in RNG.uniform(t[0] - 100, t[-1] - span + 100, 20):
+                x1 = x0 + span
+                s0 = time.perf_counter()
+                vt, vv, level = pyramid.view(x0, x1, width)
+                elapsed += time.perf_counter() - s0
+                calls += 1
+                inside = (t >= x0) & (t <= x1)
+                good = len(vt) <= 2 * width + 4 and np.all(np.diff(vt) >= 0)
+                # Each spike shows in its bin: a drawn point within one bin
+                # reaches at least as far (a larger spike may share the bin)
+                reach = 4.0 * picoHistory.MinMaxPyramid.FACTOR ** level + 1.0
+                for k in spikes[inside[spikes]]:
+                    near = vv[np.abs(vt - t[k]) <= reach]
+                    good = good and len(near) > 0 and (
+                        near.max() >= v[k] if v[k] > 1e-3 else near.min() <= v[k])
+                if inside.any():
+                    in_view = (vt >= x0) & (vt <= x1)
+                    good = (good and vv[in_view].min() == v[inside].min()
+                            and vv[in_view].max() == v[inside].max())
+                if not good:
+                    print(f"[TEST] failed: span {span} s, width {width}, level {level}")
+                ok = ok and good
+    per_call = elapsed / calls * 1e3
+    full = pyramid.view(t[0], t[-1], 1500)
+    print(f"[TEST] {ROWS} rows: pyramid of {len(pyramid.levels)} levels built in "
+          f"{build * 1e3:.0f} ms; whole month drawn as {len(full[0])} points "
+          f"(level {full[2]})")
+    print(f"[TEST] {calls} views from 30 days to 10 min: ≤ 2 points/pixel, every "
+          f"spike and the min/max kept={ok}; {per_call:.2f} ms per view")
+
+    ok = ok and per_call < 20.0
+    print_footer("History Decimation Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# runHistoryFollow.py
+# History viewer follow mode test — no hardware required.
+#
+# 1. A writer thread appends rows to a daily CSV file the way the digitizer
+#    does (csv.DictWriter, flush per row, occasionally a row left half
+#    written for a moment) while picoHistory.CsvTail polls it: every row
+#    must arrive exactly once, in order, with no partially written line
+#    parsed, and the file must be byte-identical to a run without reader.
+# 2. Overlap: loadRange() up to "now" followed by a CsvTail started after
+#    its last row gives every row of the file exactly once.
+# 3. Midnight: after the date change the tail keeps reading the old file
+#    until the digitizer opens the next one, then drains and switches;
+#    a day without file is passed over.
+# 4. Cost of one poll with a few new rows at the end of a full day's file
+#    vs. re-reading the file, and of MinMaxPyramid.append() of a few rows
+#    to a month of rows vs. rebuilding the pyramid (levels must be equal).
+#
+# Run from project root:
+#   python3 test/runHistoryFollow.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src import picoHistory
+from src.banner import print_banner, print_footer
+
+NAMES = ["355", "212"]
+DAY   = datetime(2025, 12, 18)
+RNG   = np.random.default_rng(29)
+
+
+def path_of(data_path, day):
+    return os.path.join(data_path, f"run_{day.strftime('%y%m%d')}.csv")
+
+
+class Writer:
+    """Appends rows like H2LaserDigitizer._open_csv / _process_waveform."""
+
+    def __init__(self, path):
+        exists = os.path.exists(path)
+        self.f = open(path, "a", newline="")
+        self.w = csv.DictWriter(self.f, fieldnames=["timestamp"] + NAMES)
+        if not exists:
+            self.w.writeheader()
+        self.rows = []
+
+    def row(self, ts, split=False):
+        vals = RNG.normal(1e-3, 1e-4, len(NAMES)).tolist()
+        if split:
+            # Half a line on disk for a moment
+            text = ",".join(str(x) for x in [ts] + vals) + "\r\n"
+            self.f.write(text[:len(text) // 2])
+            self.f.flush()
+            time.sleep(0.002)
+            self.f.write(text[len(text) // 2:])
+        else:
+            self.w.writerow({"timestamp": ts, **dict(zip(NAMES, vals))})
+        self.f.flush()
+        self.rows.append([ts] + vals)
+
+    def close(self):
+        self.f.close()
+
+
+def concurrent(tmp):
+    data_path = os.path.join(tmp, "live")
+    os.makedirs(data_path)
+    writer = Writer(path_of(data_path, DAY))
+    tail = picoHistory.CsvTail(data_path, "run", NAMES, DAY)
+    now = DAY + timedelta(hours=12)
+    got = []
+    done = threading.Event()
+
+    def write():
+        for k in range(3000):
+            writer.row(DAY.timestamp() + 4.0 * k, split=(k % 97 == 0))
+        done.set()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    polls = 0
+    while not done.is_set():
+        new = tail.poll(now)
+        got += np.column_stack([new[c] for c in tail.columns]).tolist()
+        polls += 1
+    thread.join()
+    new = tail.poll(now)
+    got += np.column_stack([new[c] for c in tail.columns]).tolist()
+    writer.close()
+
+    ok = got == writer.rows
+    ref = os.path.join(tmp, "ref.csv")
+    with open(ref, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["timestamp"] + NAMES)
+        w.writeheader()
+        for r in writer.rows:
+            w.writerow(dict(zip(["timestamp"] + NAMES, r)))
+    with open(ref, "rb") as a, open(path_of(data_path, DAY), "rb") as b:
+        intact = a.read() == b.read()
+    print(f"[TEST] concurrent writer: {len(got)} of {len(writer.rows)} rows in "
+          f"{polls} polls, once and in order={ok}, file unchanged by reader={intact}")
+    return ok and intact
+
+
+def overlap(tmp):
+    data_path = os.path.join(tmp, "overlap")
+    os.makedirs(data_path)
+    writer = Writer(path_of(data_path, DAY))
+    for k in range(500):
+        writer.row(DAY.timestamp() + 1.0 + 4.0 * k)
+    loaded = picoHistory.loadRange(data_path, "run", NAMES, DAY,
+                                   DAY + timedelta(hours=23))
+    for k in range(500, 520):
+        writer.row(DAY.timestamp() + 1.0 + 4.0 * k)
+    after = float(loaded["timestamp"][-1])
+    tail = picoHistory.CsvTail(data_path, "run", NAMES,
+                               datetime.fromtimestamp(after), after=after)
+    new = tail.poll(DAY + timedelta(hours=12))
+    writer.close()
+    ts = np.concatenate([loaded["timestamp"], new["timestamp"]])
+    ok = ts.tolist() == [r[0] for r in writer.rows]
+    print(f"[TEST] overlap: {len(loaded['timestamp'])} loaded + "
+          f"{len(new['timestamp'])} followed = every row once={ok}")
+    return ok
+
+
+def midnight(tmp):
+    data_path = os.path.join(tmp, "midnight")
+    os.makedirs(data_path)
+    d1, d2, d4 = DAY, DAY + timedelta(days=1), DAY + timedelta(days=3)
+    w1 = Writer(path_of(data_path, d1))
+    tail = picoHistory.CsvTail(data_path, "run", NAMES, d1)
+    for k in range(10):
+        w1.row(d2.timestamp() - 40 + 4 * k)
+    n1 = len(tail.poll(d1 + timedelta(hours=23, minutes=59))["timestamp"])
+    # Past midnight, the digitizer still writes the old file
+    w1.row(d2.timestamp() + 0.5)
+    n2 = len(tail.poll(d2 + timedelta(seconds=2))["timestamp"])
+    stay_ok = tail.day == d1 and n2 == 1
+    # Rotation: old file closed, next one opened
+    w1.row(d2.timestamp() + 4.5)
+    w1.close()
+    w2 = Writer(path_of(data_path, d2))
+    w2.row(d2.timestamp() + 8.5)
+    new = tail.poll(d2 + timedelta(seconds=10))
+    switch_ok = (tail.day == d2 and new["timestamp"].tolist()
+                 == [d2.timestamp() + 4.5, d2.timestamp() + 8.5])
+    w2.close()
+    # No file for d3, digitizer back on d4
+    w4 = Writer(path_of(data_path, d4))
+    w4.row(d4.timestamp() + 100)
+    new = tail.poll(d4 + timedelta(hours=1))
+    skip_ok = tail.day == d4 and len(new["timestamp"]) == 1
+    w4.close()
+    print(f"[TEST] midnight: {n1} rows, old file followed past midnight={stay_ok}, "
+          f"drained and switched on rotation={switch_ok}, missing day passed={skip_ok}")
+    return n1 == 10 and stay_ok and switch_ok and skip_ok
+
+
+def cost(tmp):
+    data_path = os.path.join(tmp, "cost")
+    os.makedirs(data_path)
+    writer = Writer(path_of(data_path, DAY))
+    for k in range(21600):
+        writer.row(DAY.timestamp() + 4.0 * k)
+    tail = picoHistory.CsvTail(data_path, "run", NAMES, DAY)
+    tail.poll(DAY + timedelta(hours=12))
+    times = []
+    for k in range(50):
+        writer.row(DAY.timestamp() + 86400 + k)
+        t0 = time.perf_counter()
+        tail.poll(DAY + timedelta(hours=12))
+        times.append(time.perf_counter() - t0)
+    writer.close()
+    t0 = time.perf_counter()
+    pd.read_csv(path_of(data_path, DAY))
+    full = time.perf_counter() - t0
+
+    # A month of rows, then 200 polls of 1-3 rows each
+    n = 30 * 21600
+    t = np.arange(n, dtype=np.float64) * 4.0
+    v = RNG.normal(size=n)
+    split = n - 400
+    pyramid = picoHistory.MinMaxPyramid(t[:split], v[:split])
+    appends = []
+    while split < n:
+        k = min(int(RNG.integers(1, 4)), n - split)
+        t0 = time.perf_counter()
+        pyramid.append(t[split:split + k], v[split:split + k])
+        appends.append(time.perf_counter() - t0)
+        split += k
+    t0 = time.perf_counter()
+    rebuilt = picoHistory.MinMaxPyramid(t, v)
+    rebuild = time.perf_counter() - t0
+    same = (len(pyramid.levels) == len(rebuilt.levels)
+            and all(np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])
+                    for a, b in zip(pyramid.levels, rebuilt.levels))
+            and np.array_equal(pyramid.t, t) and np.array_equal(pyramid.v, v))
+    append = np.median(appends)
+    print(f"[TEST] poll of 1 new row at the end of a day's file: "
+          f"{np.median(times) * 1e3:.2f} ms (re-read: {full * 1e3:.0f} ms); "
+          f"pyramid append of 1-3 rows to a month {append * 1e6:.0f} µs "
+          f"(rebuild {rebuild * 1e3:.0f} ms), same levels={same}")
+    return same and np.median(times) < full and append < rebuild / 100
+
+
+def main():
+    print_banner("picoHistory  —  Follow Mode Test  (no hardware)")
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    ok = all([concurrent(tmp), overlap(tmp), midnight(tmp), cost(tmp)])
+    print_footer("History Follow Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
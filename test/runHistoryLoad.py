@@ -0,0 +1,116 @@
+# runHistoryLoad.py
+# History viewer multi-day loader test — no hardware required.
+#
+# 1. Writes a month of daily trend CSV files (3 channels) with two days
+#    missing, and loads it without cache through picoHistory.loadRange():
+#    one channel and all three channels in one pass must equal a per-day
+#    pd.read_csv of the full file; the missing days are reported in stats.
+#    Load times of the old serial full parse, the column-pruned parse on one
+#    thread and on the default pool are printed.
+# 2. Cache: loading "212" and then "212" + "355" parses only the added
+#    column into the existing cache files; a third load reads the cache
+#    only.
+# 3. A channel that is not in the files raises RuntimeError.
+#
+# Run from project root:
+#   python3 test/runHistoryLoad.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from test.runHistoryCache import DAYS, NAMES, START, write_day
+from src import picoHistory
+from src.banner import print_banner, print_footer
+
+MISSING = (7, 8)
+
+
+def reference(paths, start, end):
+    """Serial full parse of every present day, as the viewer did before."""
+    frames = []
+    for path in paths:
+        if os.path.exists(path):
+            df = pd.read_csv(path)
+            frames.append(df[(df["timestamp"] > start.timestamp())
+                             & (df["timestamp"] < end.timestamp())])
+    return pd.concat(frames)
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    print_banner("picoHistory  —  Multi-Day Loader Test  (no hardware)")
+    data_path = os.path.join(tempfile.mkdtemp(prefix="h2daq_"), "csv")
+    os.makedirs(data_path)
+    for d in range(DAYS):
+        if d in MISSING:
+            continue
+        day = START + timedelta(days=d)
+        write_day(os.path.join(data_path, f"trend_{day.strftime('%y%m%d')}.csv"),
+                  day, 25 * 86400 // 100)
+    start = START + timedelta(hours=1)
+    end = START + timedelta(days=DAYS - 1, hours=22)
+    paths = picoHistory.dayFiles(data_path, "trend", start, end)
+
+    ref, t_ref = timed(reference, paths, start, end)
+    stats = {}
+    one, t_one = timed(picoHistory.loadRange, data_path, "trend", "212",
+                       start, end, workers=1, stats=stats)
+    three, t_pool = timed(picoHistory.loadRange, data_path, "trend", NAMES,
+                          start, end)
+    one_ok = (np.array_equal(one["timestamp"], ref["timestamp"])
+              and np.array_equal(one["212"], ref["212"]))
+    three_ok = all(np.array_equal(three[c], ref[c]) for c in ["timestamp"] + NAMES)
+    missing_ok = (len(stats["missing"]) == len(MISSING) and stats["parsed"] == DAYS - len(MISSING)
+                  and all(os.path.basename(p)[6:12] in
+                          {(START + timedelta(days=d)).strftime("%y%m%d") for d in MISSING}
+                          for p in stats["missing"]))
+    print(f"[TEST] {len(ref)} rows, {len(stats['missing'])} missing days reported="
+          f"{missing_ok}; one channel={one_ok}, three channels in one pass={three_ok}")
+    print(f"[TEST] uncached load: serial full parse {t_ref:.2f} s, pruned 1 "
+          f"channel on 1 thread {t_one:.2f} s, 3 channels on "
+          f"{min(8, os.cpu_count() or 1)} thread(s) {t_pool:.2f} s")
+
+    cache_path = os.path.join(data_path, ".history_cache")
+    os.makedirs(cache_path)
+    picoHistory.loadRange(data_path, "trend", "212", start, end, cache_path)
+    stats2, stats3 = {}, {}
+    both = picoHistory.loadRange(data_path, "trend", ["212", "355"], start, end,
+                                 cache_path, stats=stats2)
+    again = picoHistory.loadRange(data_path, "trend", ["355", "212"], start, end,
+                                  cache_path, stats=stats3)
+    with np.load(os.path.join(cache_path, os.path.basename(paths[0]) + ".npz")) as f:
+        cached_cols = sorted(k for k in f.files if not k.startswith("_"))
+    cache_ok = (stats2["parsed"] == DAYS - len(MISSING) and stats3["parsed"] == 0
+                and cached_cols == sorted(["212", "355", "timestamp"])
+                and all(np.array_equal(both[c], ref[c]) and np.array_equal(again[c], ref[c])
+                        for c in ("timestamp", "212", "355")))
+    print(f"[TEST] cache: added column parsed into {stats2['parsed']} days, then "
+          f"{stats3['cached']} cached, cached columns {cached_cols}={cache_ok}")
+
+    try:
+        picoHistory.loadRange(data_path, "trend", "NO_cell", start, end)
+        column_ok = False
+    except RuntimeError:
+        column_ok = True
+    print(f"[TEST] unknown channel raises RuntimeError={column_ok}")
+
+    ok = one_ok and three_ok and missing_ok and cache_ok and column_ok
+    print_footer("History Loader Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
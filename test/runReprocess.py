@@ -0,0 +1,267 @@
+# runReprocess.py
+# Offline reprocessing test — no hardware required.
+#
+# 1. Writes a small archive through RootManager: two dates of "repro" files
+#    in mV, raw, raw + bitshuffle codec and raw + per-file time axis
+#    storage, plus files of another prefix and another date that must not be
+#    selected. Two more files use the rawWave layout written before the
+#    Timestamp branch (float32 mV, local-time Year ... ms branches, no
+#    H2Meta), one of them without any time branches.
+# 2. Runs picoReprocess.reprocess() on a process pool and checks every
+#    feature column against a direct float64 computation on the mV
+#    waveforms from picoDAQReader, and the rows of summary.csv. The legacy
+#    file's Timestamp must be its trigger times to the ms; the file without
+#    time branches must have no Timestamp column.
+# 3. Resume: deletes two features files and leaves a half-written
+#    temporary one behind, reruns and checks that only those two files are
+#    processed and the results are unchanged. A rerun with another window
+#    into the same output_path must be refused.
+# 4. Reports throughput with 1 worker and one per CPU core, and the time a
+#    month of 25 Hz, 3 x 1000-sample data would take at that rate.
+#
+# Run from project root:
+#   python3 test/runReprocess.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import ctypes
+import glob
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+import uproot
+
+from src import picoDAQAssistant, picoDAQReader, picoReprocess, picoWaveCodec
+from src.banner import print_banner, print_footer
+
+N_PER_FILE = 2000
+SAMPLES    = 1000
+DELTA_T    = 10.0
+CHANNELS   = ["A", "B", "C"]
+RANGES     = {"A": 7, "B": 6, "C": 8}           # 2 V, 1 V, 5 V
+OFFSETS    = {"A": 0.0, "B": 5.0, "C": -3.0}    # mV
+AREA_WIN   = [900.0, 2500.0]
+BASE_WIN   = [0.0, 800.0]
+RNG        = np.random.default_rng(11)
+
+# storage of each "repro" file: (date, storage, codec, file time axis)
+ARCHIVE = [
+    ("251218", "mV",  None,         False),
+    ("251218", "raw", None,         False),
+    ("251218", "raw", "bitshuffle", True),
+    ("251219", "raw", None,         True),
+    ("251219", "mV",  None,         True),
+    ("251219", "raw", "byteshuffle", False),
+]
+# files in the layout written before the Timestamp branch: (date, calendar
+# branches)
+LEGACY = [
+    ("251219", True),
+    ("251219", False),
+]
+
+
+def waves(n):
+    """Baseline + pulse of random amplitude at 1 µs, ADC counts per channel."""
+    t = np.arange(SAMPLES)
+    shape = np.where((t >= 100) & (t < 200), 1.0, 0.0)
+    out = {}
+    for i, ch in enumerate(CHANNELS):
+        amp = RNG.normal(-6000 - 3000 * i, 300, n)
+        base = RNG.normal(40 * i, 10, n)
+        noise = RNG.normal(0, 30, (n, SAMPLES))
+        out[ch] = np.clip(np.round(base[:, None] + amp[:, None] * shape + noise),
+                          -32767, 32767).astype(np.int16)
+    return out
+
+
+def write_archive(root_dir):
+    t_axis = np.arange(SAMPLES, dtype=np.float32) * DELTA_T
+    maxADC = ctypes.c_int16(32767)
+    meta = picoDAQAssistant.rawStorageMeta(CHANNELS, RANGES, maxADC, OFFSETS, DELTA_T)
+    conv = picoDAQAssistant.AdcConverter(CHANNELS, RANGES, maxADC, OFFSETS)
+    names = [("repro", date, seq) for seq, (date, *_) in enumerate(ARCHIVE)]
+    names += [("other", "251218", 0), ("repro", "251220", 0)]
+    settings = ARCHIVE + [("251218", "raw", None, False)] * 2
+    ts0 = 1_766_000_000 * 10**9
+    for (prefix, date, seq), (_, storage, codec, file_axis) in zip(names, settings):
+        path = os.path.join(root_dir, f"{prefix}_{date}_{seq:04d}.root")
+        root = picoDAQAssistant.RootManager(
+            filename=path, runN=0, sample_num=SAMPLES, add_channels=CHANNELS,
+            raw_meta=meta if storage == "raw" else None,
+            converter=None if storage == "raw" else conv,
+            time_axis=t_axis if file_axis else None,
+            codec=picoWaveCodec.WaveCodec(codec) if codec else None,
+        )
+        root.start_thread()
+        w = waves(N_PER_FILE)
+        for k in range(N_PER_FILE):
+            root.fill(timestamp=ts0 + k * 40_000_000, Time=t_axis,
+                      **{f"Ch{ch}": w[ch][k] for ch in CHANNELS})
+        root.close()
+        ts0 += N_PER_FILE * 40_000_000
+
+
+def write_legacy(root_dir):
+    """
+    Files with the old RootManager layout, mV only. Returns the trigger time
+    in ns of each file with calendar branches, truncated to the ms they keep.
+    """
+    t_axis = np.arange(SAMPLES, dtype=np.float32) * DELTA_T
+    maxADC = ctypes.c_int16(32767)
+    conv = picoDAQAssistant.AdcConverter(CHANNELS, RANGES, maxADC, OFFSETS)
+    ts0 = 1_766_100_000 * 10**9
+    stamps = {}
+    for i, (date, calendar) in enumerate(LEGACY):
+        path = os.path.join(root_dir, f"repro_{date}_{len(ARCHIVE) + i:04d}.root")
+        ts = ts0 + np.arange(N_PER_FILE, dtype=np.int64) * 40_000_000 + 123_456
+        w = waves(N_PER_FILE)
+        branches = {"Run": np.zeros(N_PER_FILE, np.int32),
+                    "WaveN": np.arange(N_PER_FILE, dtype=np.int32)}
+        if calendar:
+            local = [datetime.fromtimestamp(t / 1e9) for t in ts.tolist()]
+            for name, attr, dtype in (("Year", "year", np.int16), ("Month", "month", np.int8),
+                                      ("Day", "day", np.int8), ("Hour", "hour", np.int8),
+                                      ("Min", "minute", np.int8), ("Sec", "second", np.int8)):
+                branches[name] = np.array([getattr(d, attr) for d in local], dtype)
+            branches["ms"] = np.array([d.microsecond // 1000 for d in local], np.int16)
+            stamps[path] = ts // 1_000_000 * 1_000_000
+        branches["nTime"] = np.full(N_PER_FILE, SAMPLES, np.int32)
+        branches["Time"] = np.tile(t_axis, (N_PER_FILE, 1))
+        for i_ch, ch in enumerate(CHANNELS):
+            branches[f"Ch{ch}"] = conv.convertChannel(i_ch, w[ch])
+        with uproot.recreate(path) as f:
+            f[picoDAQReader.TREE_NAME] = branches
+        ts0 += N_PER_FILE * 40_000_000
+    return stamps
+
+
+def expected(path):
+    """Features from mV waveforms, the slow obvious way."""
+    data = picoDAQReader.readWaves(path)
+    t = data["Time"][0]
+    area = (t >= AREA_WIN[0]) & (t < AREA_WIN[1])
+    base = (t >= BASE_WIN[0]) & (t < BASE_WIN[1])
+    out = {}
+    for ch in CHANNELS:
+        mv = data[f"Ch{ch}"].astype(np.float64)
+        b = mv[:, base].mean(axis=1)
+        out[f"Ch{ch}_baseline"] = b
+        out[f"Ch{ch}_baseline_rms"] = mv[:, base].std(axis=1)
+        sub = mv[:, area] - b[:, None]
+        out[f"Ch{ch}_area"] = sub.sum(axis=1) * DELTA_T * 1e-3
+        out[f"Ch{ch}_peak_min"] = sub.min(axis=1)
+        out[f"Ch{ch}_peak_max"] = sub.max(axis=1)
+    return out
+
+
+def config(root_dir, out_dir, workers, area_win=AREA_WIN):
+    return {
+        "root_path": root_dir, "output_name": "repro",
+        "start_date": "2025-12-18", "end_date": "2025-12-19",
+        "output_path": out_dir, "area_window_ns": area_win,
+        "baseline_window_ns": BASE_WIN, "channels": None,
+        "workers": workers, "step_size": "5 MB",
+    }
+
+
+def quiet(msg):
+    if not msg.startswith("[REPRO] ") or "processed" in msg or "to process" in msg:
+        print(msg)
+
+
+def check_features(root_dir, out_dir, stamps):
+    ok = True
+    legacy = {os.path.join(root_dir, f"repro_{date}_{len(ARCHIVE) + i:04d}.root")
+              for i, (date, _) in enumerate(LEGACY)}
+    for path in picoReprocess.findFiles(root_dir, "repro", "2025-12-18", "2025-12-19"):
+        feat = np.load(picoReprocess._featuresName(out_dir, path))
+        exp = expected(path)
+        # mV files hold float32 values, raw files int16 counts: compare to
+        # float32 resolution of the stored mV
+        same = all(np.allclose(feat[k], v, rtol=1e-5, atol=2e-3) for k, v in exp.items())
+        if not same:
+            print(f"[TEST] feature mismatch in {os.path.basename(path)}")
+        if path in stamps:
+            time_ok = np.array_equal(feat["Timestamp"], stamps[path])
+        elif path in legacy:
+            time_ok = "Timestamp" not in feat.files
+        else:
+            time_ok = len(feat["Timestamp"]) == N_PER_FILE
+        if not time_ok:
+            print(f"[TEST] Timestamp mismatch in {os.path.basename(path)}")
+        ok = ok and same and time_ok and len(feat["ChA_area"]) == N_PER_FILE
+    return ok
+
+
+def main():
+    print_banner("picoReprocess  —  Parallel Offline Reprocessing Test  (no hardware)")
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    root_dir = os.path.join(tmp, "root")
+    os.makedirs(root_dir)
+    write_archive(root_dir)
+    stamps = write_legacy(root_dir)
+    n_files = len(ARCHIVE) + len(LEGACY)
+
+    out_dir = os.path.join(tmp, "reprocess")
+    stats = picoReprocess.reprocess(config(root_dir, out_dir, 2), progress=quiet)
+    select_ok = stats["files"] == n_files and not stats["failed"]
+    feat_ok = check_features(root_dir, out_dir, stamps)
+    with open(os.path.join(out_dir, "summary.csv")) as f:
+        rows = list(csv.DictReader(f))
+    summary_ok = (len(rows) == n_files
+                  and all(int(r["entries"]) == N_PER_FILE for r in rows)
+                  and sum(r["first_timestamp"] == "" for r in rows) == 1
+                  and "ChC_area_mean" in rows[0])
+    print(f"[TEST] selection={select_ok}, features match direct computation="
+          f"{feat_ok}, summary rows={summary_ok}")
+
+    # -- resume ----------------------------------------------------------
+    files = picoReprocess.findFiles(root_dir, "repro", "2025-12-18", "2025-12-19")
+    before = {p: dict(np.load(picoReprocess._featuresName(out_dir, p))) for p in files}
+    for p in files[1:3]:
+        os.remove(picoReprocess._featuresName(out_dir, p))
+    with open(picoReprocess._featuresName(out_dir, files[2]) + ".tmp.npz", "wb") as f:
+        f.write(b"partial")
+    stats = picoReprocess.reprocess(config(root_dir, out_dir, 2), progress=quiet)
+    same = all(
+        np.array_equal(np.load(picoReprocess._featuresName(out_dir, p))[k], v)
+        for p in files for k, v in before[p].items()
+    )
+    resume_ok = stats["processed"] == 2 and stats["skipped"] == len(files) - 2 and same
+    try:
+        picoReprocess.reprocess(config(root_dir, out_dir, 2, [900.0, 3000.0]),
+                                progress=quiet)
+        refuse_ok = False
+    except ValueError:
+        refuse_ok = True
+    print(f"[TEST] resume: reprocessed {stats['processed']}, skipped "
+          f"{stats['skipped']}, results unchanged={same}; other settings "
+          f"refused={refuse_ok}")
+
+    # -- throughput ------------------------------------------------------
+    rates = []
+    for workers in sorted({1, os.cpu_count() or 1}):
+        stats = picoReprocess.reprocess(
+            config(root_dir, os.path.join(tmp, f"rate{workers}"), workers),
+            progress=lambda msg: None,
+        )
+        rate = stats["entries"] / stats["seconds"]
+        rates.append(rate)
+        month = 25 * 86400 * 30 / rate
+        print(f"[TEST] {workers} worker(s): {rate:.0f} triggers/s, "
+              f"{stats['bytes'] / 2**20 / stats['seconds']:.1f} MB/s -> a "
+              f"month at 25 Hz in {month / 60:.0f} min")
+
+    ok = select_ok and feat_ok and summary_ok and resume_ok and refuse_ok
+    print_footer("Reprocess Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
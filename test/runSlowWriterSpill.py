@@ -0,0 +1,97 @@
+# runSlowWriterSpill.py
+# Spill-to-disk overflow test — no hardware required.
+#
+# Fills a RootManager at full speed while the writer thread stalls for
+# STALL_S on its first STALL_CHUNKS extends (a disk hiccup). Runs once with
+# the spill file disabled and once enabled, and checks that with spilling
+#   - fill() never blocks for the length of a stall
+#   - spilled chunks are drained into the tree in order, rows intact
+#   - the scratch file is removed on close
+#
+# Run from project root:
+#   python3 test/runSlowWriterSpill.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import tempfile
+import time
+
+import numpy as np
+import uproot
+
+from src import picoDAQAssistant
+from src.banner import print_banner, print_footer
+
+N_TRIGGERS   = 20000
+SAMPLES      = 500
+CHANNELS     = ["A", "B"]
+STALL_S      = 0.5
+STALL_CHUNKS = 3
+
+
+def run_once(spill_limit):
+    tmp  = tempfile.mkdtemp(prefix="h2daq_")
+    path = os.path.join(tmp, "spill.root")
+    rm = picoDAQAssistant.RootManager(
+        filename=path, runN=0, sample_num=SAMPLES, add_channels=CHANNELS,
+        chunk_size=1000, calendar=False,
+        spill_dir=tmp, spill_limit=spill_limit,
+    )
+
+    extend = rm._tree.extend
+    stalls = [STALL_CHUNKS]
+    def slow_extend(data):
+        if stalls[0] > 0:
+            stalls[0] -= 1
+            time.sleep(STALL_S)
+        extend(data)
+    rm._tree.extend = slow_extend
+    rm.start_thread()
+
+    t   = np.arange(SAMPLES, dtype=np.float32)
+    ch  = np.zeros(SAMPLES, dtype=np.float32)
+    max_fill = max_backlog = 0
+    t0 = time.perf_counter()
+    for k in range(N_TRIGGERS):
+        ch[0] = k   # row id, checked after reading back
+        t_fill = time.perf_counter()
+        rm.fill(timestamp=k, Time=t, ChA=ch, ChB=ch)
+        max_fill    = max(max_fill, time.perf_counter() - t_fill)
+        max_backlog = max(max_backlog, rm.backlog())
+    fill_s = time.perf_counter() - t0
+    spill_mb = rm.spill_bytes() / 2**20
+    rm.close()
+
+    with uproot.open(path) as f:
+        cols = f["rawWave"].arrays(["WaveN", "Timestamp", "ChA"], library="np")
+    expect = np.arange(N_TRIGGERS)
+    intact = (np.array_equal(cols["WaveN"], expect)
+              and np.array_equal(cols["Timestamp"], expect)
+              and np.array_equal(cols["ChA"][:, 0], expect))
+    leftover = glob.glob(os.path.join(tmp, "*.spill"))
+
+    label = "spill on " if spill_limit else "spill off"
+    print(f"[TEST] {label}: {N_TRIGGERS} fills in {fill_s:.2f} s, "
+          f"max fill() {max_fill * 1e3:.1f} ms, max backlog {max_backlog} chunks, "
+          f"spilled {rm.spilled_chunks} chunks ({spill_mb:.0f} MB scratch), "
+          f"rows intact={intact}, scratch removed={not leftover}")
+    return max_fill, rm.spilled_chunks, intact and not leftover
+
+
+def main():
+    print_banner("RootManager  —  Spill-to-Disk Overflow Test  (no hardware)")
+
+    block_s, _, ok_off = run_once(spill_limit=0)
+    spill_s, spilled, ok_on = run_once(spill_limit=1 << 30)
+
+    ok = (ok_off and ok_on and spilled > 0
+          and block_s > STALL_S / 2 and spill_s < STALL_S / 5)
+    print_footer("Spill-to-Disk Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
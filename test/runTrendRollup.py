@@ -0,0 +1,169 @@
+# runTrendRollup.py
+# Multi-resolution trend rollup test — no hardware required.
+#
+# 1. Feeds a week of trend rows (one per ~4 s, 3 channels) through
+#    picoTrendStore.TrendRollup, stopping and restarting it in the middle of
+#    a window once, and checks every 1 min / 10 min / 1 h window read back by
+#    readRollup() against a pandas groupby of the rows (mean, min, max, std,
+#    count); the window split by the restart must be merged.
+# 2. Checks that each resolution has one file per local date and reports
+#    the cost of add() per row and the load time of the week as rows
+#    (readTrendRange) vs. as 10 min rollups.
+# 3. pickRollup(): the resolution chosen for 1 h … 1 year.
+# 4. Runs VirtualDigitizer headless and checks that the rollup counts add up
+#    to the CSV rows.
+#
+# Run from project root:
+#   python3 test/runTrendRollup.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import glob
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src import picoTrendStore
+from src.banner import print_banner, print_footer
+
+NAMES = ["355", "212", "NO_cell"]
+DAYS  = 7
+START = datetime(2025, 12, 1, 0, 0, 0)
+RNG   = np.random.default_rng(17)
+
+
+def expected(ts, vals, length):
+    df = pd.DataFrame(vals, columns=NAMES)
+    df["w"] = np.floor(ts / length) * length
+    g = df.groupby("w")
+    out = {"timestamp": g.size().index.to_numpy(dtype=np.float64)}
+    for ch in NAMES:
+        out[f"{ch}_mean"] = g[ch].mean().to_numpy()
+        out[f"{ch}_min"] = g[ch].min().to_numpy()
+        out[f"{ch}_max"] = g[ch].max().to_numpy()
+        out[f"{ch}_std"] = g[ch].std(ddof=0).to_numpy()
+        out[f"{ch}_count"] = g[ch].count().to_numpy(dtype=np.float64)
+    return out
+
+
+def week(tmp):
+    n = DAYS * 86400 // 4
+    ts = START.timestamp() + np.arange(n) * 4.0 + RNG.random(n) * 0.5
+    vals = 1.2e-3 + RNG.normal(0, 5e-5, (n, len(NAMES)))
+    vals[:, 2] += 40.0                        # far from zero: shifted sums
+    rows_dir = os.path.join(tmp, "rows")
+    os.makedirs(rows_dir)
+    for d in range(DAYS):
+        day = START + timedelta(days=d)
+        sel = (ts >= day.timestamp()) & (ts < (day + timedelta(days=1)).timestamp())
+        w = picoTrendStore.TrendWriter(
+            os.path.join(rows_dir, f"wk_{day.strftime('%y%m%d')}.h2trend"), NAMES)
+        for t, v in zip(ts[sel], vals[sel]):
+            w.append(t, v)
+        w.close()
+
+    trend_dir = os.path.join(tmp, "trend")
+    os.makedirs(trend_dir)
+    stop_at = n // 2 + 7                      # inside a 1 h window
+    t0 = time.perf_counter()
+    rollup = picoTrendStore.TrendRollup(trend_dir, "wk", NAMES)
+    for k in range(n):
+        if k == stop_at:
+            rollup.close()
+            rollup = picoTrendStore.TrendRollup(trend_dir, "wk", NAMES)
+        rollup.add(ts[k], vals[k])
+    rollup.close()
+    per_row = (time.perf_counter() - t0) / n * 1e6
+
+    end = START + timedelta(days=DAYS) - timedelta(seconds=1)
+    ok = True
+    for label, length in picoTrendStore.ROLLUP_RESOLUTIONS.items():
+        got = picoTrendStore.readRollup(trend_dir, "wk", label, START, end)
+        exp = expected(ts, vals, length)
+        same = (len(got["timestamp"]) == len(exp["timestamp"])
+                and all(np.allclose(got[k], v, rtol=1e-9, atol=1e-12)
+                        for k, v in exp.items()))
+        files = len(glob.glob(os.path.join(trend_dir, f"wk_{label}_*.h2trend")))
+        print(f"[TEST] {label}: {len(got['timestamp'])} windows match pandas "
+              f"groupby={same}, {files} daily files")
+        ok = ok and same and files == DAYS
+
+    t0 = time.perf_counter()
+    raw = picoTrendStore.readTrendRange(rows_dir, "wk", START, end)
+    t1 = time.perf_counter()
+    roll = picoTrendStore.readRollup(trend_dir, "wk", "10m", START, end, ["355"])
+    t2 = time.perf_counter()
+    print(f"[TEST] add() {per_row:.1f} µs per row; load the week: "
+          f"{len(raw['timestamp'])} rows {(t1 - t0) * 1e3:.1f} ms, "
+          f"{len(roll['timestamp'])} 10 min windows {(t2 - t1) * 1e3:.1f} ms")
+    return ok
+
+
+def pick():
+    spans = {"1 h": 3600, "1 day": 86400, "1 week": 7 * 86400,
+             "1 month": 30 * 86400, "1 year": 365 * 86400}
+    want = {"1 h": None, "1 day": "1m", "1 week": "1m", "1 month": "10m",
+            "1 year": "1h"}
+    got = {k: picoTrendStore.pickRollup(v) for k, v in spans.items()}
+    ok = got == want
+    print(f"[TEST] pickRollup: {got}, as expected={ok}")
+    return ok
+
+
+class _FastVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 250.0
+
+
+def virtual_run():
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+    cfg = dict(next(iter(VIRTUAL_CONFIGS.values())), data_path=data_path,
+               trend_rollups=True)
+    stop_event = threading.Event()
+    worker = _FastVirtualDigitizer(
+        name="Virtual-rollup", config=cfg,
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(3.0)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    name = f"{cfg['output_name']}_{datetime.now().strftime('%y%m%d')}"
+    with open(f"{data_path}/csv/{name}.csv") as f:
+        ref = list(csv.DictReader(f))
+    now = datetime.now()
+    ok = len(ref) > 0
+    for label in picoTrendStore.ROLLUP_RESOLUTIONS:
+        roll = picoTrendStore.readRollup(f"{data_path}/trend", cfg["output_name"],
+                                         label, now - timedelta(hours=2), now)
+        ch = cfg["channel_name"][0]
+        ok = ok and int(roll[f"{ch}_count"].sum()) == len(ref)
+    print(f"[TEST] VirtualDigitizer: {len(ref)} CSV rows, rollup counts match={ok}")
+    return ok
+
+
+def main():
+    print_banner("picoTrendStore  —  Multi-Resolution Rollup Test  (no hardware)")
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    ok = all([week(tmp), pick(), virtual_run()])
+    print_footer("Trend Rollup Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
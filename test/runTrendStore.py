@@ -0,0 +1,190 @@
+# runTrendStore.py
+# Columnar trend store test — no hardware required.
+#
+# 1. Round trip: 50 000 rows through picoTrendStore.TrendWriter, read back
+#    whole and for a time range; trendToCsv() must reproduce the CSV that
+#    csv.DictWriter writes for the same rows byte for byte.
+# 2. Crash and restart: a file without footer and with a torn last segment
+#    reads up to its last complete segment, and a new TrendWriter on the
+#    same day continues it.
+# 3. A month of trend rows (25 Hz / 100 triggers, 3 channels) as daily CSV
+#    and as daily trend files: write cost per row (writerow + flush vs.
+#    append) and load time of the whole month (pd.read_csv vs.
+#    readTrendRange).
+# 4. Runs VirtualDigitizer headless with "trend_format": "both" and checks
+#    that the trend file holds the same rows as the CSV.
+#
+# Run from project root:
+#   python3 test/runTrendStore.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src import picoTrendStore
+from src.banner import print_banner, print_footer
+
+NAMES = ["355", "212", "820"]
+RNG   = np.random.default_rng(5)
+
+
+def rows(n, t0=1_766_000_000.0, dt=4.0):
+    ts = t0 + np.arange(n) * dt + RNG.random(n) * 1e-3
+    vals = RNG.normal(-1.5e-3, 1e-4, (n, len(NAMES)))
+    return ts, vals
+
+
+def write_csv(path, ts, vals, flush=True):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["timestamp"] + NAMES)
+        writer.writeheader()
+        for t, v in zip(ts.tolist(), vals.tolist()):
+            writer.writerow({"timestamp": t, **dict(zip(NAMES, v))})
+            if flush:
+                f.flush()
+
+
+def round_trip(tmp):
+    ts, vals = rows(50000)
+    path = os.path.join(tmp, "rt_251218.h2trend")
+    w = picoTrendStore.TrendWriter(path, NAMES)
+    for t, v in zip(ts, vals):
+        w.append(t, v)
+    w.close()
+    data = picoTrendStore.readTrend(path)
+    same = (np.array_equal(data["timestamp"], ts)
+            and all(np.array_equal(data[n], vals[:, i]) for i, n in enumerate(NAMES)))
+    part = picoTrendStore.readTrend(path, ["212"], ts[1000], ts[2999])
+    part_ok = (list(part) == ["timestamp", "212"]
+               and np.array_equal(part["212"], vals[1000:3000, 1]))
+    write_csv(os.path.join(tmp, "rt_ref.csv"), ts, vals, flush=False)
+    out = picoTrendStore.trendToCsv(path)
+    with open(out, "rb") as a, open(os.path.join(tmp, "rt_ref.csv"), "rb") as b:
+        csv_ok = a.read() == b.read()
+    print(f"[TEST] round trip of {len(ts)} rows={same}, time range read={part_ok}, "
+          f"CSV export identical to DictWriter={csv_ok}")
+    return same and part_ok and csv_ok
+
+
+def crash_restart(tmp):
+    ts, vals = rows(1000)
+    path = os.path.join(tmp, "crash_251218.h2trend")
+    w = picoTrendStore.TrendWriter(path, NAMES, flush_rows=100)
+    for t, v in zip(ts[:550], vals[:550]):
+        w.append(t, v)
+    w._f.close()                                  # killed: no footer
+    with open(path, "ab") as f:                   # torn segment header
+        f.write(b"H2SG\x64\x00")
+    live = picoTrendStore.readTrend(path)
+    live_ok = len(live["timestamp"]) == 500       # 5 complete segments
+    w = picoTrendStore.TrendWriter(path, NAMES, flush_rows=100)
+    for t, v in zip(ts[500:], vals[500:]):
+        w.append(t, v)
+    w.close()
+    data = picoTrendStore.readTrend(path)
+    resume_ok = np.array_equal(data["timestamp"], ts) and np.array_equal(data["820"], vals[:, 2])
+    print(f"[TEST] crash: {len(live['timestamp'])} rows readable without footer="
+          f"{live_ok}, restart continues the file={resume_ok}")
+    return live_ok and resume_ok
+
+
+def month(tmp):
+    import pandas as pd
+
+    per_day = 25 * 86400 // 100
+    start = datetime(2025, 12, 1)
+    csv_dir, trend_dir = os.path.join(tmp, "csv"), os.path.join(tmp, "trend")
+    os.makedirs(csv_dir)
+    os.makedirs(trend_dir)
+    csv_s = trend_s = 0.0
+    for d in range(30):
+        day = start + timedelta(days=d)
+        ts, vals = rows(per_day, day.timestamp(), 86400 / per_day)
+        name = f"m_{day.strftime('%y%m%d')}"
+        t0 = time.perf_counter()
+        write_csv(os.path.join(csv_dir, name + ".csv"), ts, vals)
+        t1 = time.perf_counter()
+        w = picoTrendStore.TrendWriter(os.path.join(trend_dir, name + ".h2trend"), NAMES)
+        for t, v in zip(ts, vals):
+            w.append(t, v)
+        w.close()
+        t2 = time.perf_counter()
+        csv_s += t1 - t0
+        trend_s += t2 - t1
+    n = 30 * per_day
+
+    end = start + timedelta(days=29, hours=23, minutes=59)
+    t0 = time.perf_counter()
+    frames = [pd.read_csv(os.path.join(csv_dir, f"m_{(start + timedelta(days=d)).strftime('%y%m%d')}.csv"))
+              for d in range(30)]
+    csv_rows = sum(len(f) for f in frames)
+    t1 = time.perf_counter()
+    data = picoTrendStore.readTrendRange(trend_dir, "m", start, end)
+    t2 = time.perf_counter()
+    ok = len(data["timestamp"]) >= n - per_day and csv_rows == n
+    csv_mb = sum(os.path.getsize(os.path.join(csv_dir, f)) for f in os.listdir(csv_dir)) / 2**20
+    tr_mb = sum(os.path.getsize(os.path.join(trend_dir, f)) for f in os.listdir(trend_dir)) / 2**20
+    print(f"[TEST] month of {n} rows: write {csv_s / n * 1e6:.1f} µs/row CSV vs "
+          f"{trend_s / n * 1e6:.1f} µs/row trend; {csv_mb:.1f} MB vs {tr_mb:.1f} MB")
+    print(f"[TEST] load month: pd.read_csv {t1 - t0:.2f} s, readTrendRange "
+          f"{(t2 - t1) * 1e3:.1f} ms")
+    return ok and (t2 - t1) < (t1 - t0)
+
+
+class _FastVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 250.0
+
+
+def virtual_run():
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+    cfg = dict(next(iter(VIRTUAL_CONFIGS.values())), data_path=data_path,
+               trend_format="both")
+    stop_event = threading.Event()
+    worker = _FastVirtualDigitizer(
+        name="Virtual-trend", config=cfg,
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(3.0)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    date = datetime.now().strftime("%y%m%d")
+    name = f"{cfg['output_name']}_{date}"
+    trend = picoTrendStore.readTrend(f"{data_path}/trend/{name}.h2trend")
+    with open(f"{data_path}/csv/{name}.csv") as f:
+        ref = list(csv.DictReader(f))
+    ok = (len(ref) > 0 and len(trend["timestamp"]) == len(ref)
+          and all(np.array_equal(trend[c], [float(r[c]) for r in ref])
+                  for c in ["timestamp"] + cfg["channel_name"]))
+    print(f"[TEST] VirtualDigitizer: {len(trend['timestamp'])} trend rows, "
+          f"same as CSV={ok}")
+    return ok
+
+
+def main():
+    print_banner("picoTrendStore  —  Columnar Trend Store Test  (no hardware)")
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    ok = all([round_trip(tmp), crash_restart(tmp), month(tmp), virtual_run()])
+    print_footer("Trend Store Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
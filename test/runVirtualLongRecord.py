@@ -0,0 +1,93 @@
+# runVirtualLongRecord.py
+# Long-record memory test — no hardware required.
+#
+# Runs VirtualDigitizer headless with 4 channels x 100k samples per trigger
+# and a 64 MB ROOT buffer budget ("root_buffer_budget"). Checks that
+#   - RootManager's write buffers stay within the budget
+#   - peak traced memory stays far below what the old fixed 1000-entry
+#     chunks would have reserved
+#   - every trigger reached the ROOT file
+#
+# Run from project root:
+#   python3 test/runVirtualLongRecord.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import queue
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import uproot
+
+from test.VirtualDigitizer import VirtualDigitizer
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 4.0
+BUDGET_MB   = 64
+SAMPLES     = 100000
+CHANNELS    = ["A", "B", "C", "D"]
+
+CONFIG = {
+    "run_mode": "continuous",
+    "channels": CHANNELS,
+    "channel_name": ["355", "212", "820", "NO"],
+    "voltage_range": {ch: "2V" for ch in CHANNELS},
+    "sample_number": SAMPLES,
+    "delta_t": 1,
+    "pre_trigger": 10,
+    "output_name": "virtual_long",
+    "root_buffer_budget": f"{BUDGET_MB} MB",
+}
+
+
+def main():
+    print_banner("Virtual DAQ  —  Long-Record Memory Budget Test  (no hardware)")
+
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+
+    tracemalloc.start()
+    stop_event = threading.Event()
+    worker = VirtualDigitizer(
+        name="VirtualLong", config=dict(CONFIG, data_path=data_path),
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(RUN_SECONDS / 2)
+    buffer_mb = worker.root_pointer.buffer_bytes() / 2**20
+    time.sleep(RUN_SECONDS / 2)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if worker.error is not None:
+        raise worker.error
+
+    entries = 0
+    for path in glob.glob(f"{data_path}/root/*.root"):
+        with uproot.open(path) as f:
+            entries += f["rawWave"].num_entries
+    triggers = worker.root_pointer._wave_n
+
+    # Old layout: 3 buffers x 1000 entries x (Time + float32 per channel)
+    old_mb = 3 * 1000 * SAMPLES * 4 * (1 + len(CHANNELS)) / 2**20
+    print(f"[TEST] ROOT buffers {buffer_mb:.1f} MB (budget {BUDGET_MB} MB), "
+          f"peak traced memory {peak / 2**20:.0f} MB, "
+          f"old fixed chunks would reserve {old_mb:.0f} MB")
+    print(f"[TEST] {triggers} triggers, {entries} entries in ROOT")
+
+    ok = (buffer_mb <= BUDGET_MB and peak < 4 * BUDGET_MB * 2**20
+          and entries == triggers > 0)
+    print_footer("Long-Record Memory Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
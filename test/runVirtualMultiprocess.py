@@ -0,0 +1,87 @@
+# runVirtualMultiprocess.py
+# Multiprocess DAQ test — no hardware required.
+#
+# Runs two VirtualDigitizer instances, each in its own process through
+# H2LaserDigitizerProcess, headless. GUI updates come back through the
+# shared-memory rings onto an ordinary queue.Queue; the test checks that they
+# keep the continuous-mode update_queue schema and arrive from both devices.
+#
+# Run from project root:
+#   python3 test/runVirtualMultiprocess.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import multiprocessing as mp
+import queue
+import tempfile
+import time
+
+import numpy as np
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src.H2LaserDigitizerProcess import H2LaserDigitizerProcess
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 10.0   # 25 Hz → two GUI updates (every 100 triggers) per device
+SCHEMA      = {"channel_name", "timestamp", "value", "wfm_t", "wfm"}
+
+
+def main():
+    print_banner("Virtual DAQ  —  Multiprocess Test  (no hardware)")
+
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+
+    base = next(iter(VIRTUAL_CONFIGS.values()))
+    configs = {
+        "VirtualDET": dict(base, data_path=data_path),
+        "VirtualNO":  dict(base, data_path=data_path, channels=["A"],
+                           channel_name=["NO_cell"], output_name="virtual_no"),
+    }
+
+    update_queue = queue.Queue()
+    stop_event   = mp.Event()
+    workers = {
+        name: H2LaserDigitizerProcess(
+            name=name, config=cfg, update_queue=update_queue,
+            stop_event=stop_event, worker_cls=VirtualDigitizer,
+        )
+        for name, cfg in configs.items()
+    }
+    for w in workers.values():
+        w.start()
+
+    time.sleep(RUN_SECONDS)
+    stop_event.set()
+    for w in workers.values():
+        w.join()
+        w.close()
+
+    items = []
+    while True:
+        try:
+            items.append(update_queue.get_nowait())
+        except queue.Empty:
+            break
+
+    names     = {item.get("channel_name") for item in items}
+    schema_ok = all(set(item) == SCHEMA for item in items)
+    arrays_ok = all(isinstance(item["wfm"], np.ndarray)
+                    and item["wfm"].shape == item["wfm_t"].shape
+                    for item in items)
+    errors    = [w.error for w in workers.values() if w.error is not None]
+    ok = (schema_ok and arrays_ok and not errors
+          and names == {"355", "212", "NO_cell"})
+
+    print(f"[TEST] {len(items)} GUI updates from channels {sorted(names)}, "
+          f"schema ok={schema_ok}, arrays ok={arrays_ok}, errors={errors}")
+    print_footer("Virtual Multiprocess Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
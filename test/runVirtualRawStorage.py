@@ -0,0 +1,96 @@
+# runVirtualRawStorage.py
+# Raw int16 ROOT storage test — no hardware required.
+#
+# Runs VirtualDigitizer headless with "root_storage": "mV" and "raw" and
+# checks for the raw file that
+#   - the channel branches are int16 and the file carries H2Meta
+#   - picoDAQReader.readWaves() converts it back to mV
+#   - the averaged waveform published to the GUI equals the mean of the
+#     first 100 waveforms read back through picoDAQReader
+# and reports the file sizes of both runs.
+#
+# Run from project root:
+#   python3 test/runVirtualRawStorage.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+import uproot
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src import picoDAQReader
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 2.0
+
+
+class _FastVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 250.0
+
+
+def run_once(storage):
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+
+    cfg = dict(next(iter(VIRTUAL_CONFIGS.values())),
+               data_path=data_path, root_storage=storage)
+    update_queue = queue.Queue()
+    stop_event   = threading.Event()
+    worker = _FastVirtualDigitizer(
+        name=f"Virtual-{storage}", config=cfg,
+        update_queue=update_queue, stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(RUN_SECONDS)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    path = sorted(glob.glob(f"{data_path}/root/*.root"))[0]
+    return path, update_queue.get_nowait()
+
+
+def main():
+    print_banner("Virtual DAQ  —  Raw int16 ROOT Storage Test  (no hardware)")
+
+    mv_path, _         = run_once("mV")
+    raw_path, update   = run_once("raw")
+
+    with uproot.open(raw_path) as f:
+        raw_dtype = f["rawWave"]["ChA"].array(library="np").dtype
+    meta  = picoDAQReader.readMeta(raw_path)
+    waves = picoDAQReader.readWaves(raw_path, channels=["ChA"], entry_stop=100)
+    avg   = waves["ChA"].mean(axis=0)
+    match = np.allclose(avg, update["wfm"], atol=1e-3)
+    mv_ok = picoDAQReader.readMeta(mv_path) is None
+
+    n_raw = len(picoDAQReader.readWaves(raw_path)["ChA"])
+    n_mv  = len(picoDAQReader.readWaves(mv_path)["ChA"])
+    print(
+        f"[TEST] raw: ChA dtype={raw_dtype}, H2Meta={meta is not None}, "
+        f"GUI average matches reader={match}"
+    )
+    print(
+        f"[TEST] size per trigger: mV {os.path.getsize(mv_path) / n_mv:.0f} B, "
+        f"raw {os.path.getsize(raw_path) / n_raw:.0f} B"
+    )
+
+    ok = raw_dtype == np.int16 and meta is not None and match and mv_ok
+    print_footer("Raw Storage Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# runVirtualRotation.py
+# ROOT file rotation test — no hardware required.
+#
+# 1. Runs VirtualDigitizer headless with "root_rotate_triggers": 200 and
+#    checks that
+#      - files are numbered 0000, 0001, ... without gaps
+#      - every trigger is in exactly one file, Timestamps increasing across
+#        files
+#      - the trigger spacing across a file change stays within the jitter
+#        seen inside a file (no acquisition gap at rotation; the remaining
+#        jitter is GIL sharing with the writer threads, as for any flush)
+# 2. Drives picoDAQAssistant.RootRotator with simulated clock times around
+#    midnight and checks the boundary arithmetic, the size limit, that the
+#    first file after midnight carries the new date and was pre-opened, and
+#    that the unused pre-opened file is deleted.
+#
+# Run from project root:
+#   python3 test/runVirtualRotation.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import uproot
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src import picoDAQAssistant
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 4.0
+PER_FILE    = 200
+
+
+class _FastVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 250.0
+
+
+def run_digitizer():
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+
+    cfg = dict(next(iter(VIRTUAL_CONFIGS.values())),
+               data_path=data_path, root_rotate_triggers=PER_FILE)
+    stop_event = threading.Event()
+    worker = _FastVirtualDigitizer(
+        name="Virtual-rotate", config=cfg,
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(RUN_SECONDS)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    paths = sorted(glob.glob(f"{data_path}/root/*.root"))
+    seq_ok = [int(p[-9:-5]) for p in paths] == list(range(len(paths)))
+    stamps, firsts = [], []
+    for path in paths:
+        with uproot.open(path) as f:
+            ts = f["rawWave"]["Timestamp"].array(library="np")
+        firsts.append(sum(len(t) for t in stamps))
+        stamps.append(ts)
+    ts = np.concatenate(stamps)
+    dt = np.diff(ts) / 1e6                                   # ms
+    at_rotation = dt[[i - 1 for i in firsts[1:]]]
+    within      = np.delete(dt, [i - 1 for i in firsts[1:]])
+    full_ok = all(len(t) == PER_FILE for t in stamps[:-1])
+
+    print(f"[TEST] {len(paths)} files, numbering ok={seq_ok}, "
+          f"{PER_FILE} per file={full_ok}, {len(ts)} triggers")
+    print(f"[TEST] trigger spacing: median {np.median(dt):.2f} ms, "
+          f"max within files {np.max(within):.2f} ms, "
+          f"max across rotations {np.max(at_rotation):.2f} ms")
+    return (len(paths) >= 3 and seq_ok and full_ok
+            and bool(np.all(dt > 0))
+            and np.max(at_rotation) < 2 * np.max(within) + 5.0)
+
+
+def run_rotator():
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    t = np.arange(100, dtype=np.float32)
+
+    def open_file(name):
+        root = picoDAQAssistant.RootManager(
+            filename=name, runN=0, sample_num=100, add_channels=["A"],
+            chunk_size=10,
+        )
+        root.start_thread()
+        return root
+
+    nb = picoDAQAssistant.RootRotator.nextBoundary
+    day = datetime(2026, 3, 14)
+    bounds_ok = (
+        nb(day.replace(hour=10, minute=20), 900) == day.replace(hour=10, minute=30)
+        and nb(day.replace(hour=23, minute=59, second=30), 3600) == day + timedelta(days=1)
+        and nb(day.replace(hour=10), 0) == day + timedelta(days=1)
+    )
+
+    # An old file of that day is already there: numbering continues after it
+    open(os.path.join(tmp, "rot_260314_0003.root"), "w").close()
+    rot = picoDAQAssistant.RootRotator(tmp, "rot", open_file, triggers=0,
+                                       max_bytes=20000)
+    evening = day.replace(hour=23, minute=59, second=50)
+    root = rot.next_file(evening)
+    n = 0
+    while not rot.due(n, evening):
+        root.fill(Time=t, ChA=t)
+        n += 1
+        if n % 10 == 0:
+            time.sleep(0.01)   # let the writer extend
+    size_ok = n >= 10 and root.bytes_written >= 20000
+
+    # Lead time before midnight: the next file is re-prepared for tomorrow
+    rot.due(0, day.replace(hour=23, minute=59, second=57))
+    rot._prepared[1].result()     # real clock: opened during the lead time
+    due_ok = rot.due(0, day + timedelta(days=1, seconds=0.1))
+    t0 = time.perf_counter()
+    rot.next_file(day + timedelta(days=1, seconds=0.1))
+    switch_ms = (time.perf_counter() - t0) * 1e3
+    rot.close()
+
+    names = sorted(os.path.basename(p) for p in glob.glob(f"{tmp}/*.root"))
+    names_ok = names[-2:] == ["rot_260314_0004.root", "rot_260315_0000.root"]
+    # The file pre-opened for 260314 before the lead time was deleted
+    discard_ok = not os.path.exists(os.path.join(tmp, "rot_260314_0005.root"))
+    print(f"[TEST] rotator: boundaries={bounds_ok}, size limit after {n} fills "
+          f"({root.bytes_written} B)={size_ok}, midnight due={due_ok}, "
+          f"files {names}, unused pre-open deleted={discard_ok}, "
+          f"switch {switch_ms:.2f} ms")
+    return (bounds_ok and size_ok and due_ok and names_ok and discard_ok
+            and switch_ms < 10.0)
+
+
+def main():
+    print_banner("Virtual DAQ  —  ROOT File Rotation Test  (no hardware)")
+    ok = all([run_digitizer(), run_rotator()])
+    print_footer("Rotation Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
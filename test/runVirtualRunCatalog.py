@@ -0,0 +1,170 @@
+# runVirtualRunCatalog.py
+# SQLite run catalog test — no hardware required.
+#
+# 1. Runs VirtualDigitizer headless with "root_rotate_triggers": 200 and
+#    checks that <data_path>/catalog.sqlite has one row per ROOT file with
+#    the entries and first/last Timestamp of the file, and a row for the
+#    daily CSV file.
+# 2. Writes one file through RootManager with 50-entry chunks, catalogs it
+#    and checks that query() returns entry ranges that cover every trigger
+#    of the time window with less than one chunk of slack at either end.
+#    The file has a 60 s trigger outage between two chunks; a window inside
+#    it must return nothing.
+# 3. Fills a catalog with 1 000 and 100 000 synthetic files (with chunk
+#    rows) and compares the query time: it must not grow with the catalog
+#    (index lookup, no scan).
+#
+# Run from project root:
+#   python3 test/runVirtualRunCatalog.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+import uproot
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src import picoDAQAssistant, picoRunCatalog
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 3.0
+PER_FILE    = 200
+CHUNK       = 50
+
+
+class _FastVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 250.0
+
+
+def run_digitizer():
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+    cfg = dict(next(iter(VIRTUAL_CONFIGS.values())), run_catalog=True,
+               data_path=data_path, root_rotate_triggers=PER_FILE)
+    stop_event = threading.Event()
+    worker = _FastVirtualDigitizer(
+        name="Virtual-catalog", config=cfg,
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(RUN_SECONDS)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    catalog = picoRunCatalog.RunCatalog(os.path.join(data_path, "catalog.sqlite"))
+    rows = catalog.files(device=cfg["output_name"], kind="root")
+    rows_ok = len(rows) >= 3
+    for row in rows:
+        with uproot.open(row["path"]) as f:
+            ts = f["rawWave"]["Timestamp"].array(library="np")
+        rows_ok = (rows_ok and row["entries"] == len(ts)
+                   and row["first_ns"] == ts[0] and row["last_ns"] == ts[-1]
+                   and row["samples"] == worker.sample_number
+                   and row["bytes"] == os.path.getsize(row["path"]))
+    csv_rows = catalog.files(kind="csv")
+    with open(csv_rows[0]["path"]) as f:
+        csv_lines = sum(1 for line in f) - 1           # header
+    csv_ok = len(csv_rows) == 1 and csv_rows[0]["entries"] == csv_lines
+    hits = catalog.query(rows[1]["first_ns"], rows[1]["last_ns"])
+    query_ok = os.path.abspath(rows[1]["path"]) in [h.path for h in hits]
+    print(f"[TEST] VirtualDigitizer: {len(rows)} ROOT files cataloged, "
+          f"entries/timestamps/bytes match={rows_ok}, CSV rows "
+          f"{csv_rows[0]['entries'] if csv_rows else None} of {csv_lines}={csv_ok}, "
+          f"query finds file 1={query_ok}")
+    return rows_ok and csv_ok and query_ok
+
+
+def run_ranges():
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    path = os.path.join(tmp, "ranges_0000.root")
+    t = np.arange(100, dtype=np.float32)
+    root = picoDAQAssistant.RootManager(
+        filename=path, runN=0, sample_num=100, add_channels=["A"],
+        chunk_size=CHUNK,
+    )
+    root.start_thread()
+    stamps = 1_700_000_000 * 10**9 + np.arange(1000, dtype=np.int64) * 10**6
+    stamps[500:] += 60 * 10**9            # outage between chunks 9 and 10
+    for ts in stamps:
+        root.fill(timestamp=int(ts), Time=t, ChA=t)
+    root.close()
+    catalog = picoRunCatalog.RunCatalog(os.path.join(tmp, "catalog.sqlite"))
+    catalog.add_file("root", "ranges", root.catalog_entry())
+
+    ok = True
+    for lo, hi in ((120, 180), (0, 999), (490, 510), (999, 999)):
+        (hit,) = catalog.query(int(stamps[lo]), int(stamps[hi]))
+        ok = (ok and hit.entry_start <= lo and hit.entry_stop > hi
+              and lo - hit.entry_start < CHUNK
+              and hit.entry_stop - 1 - hi < CHUNK)
+    empty_ok = catalog.query(int(stamps[-1]) + 1, int(stamps[-1]) + 10**9) == []
+    gap_ok = catalog.query(int(stamps[499]) + 1, int(stamps[500]) - 1) == []
+    print(f"[TEST] entry ranges: cover the window within one {CHUNK}-entry "
+          f"chunk={ok}, empty window={empty_ok}, window in a trigger gap={gap_ok}")
+    return ok and empty_ok and gap_ok
+
+
+def fill_synthetic(catalog, n_files):
+    """n_files consecutive 400 s files of 10 chunks each."""
+    db = catalog._connect()
+    t0 = 1_700_000_000 * 10**9
+    span = 400 * 10**9
+    with db:
+        db.executemany(
+            "INSERT INTO files (id, path, kind, device, channels, samples,"
+            " first_ns, last_ns, entries, bytes) VALUES (?, ?, 'root', 'syn',"
+            " '[\"ChA\"]', 1000, ?, ?, 10000, 1)",
+            [(i, f"/syn/syn_{i:07d}.root", t0 + i * span, t0 + (i + 1) * span - 1)
+             for i in range(n_files)],
+        )
+        db.executemany(
+            "INSERT INTO chunks VALUES (?, ?, ?, ?, ?)",
+            [(i, 1000 * k, 1000 * (k + 1), t0 + i * span + k * span // 10,
+              t0 + i * span + (k + 1) * span // 10 - 1)
+             for i in range(n_files) for k in range(10)],
+        )
+    db.close()
+    return t0, span
+
+
+def query_time(n_files):
+    catalog = picoRunCatalog.RunCatalog(
+        os.path.join(tempfile.mkdtemp(prefix="h2daq_"), "catalog.sqlite")
+    )
+    t0, span = fill_synthetic(catalog, n_files)
+    rng = np.random.default_rng(1)
+    starts = t0 + rng.integers(0, (n_files - 2) * span, 200)
+    t_start = time.perf_counter()
+    found = [len(catalog.query(int(s), int(s) + span)) for s in starts]
+    per_query = (time.perf_counter() - t_start) / len(starts) * 1e3
+    return per_query, all(f in (2, 3) for f in found)
+
+
+def run_scaling():
+    small, small_ok = query_time(1000)
+    large, large_ok = query_time(100000)
+    print(f"[TEST] query of a 400 s window: {small:.2f} ms with 1 000 files, "
+          f"{large:.2f} ms with 100 000 files")
+    return small_ok and large_ok and large < 3 * small + 1.0
+
+
+def main():
+    print_banner("Virtual DAQ  —  SQLite Run Catalog Test  (no hardware)")
+    ok = all([run_digitizer(), run_ranges(), run_scaling()])
+    print_footer("Run Catalog Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# runVirtualTimeAxis.py
+# Per-file time axis test — no hardware required.
+#
+# Runs VirtualDigitizer headless with "root_time_axis": "event" and "file"
+# and checks for the "file" run that
+#   - rawWave has no Time branch and the file carries the timeAxis tree
+#   - picoDAQReader.readWaves() returns the same Time and channel arrays as
+#     for the per-event file (Time broadcast from the stored axis)
+#   - partial reads (entry_start/entry_stop) get a Time of matching length
+# and reports the file size per trigger of both runs.
+#
+# Run from project root:
+#   python3 test/runVirtualTimeAxis.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+import uproot
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src import picoDAQReader
+from src.banner import print_banner, print_footer
+
+RUN_SECONDS = 2.0
+
+
+class _FastVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 250.0
+
+
+def run_once(time_axis):
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+
+    cfg = dict(next(iter(VIRTUAL_CONFIGS.values())),
+               data_path=data_path, root_time_axis=time_axis)
+    stop_event = threading.Event()
+    worker = _FastVirtualDigitizer(
+        name=f"Virtual-{time_axis}", config=cfg,
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(RUN_SECONDS)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+    return sorted(glob.glob(f"{data_path}/root/*.root"))[0], worker.t
+
+
+def main():
+    print_banner("Virtual DAQ  —  Per-File Time Axis Test  (no hardware)")
+
+    event_path, _ = run_once("event")
+    file_path, t  = run_once("file")
+
+    with uproot.open(file_path) as f:
+        layout_ok = "Time" not in f["rawWave"].keys() and "timeAxis" in f
+    ev = picoDAQReader.readWaves(event_path)
+    fl = picoDAQReader.readWaves(file_path)
+    time_ok = (fl["Time"].shape == fl["ChA"].shape
+               and np.array_equal(fl["Time"][-1], t.astype(np.float32))
+               and np.array_equal(fl["Time"][0], ev["Time"][0]))
+    part = picoDAQReader.readWaves(file_path, entry_start=5, entry_stop=25)
+    part_ok = part["Time"].shape == part["ChA"].shape == (20, len(t))
+    axis_ok = np.array_equal(picoDAQReader.readTimeAxis(file_path),
+                             picoDAQReader.readTimeAxis(event_path))
+
+    per_ev = os.path.getsize(event_path) / len(ev["ChA"])
+    per_fl = os.path.getsize(file_path) / len(fl["ChA"])
+    # Bytes handed to the compressor per trigger (TTree fTotBytes)
+    with uproot.open(event_path) as f:
+        raw_ev = f["rawWave"].member("fTotBytes") / len(ev["ChA"])
+    with uproot.open(file_path) as f:
+        raw_fl = f["rawWave"].member("fTotBytes") / len(fl["ChA"])
+    print(f"[TEST] file axis: layout={layout_ok}, broadcast Time={time_ok}, "
+          f"partial read={part_ok}, readTimeAxis={axis_ok}")
+    print(f"[TEST] size per trigger: per-event Time {per_ev:.0f} B, "
+          f"per-file Time {per_fl:.0f} B (uncompressed {raw_ev:.0f} B -> "
+          f"{raw_fl:.0f} B)")
+
+    ok = layout_ok and time_ok and part_ok and axis_ok and per_fl < per_ev
+    print_footer("Time Axis Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
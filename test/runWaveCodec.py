@@ -0,0 +1,184 @@
+# runWaveCodec.py
+# int16 waveform codec test — no hardware required.
+#
+# 1. Round trip of picoWaveCodec (byteshuffle and bitshuffle) on
+#      - VirtualDigitizer-style square pulses with ±2 count noise
+#      - recorded-style waveforms: drifting baseline, exponential pulse with
+#        ringing, clipped at the rails, 8-bit ADC steps (PS3000A counts are
+#        multiples of 256)
+#      - full-range random data, rail-to-rail steps, odd sample counts
+# 2. Writes the synthetic and recorded-style sets through RootManager as
+#    float32 mV, raw int16, raw + byteshuffle and raw + bitshuffle (ZLIB:1
+#    and ZSTD:1), reads the raw ones back with picoDAQReader and reports
+#    bytes per trigger.
+# 3. Runs VirtualDigitizer headless with "root_codec": "bitshuffle" and
+#    checks H2Meta and the decoded counts.
+#
+# Run from project root:
+#   python3 test/runWaveCodec.py
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ctypes
+import glob
+import queue
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from test.VirtualDigitizer import VirtualDigitizer
+from test.config_virtual_continuous import VIRTUAL_CONFIGS
+from src import picoDAQAssistant, picoDAQReader, picoWaveCodec
+from src.banner import print_banner, print_footer
+
+N_TRIGGERS = 1000
+SAMPLES    = 1000
+RNG        = np.random.default_rng(7)
+
+
+def synthetic(n, samples):
+    """Square pulse at 10 % of the window, 5 % amplitude spread, ±2 counts."""
+    x = RNG.integers(-2, 3, (n, samples)).astype(np.int32)
+    amp = RNG.normal(-700, 35, n) * 32767 / 2000
+    x[:, samples // 10: samples // 10 + 100] += amp[:, None].astype(np.int32)
+    return x.astype(np.int16)
+
+
+def recorded_style(n, samples):
+    """Exponential pulse + ringing on a drifting baseline, 8-bit ADC steps."""
+    t = np.arange(samples)
+    t0 = samples // 10
+    shape = np.where(t >= t0, np.exp(-(t - t0) / 40.0)
+                     * (1 + 0.1 * np.sin((t - t0) / 3.0)), 0.0)
+    baseline = np.cumsum(RNG.normal(0, 0.02, (n, samples)), axis=1) + 3
+    amp = RNG.normal(-120, 30, n)                    # in 8-bit steps
+    noise = RNG.normal(0, 0.6, (n, samples))
+    steps = np.clip(np.round(baseline + amp[:, None] * shape + noise), -128, 127)
+    return (steps * 256).astype(np.int16)
+
+
+def round_trips():
+    cases = {
+        "synthetic":      synthetic(200, SAMPLES),
+        "recorded-style": recorded_style(200, SAMPLES),
+        "full-range":     RNG.integers(-32768, 32768, (50, SAMPLES), dtype=np.int16),
+        "rail steps":     np.tile(np.array([32767, -32768], dtype=np.int16), (4, 500)),
+        "odd length":     RNG.integers(-5, 5, (20, 1001), dtype=np.int16),
+        "one sample":     np.array([[-32768], [0], [32767]], dtype=np.int16),
+        "no rows":        np.zeros((0, 16), dtype=np.int16),
+    }
+    ok = True
+    for shuffle in picoWaveCodec.CODECS:
+        codec = picoWaveCodec.WaveCodec(shuffle)
+        for label, adc in cases.items():
+            blob = codec.encode(adc)
+            back = picoWaveCodec.decode(blob, adc.shape[1], codec.name)
+            same = back.dtype == np.int16 and np.array_equal(back, adc)
+            ok = ok and same
+            if not same:
+                print(f"[TEST] {shuffle}: round trip FAILED for {label}")
+        print(f"[TEST] {shuffle:11s}: round trip of {len(cases)} data sets ok")
+
+    codec = picoWaveCodec.WaveCodec("bitshuffle")
+    adc = synthetic(N_TRIGGERS, SAMPLES)
+    t0 = time.perf_counter()
+    blob = codec.encode(adc)
+    t1 = time.perf_counter()
+    picoWaveCodec.decode(blob, SAMPLES, codec.name)
+    t2 = time.perf_counter()
+    mb = adc.nbytes / 2**20
+    print(f"[TEST] bitshuffle speed: encode {mb / (t1 - t0):.0f} MB/s, "
+          f"decode {mb / (t2 - t1):.0f} MB/s")
+    return ok
+
+
+def write_file(path, adc, compression, codec, storage="raw"):
+    args = (["A"], {"A": 7}, ctypes.c_int16(32767), {"A": 0})
+    root = picoDAQAssistant.RootManager(
+        filename=path, runN=0, sample_num=SAMPLES, add_channels=["A"],
+        raw_meta=picoDAQAssistant.rawStorageMeta(*args, 10.0) if storage == "raw" else None,
+        converter=picoDAQAssistant.AdcConverter(*args),
+        time_axis=np.arange(SAMPLES),
+        compression=picoDAQAssistant.rootCompression(*compression),
+        codec=codec,
+    )
+    root.start_thread()
+    for row in adc:
+        root.fill(Time=None, ChA=row)
+    root.close()
+
+
+def sizes():
+    tmp = tempfile.mkdtemp(prefix="h2daq_")
+    ok = True
+    for label, adc in (("synthetic", synthetic(N_TRIGGERS, SAMPLES)),
+                       ("recorded-style", recorded_style(N_TRIGGERS, SAMPLES))):
+        line = []
+        for comp in (("ZLIB", 1), ("ZSTD", 1)):
+            mv_path = os.path.join(tmp, f"{label}_{comp[0]}_mV.root")
+            write_file(mv_path, adc, comp, None, storage="mV")
+            size = {"mV": os.path.getsize(mv_path) / N_TRIGGERS}
+            for shuffle in ("none",) + picoWaveCodec.CODECS:
+                codec = None if shuffle == "none" else picoWaveCodec.WaveCodec(shuffle)
+                path = os.path.join(tmp, f"{label}_{comp[0]}_{shuffle}.root")
+                write_file(path, adc, comp, codec)
+                back = picoDAQReader.readWaves(path, unit="adc")["ChA"]
+                ok = ok and np.array_equal(back, adc)
+                size[shuffle] = os.path.getsize(path) / N_TRIGGERS
+            line.append(f"{comp[0]}:1 mV {size['mV']:.0f} B, int16 {size['none']:.0f} B, byteshuffle "
+                        f"{size['byteshuffle']:.0f} B, bitshuffle "
+                        f"{size['bitshuffle']:.0f} B")
+            ok = ok and size["bitshuffle"] < size["none"]
+        print(f"[TEST] {label:14s} per trigger: " + " | ".join(line))
+    return ok
+
+
+class _FastVirtualDigitizer(VirtualDigitizer):
+    TRIGGER_RATE_HZ = 250.0
+
+
+def virtual_run():
+    data_path = tempfile.mkdtemp(prefix="h2daq_")
+    for sub in ("root", "csv"):
+        os.makedirs(os.path.join(data_path, sub))
+    cfg = dict(next(iter(VIRTUAL_CONFIGS.values())), data_path=data_path,
+               root_storage="raw", root_codec="bitshuffle")
+    stop_event = threading.Event()
+    worker = _FastVirtualDigitizer(
+        name="Virtual-codec", config=cfg,
+        update_queue=queue.Queue(), stop_event=stop_event,
+    )
+    worker.start()
+    time.sleep(2.0)
+    stop_event.set()
+    worker.join()
+    worker.close()
+    if worker.error is not None:
+        raise worker.error
+
+    path  = sorted(glob.glob(f"{data_path}/root/*.root"))[0]
+    meta  = picoDAQReader.readMeta(path)
+    adc   = picoDAQReader.readWaves(path, unit="adc")["ChA"]
+    waves = picoDAQReader.readWaves(path)["ChA"]
+    # Square pulse of about -700 mV starting at 10 % of the window
+    pulse_ok = abs(float(np.median(waves[:, 150])) + 700) < 50
+    ok = (meta.get("codec") == "delta-zigzag-bitshuffle"
+          and adc.dtype == np.int16 and adc.shape[1] == SAMPLES and pulse_ok)
+    print(f"[TEST] VirtualDigitizer: H2Meta codec={meta.get('codec')}, "
+          f"{len(adc)} triggers decoded, pulse at -700 mV={pulse_ok}")
+    return ok
+
+
+def main():
+    print_banner("picoWaveCodec  —  Delta + Shuffle Round-Trip Test  (no hardware)")
+    ok = all([round_trips(), sizes(), virtual_run()])
+    print_footer("Wave Codec Test")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()